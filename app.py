@@ -1,5 +1,8 @@
 import streamlit as st
 import boto3
+import numpy as np
+import asyncio
+import contextvars
 import json
 import uuid
 import re
@@ -7,9 +10,21 @@ import os
 import html
 import time
 import hashlib
-from concurrent.futures import ThreadPoolExecutor
+import heapq
+import sqlite3
+import threading
+from collections import OrderedDict, deque
+from concurrent.futures import Future
+from contextlib import closing, contextmanager
 from datetime import datetime
-from botocore.exceptions import ClientError, ParamValidationError
+from botocore.config import Config
+from botocore.exceptions import (
+    ClientError,
+    ConnectTimeoutError,
+    EndpointConnectionError,
+    ParamValidationError,
+    ReadTimeoutError,
+)
 
 # ─────────────────────────────────────────────
 # PAGE CONFIG
@@ -102,6 +117,8 @@ RESPONSE_PROFILES = {
         "allow_manual_fallback": False,
         "single_pass_only": False,
         "enforce_strict_grounding": False,
+        "latency_budget_seconds": 12.0,
+        "breaker_slo_seconds": 20.0,
     },
     "balanced": {
         "label": "Balanced",
@@ -112,6 +129,8 @@ RESPONSE_PROFILES = {
         "allow_manual_fallback": True,
         "single_pass_only": False,
         "enforce_strict_grounding": None,
+        "latency_budget_seconds": 25.0,
+        "breaker_slo_seconds": 40.0,
     },
     "deep": {
         "label": "Deep Accuracy",
@@ -122,6 +141,8 @@ RESPONSE_PROFILES = {
         "allow_manual_fallback": True,
         "single_pass_only": False,
         "enforce_strict_grounding": True,
+        "latency_budget_seconds": 45.0,
+        "breaker_slo_seconds": 90.0,
     },
 }
 EXPORT_FORMATS = (
@@ -494,6 +515,8 @@ def init_session_state():
             **{key: None for key in DUAL_MODE_SESSION_KEYS},
         },
         "export_format": EXPORT_FORMATS[0],
+        "stream_answers": True,
+        "fanout_key": uuid.uuid4().hex,
     }
     for key, val in defaults.items():
         if key not in st.session_state:
@@ -605,12 +628,21 @@ def init_session_state():
             st.session_state.helpful_questions_by_mode.setdefault(mode, [])
 
     if "response_cache_by_mode" not in st.session_state:
-        st.session_state.response_cache_by_mode = {mode: {} for mode in MODE_KEYS}
-        st.session_state.response_cache_by_mode["both"] = {}
+        st.session_state.response_cache_by_mode = {mode: OrderedDict() for mode in MODE_KEYS}
+        st.session_state.response_cache_by_mode["both"] = OrderedDict()
     else:
         for mode in MODE_KEYS:
-            st.session_state.response_cache_by_mode.setdefault(mode, {})
-        st.session_state.response_cache_by_mode.setdefault("both", {})
+            st.session_state.response_cache_by_mode.setdefault(mode, OrderedDict())
+        st.session_state.response_cache_by_mode.setdefault("both", OrderedDict())
+
+    if "response_cache_index_by_mode" not in st.session_state:
+        st.session_state.response_cache_index_by_mode = {}
+    if "helpful_norms_by_mode" not in st.session_state:
+        st.session_state.helpful_norms_by_mode = {}
+    if "semantic_index_by_mode" not in st.session_state:
+        st.session_state.semantic_index_by_mode = {}
+    if "response_cache_version_by_mode" not in st.session_state:
+        st.session_state.response_cache_version_by_mode = {}
 
     if "queued_action" not in st.session_state:
         st.session_state.queued_action = {mode: None for mode in MODE_KEYS}
@@ -624,12 +656,6 @@ def init_session_state():
         for mode in MODE_KEYS:
             st.session_state.queued_action.setdefault(mode, None)
 
-    if "bedrock_feature_support" not in st.session_state:
-        st.session_state.bedrock_feature_support = {
-            "retrievalConfiguration": None,
-            "generationConfiguration": None,
-        }
-
 
 def get_messages(mode: str = None):
     mode = mode or st.session_state.mode
@@ -676,12 +702,17 @@ def clear_mode_state(mode: str):
     st.session_state.bookmarks_by_mode[mode] = []
     st.session_state.feedback_by_mode[mode] = {}
     st.session_state.helpful_questions_by_mode[mode] = []
-    st.session_state.response_cache_by_mode[mode] = {}
+    st.session_state.helpful_norms_by_mode.pop(mode, None)
+    st.session_state.response_cache_by_mode[mode] = OrderedDict()
+    st.session_state.response_cache_index_by_mode.pop(mode, None)
+    st.session_state.semantic_index_by_mode.pop(mode, None)
     reset_quiz_state(mode)
     if mode == "both":
         for key in DUAL_MODE_SESSION_KEYS:
             st.session_state.session_ids[key] = None
-        st.session_state.response_cache_by_mode["both"] = {}
+        st.session_state.response_cache_by_mode["both"] = OrderedDict()
+        st.session_state.response_cache_index_by_mode.pop("both", None)
+        st.session_state.semantic_index_by_mode.pop("both", None)
 
 
 def make_message_id() -> str:
@@ -709,6 +740,90 @@ def query_tokens(text: str) -> set:
     }
 
 
+# Cache-key canonicalization. Glossary phrases that share an expansion fold
+# to one concept token ("2nd apron" / "second apron" -> "2nd_apron"); the
+# aliases fold formal phrasings the glossary only lists as expansions.
+# Interrogatives, direction ("to" / "from"), modals and negations stay in
+# keys, and word order is kept, since "trade to" vs "trade from" or "can"
+# vs "should" are different questions.
+CACHE_KEY_ALIASES = {
+    "cba": {
+        "tax level 2": "2nd apron",
+        "tax level 1": "1st apron",
+        "designated veteran player extension": "supermax",
+        "traded player exception": "TPE",
+        "bi annual exception": "BAE",
+        "veteran minimum": "vet min",
+    },
+    "rulebook": {},
+}
+# Stopwords that change the answer (question type, direction, modality,
+# negation); cache keys and similar-question matches keep them.
+CACHE_KEY_ANSWER_TOKENS = frozenset({
+    "how", "what", "when", "where", "why", "which", "who", "whom",
+    "to", "from", "into", "under",
+    "can", "could", "would", "should",
+    "not", "no", "never", "without",
+})
+CACHE_KEY_STOPWORDS = QUERY_STOPWORDS - CACHE_KEY_ANSWER_TOKENS
+
+
+def _build_canonical_glossary(modes: tuple) -> dict:
+    tokens = {}
+    for glossary_mode in modes:
+        concept_tokens = {}
+        glossary = SLANG_GLOSSARY.get(glossary_mode, {})
+        for slang, formal_terms in glossary.items():
+            phrase = normalize_query_text(slang)
+            if not phrase or all(len(part) == 1 for part in phrase.split()):
+                continue
+            concept = concept_tokens.setdefault(formal_terms, phrase.replace(" ", "_"))
+            tokens[phrase] = concept
+        for alias, slang in CACHE_KEY_ALIASES.get(glossary_mode, {}).items():
+            target = tokens.get(normalize_query_text(slang))
+            if target:
+                tokens[normalize_query_text(alias)] = target
+    if not tokens:
+        return {"pattern": None, "tokens": tokens}
+    alternation = "|".join(re.escape(phrase) for phrase in sorted(tokens, key=len, reverse=True))
+    return {"pattern": re.compile(rf"(?<!\w)(?:{alternation})(?!\w)"), "tokens": tokens}
+
+
+CANONICAL_GLOSSARY = {
+    "rulebook": _build_canonical_glossary(("rulebook",)),
+    "cba": _build_canonical_glossary(("cba",)),
+    "both": _build_canonical_glossary(("rulebook", "cba")),
+}
+
+
+def canonical_query_text(question: str, mode: str) -> str:
+    """Cache form of a question: glossary concepts folded and filler stopwords dropped, in order."""
+    text = normalize_query_text(question)
+    glossary = CANONICAL_GLOSSARY.get(mode)
+    if glossary and glossary["pattern"]:
+        text = glossary["pattern"].sub(lambda match: glossary["tokens"][match.group(0)], text)
+    return " ".join(token for token in text.split() if token not in CACHE_KEY_STOPWORDS)
+
+
+def canonical_texts_compatible(canonical_a: str, canonical_b: str) -> bool:
+    """Whether two canonical questions can share an answer despite different wording.
+
+    Their answer-changing words must match in order, and the words they share
+    must appear in the same order, so "trade to" never matches "trade from"
+    and "Celtics trade Knicks" never matches "Knicks trade Celtics".
+    """
+    tokens_a, tokens_b = canonical_a.split(), canonical_b.split()
+    if [t for t in tokens_a if t in CACHE_KEY_ANSWER_TOKENS] != [t for t in tokens_b if t in CACHE_KEY_ANSWER_TOKENS]:
+        return False
+    shared = set(tokens_a) & set(tokens_b)
+    return [t for t in dict.fromkeys(tokens_a) if t in shared] == [t for t in dict.fromkeys(tokens_b) if t in shared]
+
+
+def canonical_query_tokens(question: str, mode: str) -> set:
+    """Token set for similar-question matching; keeps the same answer-changing words as the key."""
+    return {token for token in canonical_query_text(question, mode).split() if len(token) > 1}
+
+
 def has_contextual_reference(text: str) -> bool:
     normalized = normalize_query_text(text)
     tokens = set(normalized.split())
@@ -729,8 +844,10 @@ def retrieval_signature(response_mode: str, retrieval_settings: dict) -> str:
 
 
 def query_similarity_score(question_a: str, question_b: str) -> float:
-    tokens_a = query_tokens(question_a)
-    tokens_b = query_tokens(question_b)
+    return token_set_similarity(query_tokens(question_a), query_tokens(question_b))
+
+
+def token_set_similarity(tokens_a: set, tokens_b: set) -> float:
     if not tokens_a or not tokens_b:
         return 0.0
 
@@ -812,15 +929,434 @@ def progressive_first_pass_settings(settings: dict, response_mode: str) -> dict:
     return first_pass
 
 
-def _cache_store(mode: str) -> dict:
-    return st.session_state.response_cache_by_mode.setdefault(mode, {})
+# Seed costs (seconds) used until a stage has real samples in this process.
+STAGE_COST_DEFAULTS = {
+    "first_pass": 4.0,
+    "triage_escalation": 7.0,
+    "depth_escalation": 5.0,
+    "lane_escalation": 6.0,
+    "fallback": 6.0,
+    "hypothetical": 10.0,
+    "definitional": 7.0,
+    # Not cascade stages; used to credit cache hits with the latency they saved.
+    "answer": 15.0,
+    "retrieve": 1.5,
+    "aux_llm": 2.0,
+}
+STAGE_LATENCY_SAMPLES = 40
+
+
+@st.cache_resource(show_spinner=False)
+def _stage_latency_store() -> dict:
+    """Process-wide rolling wall-clock samples per (mode, stage)."""
+    return {"lock": threading.Lock(), "samples": {}}
+
+
+def record_stage_latency(mode: str, stage: str, seconds: float):
+    store = _stage_latency_store()
+    with store["lock"]:
+        samples = store["samples"].setdefault((mode, stage), deque(maxlen=STAGE_LATENCY_SAMPLES))
+        samples.append(seconds)
+
+
+def stage_p50(mode: str, stage: str) -> float:
+    store = _stage_latency_store()
+    with store["lock"]:
+        samples = sorted(store["samples"].get((mode, stage), ()))
+    if not samples:
+        return STAGE_COST_DEFAULTS.get(stage, 5.0)
+    return samples[len(samples) // 2]
+
+
+HEDGE_HISTORY_MIN_SAMPLES = 6
+HEDGE_IMMEDIATE_ESCALATION_RATE = 0.5
+
+
+@st.cache_resource(show_spinner=False)
+def _triage_outcome_store() -> dict:
+    """Process-wide triage escalation counts per (mode, question class)."""
+    return {"lock": threading.Lock(), "counts": {}}
+
+
+def question_class(question: str, mode: str) -> str:
+    if is_hypothetical_question(question):
+        return "hypothetical"
+    if mode == "cba" and is_simple_cba_question(question):
+        return "simple"
+    return "standard"
+
+
+def record_triage_outcome(mode: str, q_class: str, escalated: bool):
+    store = _triage_outcome_store()
+    with store["lock"]:
+        counts = store["counts"].setdefault((mode, q_class), {"total": 0, "escalated": 0})
+        counts["total"] += 1
+        counts["escalated"] += int(bool(escalated))
+
+
+def hedge_delay_for(runtime_config: dict, mode: str, q_class: str):
+    """Seconds to wait before hedging triage with the primary pass, or None when hedging is off."""
+    delay = runtime_config.get("hedge_delay_seconds")
+    if delay is None:
+        return None
+    store = _triage_outcome_store()
+    with store["lock"]:
+        counts = dict(store["counts"].get((mode, q_class), {"total": 0, "escalated": 0}))
+    if (
+        counts["total"] >= HEDGE_HISTORY_MIN_SAMPLES
+        and counts["escalated"] / counts["total"] >= HEDGE_IMMEDIATE_ESCALATION_RATE
+    ):
+        return 0.0
+    return delay
+
+
+# Route cache: which cascade stage answered a cluster of similar questions and
+# which stages failed on the way, so the next one can jump straight there.
+# It memoizes the decision path, not the answer, so it is process-wide and
+# independent of Bedrock session context.
+ROUTE_CACHE_MAX_ENTRIES = 500
+ROUTE_CACHE_TTL_SECONDS = 24 * 60 * 60
+ROUTE_MIN_SIMILARITY = 0.6
+ROUTE_NEGATIVE_MIN_FAILURES = 2
+ROUTE_STAGE_COSTS = {
+    "depth_escalation": "depth_escalation",
+    "fallback_expanded": "fallback",
+    "fallback_manual": "fallback",
+    "hypothetical": "hypothetical",
+    "definitional": "definitional",
+}
+
+
+@st.cache_resource(show_spinner=False)
+def _route_cache() -> dict:
+    """Process-wide (mode, response_mode, canonical question) -> route, with token postings."""
+    return {"lock": threading.Lock(), "entries": OrderedDict(), "postings": {}}
+
+
+def _route_drop(cache: dict, route_key: tuple):
+    entry = cache["entries"].pop(route_key, None)
+    for token in (entry or {}).get("tokens", ()):
+        postings = cache["postings"].get(route_key[:2] + (token,))
+        if postings is not None:
+            postings.discard(route_key)
+            if not postings:
+                del cache["postings"][route_key[:2] + (token,)]
+
+
+def route_cache_get(mode: str, response_mode: str, question: str):
+    """Route for the question or its nearest similar cluster: {"winner", "failed"} or None."""
+    canonical = canonical_query_text(question, mode)
+    tokens = canonical_query_tokens(question, mode)
+    if not tokens:
+        return None
+    cache = _route_cache()
+    now = time.time()
+    with cache["lock"]:
+        best_key = (mode, response_mode, canonical)
+        best_score = 1.0 if best_key in cache["entries"] else 0.0
+        if not best_score:
+            candidates = set()
+            for token in tokens:
+                candidates.update(cache["postings"].get((mode, response_mode, token), ()))
+            for route_key in candidates:
+                score = token_set_similarity(tokens, cache["entries"][route_key]["tokens"])
+                if score >= ROUTE_MIN_SIMILARITY and score > best_score:
+                    best_key, best_score = route_key, score
+        entry = cache["entries"].get(best_key) if best_score else None
+        route = None
+        if entry and entry["updated_at"] < now - ROUTE_CACHE_TTL_SECONDS:
+            _route_drop(cache, best_key)
+        elif entry:
+            cache["entries"].move_to_end(best_key)
+            route = {"winner": entry["winner"], "failed": dict(entry["failed"]), "score": best_score}
+    if route is None:
+        record_cache_event("route", mode, "misses")
+        return None
+    record_cache_event("route", mode, "exact_hits" if best_score == 1.0 else "similar_hits")
+    return route
+
+
+def record_route(mode: str, response_mode: str, question: str, winner, failed_stages):
+    """Remember the stage that produced the accepted answer (None if none did) and the ones that failed."""
+    tokens = frozenset(canonical_query_tokens(question, mode))
+    if not tokens:
+        return
+    route_key = (mode, response_mode, canonical_query_text(question, mode))
+    cache = _route_cache()
+    with cache["lock"]:
+        entry = cache["entries"].get(route_key)
+        if entry is None:
+            entry = {"tokens": tokens, "winner": None, "failed": {}}
+            cache["entries"][route_key] = entry
+            for token in tokens:
+                cache["postings"].setdefault((mode, response_mode, token), set()).add(route_key)
+        if winner:
+            entry["winner"] = winner
+            entry["failed"].pop(winner, None)
+        elif entry["winner"] in failed_stages:
+            entry["winner"] = None
+        for stage in failed_stages:
+            if stage != winner:
+                entry["failed"][stage] = entry["failed"].get(stage, 0) + 1
+        entry["updated_at"] = time.time()
+        cache["entries"].move_to_end(route_key)
+        evicted = []
+        while len(cache["entries"]) > ROUTE_CACHE_MAX_ENTRIES:
+            evicted.append(next(iter(cache["entries"])))
+            _route_drop(cache, evicted[-1])
+    for evicted_key in evicted:
+        record_cache_event("route", evicted_key[0], "evictions")
+
+
+async def first_acceptable(lanes: dict, acceptable=None, timeout: float = None):
+    """Run lanes concurrently and return as soon as one result passes acceptable.
+
+    lanes maps a name to an awaitable. Once the race is decided, unfinished
+    lanes are cancelled, so they make no further Bedrock calls; an in-flight
+    call is abandoned rather than awaited. Returns (winner, results) with every
+    lane that finished in time. Without acceptable, all lanes are collected
+    until timeout.
+    """
+    loop = asyncio.get_running_loop()
+    started = loop.time()
+    results = {}
+    pending = {asyncio.ensure_future(lane): name for name, lane in lanes.items()}
+    try:
+        while pending:
+            wait_for = None if timeout is None else timeout - (loop.time() - started)
+            if wait_for is not None and wait_for <= 0:
+                break
+            done, _ = await asyncio.wait(set(pending), timeout=wait_for, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                name = pending.pop(task)
+                try:
+                    results[name] = task.result()
+                except Exception:
+                    results[name] = None
+                if acceptable and results[name] is not None and acceptable(results[name]):
+                    return name, results
+    finally:
+        for task in pending:
+            task.cancel()
+    return None, results
+
+
+async def hedged_race(lead, hedge, hedge_delay: float, acceptable, timeout: float = None):
+    """Start lead now and hedge after hedge_delay seconds, or as soon as lead fails.
+
+    lead and hedge are callables returning awaitables. Returns (winner, result)
+    for the first result that passes acceptable; the other lane is cancelled,
+    as in first_acceptable. If neither is acceptable in time, the hedge result
+    is preferred over the lead. winner is "lead", "hedge" or None.
+    """
+    loop = asyncio.get_running_loop()
+    started = loop.time()
+    results = {}
+    pending = {asyncio.ensure_future(lead()): "lead"}
+    try:
+        hedge_started = False
+        while pending:
+            elapsed = loop.time() - started
+            wait_for = None if timeout is None else timeout - elapsed
+            if wait_for is not None and wait_for <= 0:
+                break
+            if not hedge_started:
+                until_hedge = max(hedge_delay - elapsed, 0.0)
+                wait_for = until_hedge if wait_for is None else min(wait_for, until_hedge)
+            done, _ = await asyncio.wait(set(pending), timeout=wait_for, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                name = pending.pop(task)
+                try:
+                    results[name] = task.result()
+                except Exception:
+                    results[name] = None
+                if results[name] is not None and acceptable(results[name]):
+                    return name, results[name]
+            if not hedge_started and (not pending or loop.time() - started >= hedge_delay):
+                pending[asyncio.ensure_future(hedge())] = "hedge"
+                hedge_started = True
+    finally:
+        for task in pending:
+            task.cancel()
+    for name in ("hedge", "lead"):
+        if results.get(name) is not None:
+            return name, results[name]
+    return None, None
+
+
+@st.cache_resource(show_spinner=False)
+def _shared_lru(name: str) -> dict:
+    """Process-wide LRU store shared by every session and worker thread."""
+    return {"lock": threading.Lock(), "entries": OrderedDict()}
+
+
+def _shared_lru_get(name: str, key):
+    store = _shared_lru(name)
+    with store["lock"]:
+        entry = store["entries"].get(key)
+        if entry is None:
+            return None
+        expires_at = entry.get("expires_at")
+        if expires_at is not None and expires_at <= time.time():
+            store["entries"].pop(key, None)
+            return None
+        store["entries"].move_to_end(key)
+        return entry["value"]
+
+
+def _shared_lru_set(name: str, key, value, max_entries: int, ttl_seconds: float = None):
+    store = _shared_lru(name)
+    with store["lock"]:
+        store["entries"][key] = {
+            "value": value,
+            "expires_at": time.time() + ttl_seconds if ttl_seconds else None,
+        }
+        store["entries"].move_to_end(key)
+        evicted = 0
+        while len(store["entries"]) > max_entries:
+            store["entries"].popitem(last=False)
+            evicted += 1
+    return evicted
+
+
+# ─────────────────────────────────────────────
+# CACHE OBSERVABILITY
+# ─────────────────────────────────────────────
+# Counters per (tier, mode). Tiers: "session" (per-session answers, exact and
+# similar), "shared" (process-wide answers), "persistent" (SQLite, any kind),
+# "retrieve" (chunk results), "aux_llm" (helper LLM outputs) and "route".
+# A memory miss that is served from disk counts as a memory-tier miss plus a
+# persistent-tier hit.
+CACHE_STAT_EVENTS = ("exact_hits", "similar_hits", "misses", "evictions", "invalidations")
+
+
+@st.cache_resource(show_spinner=False)
+def _cache_stats_store() -> dict:
+    return {"lock": threading.Lock(), "counts": {}}
+
+
+def record_cache_event(tier: str, mode: str, event: str, count: int = 1, saved_seconds: float = 0.0):
+    if not count:
+        return
+    store = _cache_stats_store()
+    with store["lock"]:
+        counts = store["counts"].setdefault(
+            (tier, mode), {**dict.fromkeys(CACHE_STAT_EVENTS, 0), "saved_seconds": 0.0}
+        )
+        counts[event] += count
+        counts["saved_seconds"] += saved_seconds
+
+
+def record_cache_hit(tier: str, mode: str, stage: str, similar: bool = False):
+    """Count a hit and credit it with the p50 latency of the work it skipped."""
+    record_cache_event(tier, mode, "similar_hits" if similar else "exact_hits", saved_seconds=stage_p50(mode, stage))
+
+
+def mode_for_kb(knowledge_base_id: str) -> str:
+    for mode in ("rulebook", "cba"):
+        if get_mode_runtime_config(mode)["kb_id"] == knowledge_base_id:
+            return mode
+    return "both" if "+" in (knowledge_base_id or "") else "other"
+
+
+def _json_size(value) -> int:
+    return len(json.dumps(value, default=str).encode("utf-8"))
+
+
+def cache_bytes_held() -> dict:
+    """(tier, mode) -> {"entries", "bytes"} for every tier this process can see."""
+    held = {}
+
+    def add(tier, mode, size):
+        slot = held.setdefault((tier, mode), {"entries": 0, "bytes": 0})
+        slot["entries"] += 1
+        slot["bytes"] += size
+
+    for mode, store in st.session_state.get("response_cache_by_mode", {}).items():
+        for entry in store.values():
+            add("session", mode, entry.get("size", 0))
+    shared = _shared_answer_cache()
+    with shared["lock"]:
+        for (partition_key, _), size in shared["lru"].items():
+            add("shared", partition_key[0], size)
+    for tier, name in (("retrieve", "retrieve"), ("aux_llm", "aux_llm")):
+        store = _shared_lru(name)
+        with store["lock"]:
+            items = [(key, entry["value"]) for key, entry in store["entries"].items()]
+        for key, value in items:
+            mode = mode_for_kb(key[0]) if tier == "retrieve" else key[0]
+            add(tier, mode, _json_size(value))
+    routes = _route_cache()
+    with routes["lock"]:
+        for route_key in routes["entries"]:
+            add("route", route_key[0], 0)
+    for mode, entries, size in _persistent_cache_run(
+        "SELECT mode, COUNT(*), COALESCE(SUM(size), 0) FROM answers GROUP BY mode "
+        "UNION ALL SELECT mode, COUNT(*), COALESCE(SUM(size), 0) FROM aux_llm GROUP BY mode",
+        fetch=True,
+    ):
+        slot = held.setdefault(("persistent", mode), {"entries": 0, "bytes": 0})
+        slot["entries"] += entries
+        slot["bytes"] += size
+    for kb_id, entries, size in _persistent_cache_run(
+        "SELECT kb_id, COUNT(*), COALESCE(SUM(size), 0) FROM retrievals GROUP BY kb_id",
+        fetch=True,
+    ):
+        slot = held.setdefault(("persistent", mode_for_kb(kb_id)), {"entries": 0, "bytes": 0})
+        slot["entries"] += entries
+        slot["bytes"] += size
+    return held
+
+
+def cache_hit_rate(tier: str, mode: str):
+    """Process-wide hit rate for one (tier, mode), from the counters alone."""
+    store = _cache_stats_store()
+    with store["lock"]:
+        counts = store["counts"].get((tier, mode))
+        if not counts:
+            return None
+        hits = counts["exact_hits"] + counts["similar_hits"]
+        lookups = hits + counts["misses"]
+    return hits / lookups if lookups else None
+
+
+def cache_stats_snapshot(include_held: bool = False) -> list:
+    """One row per (tier, mode): counters, hit rate and average saved latency.
+
+    include_held adds entries and bytes held, which walks every tier and
+    queries SQLite; only the admin panel asks for it, and only on request.
+    """
+    store = _cache_stats_store()
+    with store["lock"]:
+        counts = {key: dict(value) for key, value in store["counts"].items()}
+    held = cache_bytes_held() if include_held else {}
+    rows = []
+    for tier, mode in sorted(set(counts) | set(held)):
+        row = {"tier": tier, "mode": mode}
+        row.update(counts.get((tier, mode), {**dict.fromkeys(CACHE_STAT_EVENTS, 0), "saved_seconds": 0.0}))
+        row.update(held.get((tier, mode), {"entries": 0, "bytes": 0}))
+        hits = row["exact_hits"] + row["similar_hits"]
+        lookups = hits + row["misses"]
+        row["hit_rate"] = round(hits / lookups, 3) if lookups else None
+        row["avg_saved_ms"] = round(row["saved_seconds"] * 1000 / hits) if hits else None
+        row["saved_seconds"] = round(row["saved_seconds"], 2)
+        rows.append(row)
+    return rows
+
+
+def _cache_store(mode: str) -> OrderedDict:
+    store = st.session_state.response_cache_by_mode.get(mode)
+    if not isinstance(store, OrderedDict):
+        store = OrderedDict(sorted((store or {}).items(), key=lambda item: item[1].get("created_at", 0)))
+        st.session_state.response_cache_by_mode[mode] = store
+    return store
 
 
 def _cache_key(question: str, mode: str, response_mode: str, retrieval_settings: dict, session_scope: str) -> str:
     payload = {
         "mode": mode,
         "response_mode": response_mode,
-        "question": question.strip().lower(),
+        "question": canonical_query_text(question, mode) or question.strip().lower(),
         "results": retrieval_settings.get("number_of_results"),
         "sources": retrieval_settings.get("max_sources"),
         "strict": retrieval_settings.get("strict_grounding"),
@@ -837,12 +1373,66 @@ def _cache_key(question: str, mode: str, response_mode: str, retrieval_settings:
 
 
 def _cache_get(mode: str, cache_key: str):
-    entry = _cache_store(mode).get(cache_key)
+    store = _cache_store(mode)
+    entry = store.get(cache_key)
     if not entry:
         return None
+    if entry.get("kb_version", "") != mode_content_version(mode):
+        _cache_drop(mode, cache_key)
+        record_cache_event("session", mode, "invalidations")
+        return None
+    store.move_to_end(cache_key)
+    record_cache_hit("session", mode, "answer")
     return entry.get("response"), entry.get("citations", [])
 
 
+def _cache_sweep_stale(mode: str):
+    """Drop entries answered from an older KB ingestion, once per version change."""
+    content_version = mode_content_version(mode)
+    swept = st.session_state.response_cache_version_by_mode
+    if swept.get(mode) == content_version:
+        return
+    store = _cache_store(mode)
+    stale_keys = [key for key, entry in store.items() if entry.get("kb_version", "") != content_version]
+    for key in stale_keys:
+        _cache_drop(mode, key)
+    record_cache_event("session", mode, "invalidations", count=len(stale_keys))
+    swept[mode] = content_version
+
+
+def _cache_drop(mode: str, cache_key: str):
+    _cache_unindex(mode, cache_key, _cache_store(mode).pop(cache_key, None))
+    _semantic_remove(mode, cache_key)
+
+
+def _cache_index(mode: str) -> dict:
+    """Postings for the session cache: query token -> keys of entries containing it."""
+    return st.session_state.response_cache_index_by_mode.setdefault(mode, {})
+
+
+def _cache_unindex(mode: str, cache_key: str, entry: dict):
+    index = _cache_index(mode)
+    for token in (entry or {}).get("tokens", ()):
+        postings = index.get(token)
+        if postings is None:
+            continue
+        postings.discard(cache_key)
+        if not postings:
+            del index[token]
+
+
+def _helpful_norms(mode: str) -> set:
+    norms = st.session_state.helpful_norms_by_mode.get(mode)
+    if norms is None:
+        norms = {
+            canonical_query_text(item.get("question", ""), mode)
+            for item in st.session_state.helpful_questions_by_mode.get(mode, [])
+            if isinstance(item, dict) and item.get("question")
+        }
+        st.session_state.helpful_norms_by_mode[mode] = norms
+    return norms
+
+
 def _cache_get_similar(
     mode: str,
     question: str,
@@ -851,44 +1441,86 @@ def _cache_get_similar(
     min_score: float = 0.86,
 ):
     if has_contextual_reference(question):
+        record_cache_event("session", mode, "misses")
+        return None
+
+    target_tokens = canonical_query_tokens(question, mode)
+    if not target_tokens:
+        record_cache_event("session", mode, "misses")
         return None
 
+    # Any entry with a non-zero score shares at least one token, so the
+    # postings union is the complete candidate set.
+    index = _cache_index(mode)
+    candidate_keys = set()
+    for token in target_tokens:
+        candidate_keys.update(index.get(token, ()))
+
+    store = _cache_store(mode)
+    _cache_sweep_stale(mode)
     target_signature = retrieval_signature(response_mode, retrieval_settings)
-    target_normalized = normalize_query_text(question)
-    helpful_norms = {
-        normalize_query_text(item.get("question", ""))
-        for item in st.session_state.helpful_questions_by_mode.get(mode, [])
-        if isinstance(item, dict) and item.get("question")
-    }
+    target_normalized = canonical_query_text(question, mode)
+    helpful_norms = _helpful_norms(mode)
 
     best = None
     best_score = min_score
-    for entry in _cache_store(mode).values():
+    for key in candidate_keys:
+        entry = store.get(key)
         if not isinstance(entry, dict):
             continue
         if entry.get("settings_signature") != target_signature:
             continue
-        candidate_question = entry.get("question", "")
-        if not candidate_question or has_contextual_reference(candidate_question):
-            continue
         if not entry.get("citations"):
             continue
 
-        candidate_normalized = normalize_query_text(candidate_question)
+        candidate_normalized = entry.get("normalized", "")
         if not candidate_normalized or candidate_normalized == target_normalized:
             continue
+        if not canonical_texts_compatible(target_normalized, candidate_normalized):
+            continue
 
-        score = query_similarity_score(question, candidate_question)
+        score = token_set_similarity(target_tokens, entry.get("tokens", frozenset()))
         if candidate_normalized in helpful_norms:
             score += 0.03
 
         if score > best_score:
             best_score = score
-            best = entry
-
-    if not best:
+            best = {"key": key, "entry": entry}
+
+    semantic_on = semantic_cache_enabled()
+    if best:
+        if semantic_on:
+            # Lexical hits are confirmed paraphrases; they calibrate the semantic threshold.
+            semantic_score = _semantic_pair_score(mode, question, best["key"])
+            if semantic_score is not None:
+                record_semantic_outcome(mode, semantic_score, True, labeled=False)
+        match = {"tier": "similar", "score": round(best_score, 3), "semantic_score": None}
+        store.move_to_end(best["key"])
+        record_cache_hit("session", mode, "answer", similar=True)
+        return best["entry"].get("response"), best["entry"].get("citations", []), best["entry"].get("question", ""), match
+
+    if not semantic_on:
+        record_cache_event("session", mode, "misses")
         return None
-    return best.get("response"), best.get("citations", []), best.get("question", "")
+    threshold = semantic_threshold(mode)
+    for key, semantic_score in _semantic_scores(mode, question):
+        if semantic_score < threshold:
+            break
+        entry = store.get(key)
+        if not isinstance(entry, dict):
+            continue
+        if entry.get("settings_signature") != target_signature or not entry.get("citations"):
+            continue
+        if entry.get("normalized", "") == target_normalized:
+            continue
+        if not canonical_texts_compatible(target_normalized, entry.get("normalized", "")):
+            continue
+        match = {"tier": "semantic", "score": round(semantic_score, 3), "semantic_score": semantic_score}
+        store.move_to_end(key)
+        record_cache_hit("session", mode, "answer", similar=True)
+        return entry.get("response"), entry.get("citations", []), entry.get("question", ""), match
+    record_cache_event("session", mode, "misses")
+    return None
 
 
 def _cache_set(
@@ -900,23 +1532,645 @@ def _cache_set(
     response_mode: str = "balanced",
     retrieval_settings: dict = None,
 ):
-    if not response or response.lower().startswith("error querying knowledge base"):
-        return
-    if needs_reformulation(response, citations):
+    if not _cacheable_answer(response, citations):
         return
 
     retrieval_settings = retrieval_settings or {}
     store = _cache_store(mode)
+    index = _cache_index(mode)
+    _cache_unindex(mode, cache_key, store.get(cache_key))
+
+    # Contextual follow-ups are exact-match only; they never enter the postings.
+    similar_ok = bool(question) and not has_contextual_reference(question)
+    tokens = frozenset(canonical_query_tokens(question, mode)) if similar_ok else frozenset()
     store[cache_key] = {
         "response": response,
         "citations": citations,
         "question": question,
+        "normalized": canonical_query_text(question, mode) if similar_ok else "",
+        "tokens": tokens,
         "settings_signature": retrieval_signature(response_mode, retrieval_settings),
+        "kb_version": mode_content_version(mode),
+        "size": _json_size({"response": response, "citations": citations}),
         "created_at": time.time(),
     }
-    if len(store) > 120:
-        oldest_key = min(store.keys(), key=lambda key: store[key].get("created_at", 0))
-        store.pop(oldest_key, None)
+    store.move_to_end(cache_key)
+    for token in tokens:
+        index.setdefault(token, set()).add(cache_key)
+    if similar_ok and semantic_cache_enabled():
+        _semantic_add(mode, cache_key, question)
+    else:
+        _semantic_remove(mode, cache_key)
+
+    while len(store) > 120:
+        _cache_drop(mode, next(iter(store)))
+        record_cache_event("session", mode, "evictions")
+
+
+# ─────────────────────────────────────────────
+# SEMANTIC CACHE
+# ─────────────────────────────────────────────
+# Catches paraphrases the token-overlap score misses ("second apron limit
+# trades" vs "trade restrictions for 2nd-apron teams"): cached questions are
+# embedded locally as TF-IDF vectors over their normalized, glossary-expanded
+# text and matched with one cosine pass over the matrix.
+SEMANTIC_THRESHOLD_DEFAULT = 0.72
+SEMANTIC_THRESHOLD_FLOOR = 0.55
+SEMANTIC_THRESHOLD_CEILING = 0.95
+SEMANTIC_TARGET_PRECISION = 0.9
+SEMANTIC_CALIBRATION_MIN_SAMPLES = 8
+SEMANTIC_CALIBRATION_SAMPLES = 200
+SEMANTIC_CALIBRATION_MIN_NEGATIVES = 3
+SEMANTIC_CALIBRATION_WINDOW = 20
+SEMANTIC_THRESHOLD_MAX_STEP = 0.03
+SEMANTIC_REASK_SIMILARITY = 0.6
+SEMANTIC_GLOSSARY = {
+    mode: [(f" {normalize_query_text(slang)} ", formal_terms) for slang, formal_terms in glossary.items()]
+    for mode, glossary in SLANG_GLOSSARY.items()
+}
+
+
+def semantic_cache_enabled() -> bool:
+    configured = _section_get(_secret_section("cache"), "semantic")
+    if configured is None:
+        configured = os.getenv("BEDROCK_SEMANTIC_CACHE", "true")
+    return str(configured).strip().lower() not in ("0", "false", "off", "no")
+
+
+def _semantic_stem(token: str) -> str:
+    if len(token) > 4 and token.endswith("ies"):
+        return token[:-3] + "y"
+    if len(token) > 3 and token.endswith("s") and not token.endswith("ss"):
+        return token[:-1]
+    return token
+
+
+def semantic_terms(question: str, mode: str) -> dict:
+    """Term counts over the normalized question plus the glossary expansions it triggers."""
+    normalized = normalize_query_text(question)
+    padded = f" {normalized} "
+    texts = [normalized]
+    glossary_modes = ("rulebook", "cba") if mode == "both" else (mode,)
+    for glossary_mode in glossary_modes:
+        for slang, formal_terms in SEMANTIC_GLOSSARY.get(glossary_mode, []):
+            if slang in padded:
+                texts.append(normalize_query_text(formal_terms))
+
+    counts = {}
+    for text in texts:
+        for token in text.split():
+            if token in CACHE_KEY_STOPWORDS or len(token) <= 1:
+                continue
+            term = _semantic_stem(token)
+            counts[term] = counts.get(term, 0) + 1
+    return counts
+
+
+def _semantic_index(mode: str) -> dict:
+    return st.session_state.semantic_index_by_mode.setdefault(
+        mode, {"terms": {}, "keys": [], "vocab": {}, "idf": None, "matrix": None}
+    )
+
+
+def _semantic_add(mode: str, cache_key: str, question: str):
+    index = _semantic_index(mode)
+    index["terms"][cache_key] = semantic_terms(question, mode)
+    index["matrix"] = None
+
+
+def _semantic_remove(mode: str, cache_key: str):
+    index = _semantic_index(mode)
+    if index["terms"].pop(cache_key, None) is not None:
+        index["matrix"] = None
+
+
+def _semantic_matrix(mode: str):
+    """Row-normalized TF-IDF matrix for the mode, rebuilt lazily after the cache changes."""
+    index = _semantic_index(mode)
+    if index["matrix"] is None and index["terms"]:
+        keys = list(index["terms"])
+        doc_freq = {}
+        for counts in index["terms"].values():
+            for term in counts:
+                doc_freq[term] = doc_freq.get(term, 0) + 1
+        vocab = {term: col for col, term in enumerate(doc_freq)}
+        idf = np.log((1 + len(keys)) / (1 + np.array(list(doc_freq.values()), dtype=float))) + 1.0
+        matrix = np.zeros((len(keys), len(vocab)))
+        for row, key in enumerate(keys):
+            for term, count in index["terms"][key].items():
+                matrix[row, vocab[term]] = 1.0 + np.log(count)
+        matrix *= idf
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        index.update(keys=keys, vocab=vocab, idf=idf, matrix=matrix / norms)
+    return index if index["matrix"] is not None else None
+
+
+def _semantic_vector(index: dict, counts: dict):
+    vector = np.zeros(len(index["vocab"]))
+    for term, count in counts.items():
+        col = index["vocab"].get(term)
+        if col is not None:
+            vector[col] = 1.0 + np.log(count)
+    vector *= index["idf"]
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else None
+
+
+def _semantic_scores(mode: str, question: str) -> list:
+    """(cache_key, cosine) pairs for every indexed question, best first."""
+    index = _semantic_matrix(mode)
+    if index is None:
+        return []
+    vector = _semantic_vector(index, semantic_terms(question, mode))
+    if vector is None:
+        return []
+    scores = index["matrix"] @ vector
+    return [(index["keys"][row], float(scores[row])) for row in np.argsort(-scores)]
+
+
+def _semantic_pair_score(mode: str, question: str, cache_key: str):
+    index = _semantic_matrix(mode)
+    if index is None or cache_key not in index["terms"]:
+        return None
+    vector = _semantic_vector(index, semantic_terms(question, mode))
+    if vector is None:
+        return None
+    return float(index["matrix"][index["keys"].index(cache_key)] @ vector)
+
+
+@st.cache_resource(show_spinner=False)
+def _semantic_calibration_store() -> dict:
+    """Process-wide (cosine, was_good_match, labeled) samples and the published threshold per mode."""
+    return {"lock": threading.Lock(), "samples": {}, "recorded": {}, "published": {}}
+
+
+def record_semantic_outcome(mode: str, score: float, good_match: bool, labeled: bool = True):
+    """Log one calibration sample; ``labeled`` is False for inferred lexical-hit positives."""
+    store = _semantic_calibration_store()
+    with store["lock"]:
+        samples = store["samples"].setdefault(mode, deque(maxlen=SEMANTIC_CALIBRATION_SAMPLES))
+        samples.append((float(score), bool(good_match), bool(labeled)))
+        store["recorded"][mode] = store["recorded"].get(mode, 0) + 1
+
+
+def record_semantic_reask(mode: str, messages: list, question: str):
+    """Count a re-asked question as a labeled miss for the semantic hit that answered it."""
+    last = next((msg for msg in reversed(messages) if msg.get("role") == "assistant"), None)
+    cache_match = (last or {}).get("cache_match") or {}
+    if cache_match.get("semantic_score") is None or cache_match.get("labeled"):
+        return
+    similarity = token_set_similarity(
+        canonical_query_tokens(question, mode), canonical_query_tokens(last.get("question", ""), mode)
+    )
+    if similarity >= SEMANTIC_REASK_SIMILARITY:
+        cache_match["labeled"] = True
+        record_semantic_outcome(mode, cache_match["semantic_score"], False)
+
+
+def semantic_threshold(mode: str) -> float:
+    """Lowest cosine whose logged matches at or above it meet the target precision.
+
+    Samples come from lexical cache hits (known paraphrases), feedback on
+    semantic hits and re-asked questions. Only labeled negatives can justify
+    loosening below the default, and the published threshold moves at most
+    ``SEMANTIC_THRESHOLD_MAX_STEP`` per window of new samples.
+    """
+    store = _semantic_calibration_store()
+    with store["lock"]:
+        # Misses sort ahead of hits at the same cosine so ties never flatter precision.
+        samples = sorted(store["samples"].get(mode, ()), key=lambda sample: (sample[0], not sample[1]), reverse=True)
+        recorded = store["recorded"].get(mode, 0)
+        published = store["published"].get(mode) or {"threshold": SEMANTIC_THRESHOLD_DEFAULT, "recorded": 0}
+    if len(samples) < SEMANTIC_CALIBRATION_MIN_SAMPLES or recorded - published["recorded"] < SEMANTIC_CALIBRATION_WINDOW:
+        return published["threshold"]
+
+    target = SEMANTIC_THRESHOLD_CEILING
+    good = 0
+    for seen, (score, good_match, _labeled) in enumerate(samples, start=1):
+        good += good_match
+        if good / seen >= SEMANTIC_TARGET_PRECISION:
+            target = score
+    labeled_negatives = sum(1 for _score, good_match, labeled in samples if labeled and not good_match)
+    if labeled_negatives < SEMANTIC_CALIBRATION_MIN_NEGATIVES:
+        target = max(target, SEMANTIC_THRESHOLD_DEFAULT)
+    target = min(max(target, SEMANTIC_THRESHOLD_FLOOR), SEMANTIC_THRESHOLD_CEILING)
+
+    current = published["threshold"]
+    step = min(max(target - current, -SEMANTIC_THRESHOLD_MAX_STEP), SEMANTIC_THRESHOLD_MAX_STEP)
+    threshold = round(current + step, 4)
+    with store["lock"]:
+        store["published"][mode] = {"threshold": threshold, "recorded": recorded}
+    return threshold
+
+
+def _cacheable_answer(response: str, citations: list) -> bool:
+    if not response or response.lower().startswith("error querying knowledge base"):
+        return False
+    return not needs_reformulation(response, citations)
+
+
+# Shared tier: one answer cache per process, reused across Streamlit sessions.
+SHARED_ANSWER_CACHE_MAX_BYTES = 32 * 1024 * 1024
+SHARED_ANSWER_TTL_SECONDS = 24 * 60 * 60
+
+
+@st.cache_resource(show_spinner=False)
+def _shared_answer_cache() -> dict:
+    """Process-wide answer tier partitioned by (mode, KB id), evicted LRU by byte size.
+
+    Warmed from the persistent cache on first use, so a restart starts hot.
+    """
+    cache = {"lock": threading.Lock(), "partitions": {}, "lru": OrderedDict(), "bytes": 0}
+    with cache["lock"]:
+        for row in persistent_recent_answers(PERSISTENT_WARM_ANSWERS):
+            _shared_answer_put(cache, row["mode"], row["kb_id"], row["cache_key"], row["question"],
+                               row["response"], row["citations"], row["kb_version"])
+    return cache
+
+
+def _shared_answer_key(question: str, mode: str, response_mode: str, retrieval_settings: dict,
+                       model_arn: str) -> str:
+    base_key = _cache_key(question, mode, response_mode, retrieval_settings, "shared")
+    return hashlib.sha1(f"{base_key}|{model_arn}".encode("utf-8")).hexdigest()
+
+
+def _shared_answer_get(mode: str, kb_id: str, cache_key: str):
+    """Memory first, then the persistent cache; disk hits are promoted into memory."""
+    cache = _shared_answer_cache()
+    partition_key = (mode, kb_id)
+    content_version = kb_content_version(kb_id)
+    with cache["lock"]:
+        entry = cache["partitions"].get(partition_key, {}).get(cache_key)
+        if entry and entry["expires_at"] > time.time() and entry["kb_version"] == content_version:
+            cache["lru"].move_to_end((partition_key, cache_key))
+            record_cache_hit("shared", mode, "answer")
+            return entry["response"], [dict(citation) for citation in entry["citations"]]
+        if entry:
+            _shared_answer_drop(cache, partition_key, cache_key)
+            record_cache_event("shared", mode, "invalidations")
+    record_cache_event("shared", mode, "misses")
+
+    row = persistent_answer_get(mode, kb_id, cache_key, content_version)
+    if not row:
+        record_cache_event("persistent", mode, "misses")
+        return None
+    record_cache_hit("persistent", mode, "answer")
+    with cache["lock"]:
+        _shared_answer_put(cache, mode, kb_id, cache_key, row["question"], row["response"], row["citations"],
+                           content_version)
+    return row["response"], [dict(citation) for citation in row["citations"]]
+
+
+def _shared_answer_drop(cache: dict, partition_key: tuple, cache_key: str):
+    partition = cache["partitions"].get(partition_key, {})
+    partition.pop(cache_key, None)
+    if not partition:
+        cache["partitions"].pop(partition_key, None)
+    cache["bytes"] -= cache["lru"].pop((partition_key, cache_key), 0)
+
+
+def _shared_answer_put(cache: dict, mode: str, kb_id: str, cache_key: str, question: str,
+                       response: str, citations: list, kb_version: str):
+    """Insert into the memory tier; the caller holds cache["lock"]."""
+    size = len(json.dumps({"response": response, "citations": citations}, default=str).encode("utf-8"))
+    if size > SHARED_ANSWER_CACHE_MAX_BYTES:
+        return
+    partition_key = (mode, kb_id)
+    _shared_answer_drop(cache, partition_key, cache_key)
+    cache["partitions"].setdefault(partition_key, {})[cache_key] = {
+        "response": response,
+        "citations": citations,
+        "question": question,
+        "kb_version": kb_version,
+        "expires_at": time.time() + SHARED_ANSWER_TTL_SECONDS,
+    }
+    cache["lru"][(partition_key, cache_key)] = size
+    cache["bytes"] += size
+    while cache["bytes"] > SHARED_ANSWER_CACHE_MAX_BYTES and cache["lru"]:
+        (old_partition, old_key), _ = next(iter(cache["lru"].items()))
+        _shared_answer_drop(cache, old_partition, old_key)
+        record_cache_event("shared", old_partition[0], "evictions")
+
+
+def _shared_answer_set(mode: str, kb_id: str, cache_key: str, question: str, response: str,
+                       citations: list, model_arn: str = "", signature: str = ""):
+    """Publish a finalized answer to every session and to disk; contextual follow-ups stay session-only."""
+    if has_contextual_reference(question) or not _cacheable_answer(response, citations):
+        return
+    citations = [dict(citation) for citation in citations]
+    content_version = kb_content_version(kb_id)
+    cache = _shared_answer_cache()
+    with cache["lock"]:
+        _shared_answer_put(cache, mode, kb_id, cache_key, question, response, citations, content_version)
+    persistent_answer_set(mode, kb_id, cache_key, model_arn, question, signature, response, citations,
+                          content_version)
+
+
+# ─────────────────────────────────────────────
+# PERSISTENT CACHE (SQLite)
+# ─────────────────────────────────────────────
+PERSISTENT_CACHE_SCHEMA_VERSION = 5
+PERSISTENT_CACHE_MAX_BYTES = 256 * 1024 * 1024
+PERSISTENT_CACHE_TTL_SECONDS = 30 * 24 * 60 * 60
+PERSISTENT_CACHE_COMPACT_SECONDS = 10 * 60
+PERSISTENT_CACHE_EVICT_BATCH = 500
+PERSISTENT_WARM_ANSWERS = 500
+PERSISTENT_CACHE_TABLES = ("answers", "retrievals", "aux_llm")
+# Reads queue their accessed_at bump; queued bumps are written in one
+# transaction once this many pile up or this long has passed.
+PERSISTENT_TOUCH_FLUSH_ROWS = 64
+PERSISTENT_TOUCH_FLUSH_SECONDS = 30.0
+PERSISTENT_TOUCH_SQL = {
+    "answers": "UPDATE answers SET accessed_at = ? WHERE mode = ? AND kb_id = ? AND cache_key = ?",
+    "retrievals": "UPDATE retrievals SET accessed_at = ? WHERE kb_id = ? AND cache_key = ?",
+    "aux_llm": "UPDATE aux_llm SET accessed_at = ? WHERE cache_key = ?",
+}
+
+
+def get_persistent_cache_path() -> str:
+    """SQLite file for the persistent cache; an empty setting disables it."""
+    cache_cfg = _secret_section("cache")
+    configured = _section_get(cache_cfg, "path")
+    if configured is None:
+        configured = os.getenv("BEDROCK_CACHE_PATH")
+    if configured is None:
+        configured = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "bedrock_cache.sqlite3")
+    return configured.strip()
+
+
+@st.cache_resource(show_spinner=False)
+def _persistent_cache(path: str):
+    """Open (or rebuild on a schema change) the on-disk cache and start its compactor."""
+    if not path:
+        return None
+    try:
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        conn = sqlite3.connect(path, check_same_thread=False, timeout=5)
+        conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+        conn.execute("PRAGMA journal_mode = WAL")
+        conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+        row = conn.execute("SELECT value FROM meta WHERE key = 'schema_version'").fetchone()
+        if not row or row[0] != str(PERSISTENT_CACHE_SCHEMA_VERSION):
+            conn.execute("DROP TABLE IF EXISTS answers")
+            conn.execute("DROP TABLE IF EXISTS retrievals")
+            conn.execute("DROP TABLE IF EXISTS aux_llm")
+        conn.execute(
+            """CREATE TABLE IF NOT EXISTS answers (
+                mode TEXT, kb_id TEXT, cache_key TEXT, model_arn TEXT, question TEXT,
+                question_norm TEXT, signature TEXT, response TEXT, citations TEXT, kb_version TEXT,
+                size INTEGER, created_at REAL, accessed_at REAL,
+                PRIMARY KEY (mode, kb_id, cache_key)
+            )"""
+        )
+        conn.execute(
+            """CREATE TABLE IF NOT EXISTS retrievals (
+                kb_id TEXT, cache_key TEXT, query_norm TEXT, chunks TEXT, kb_version TEXT,
+                size INTEGER, created_at REAL, accessed_at REAL,
+                PRIMARY KEY (kb_id, cache_key)
+            )"""
+        )
+        conn.execute(
+            """CREATE TABLE IF NOT EXISTS aux_llm (
+                cache_key TEXT PRIMARY KEY, helper TEXT, mode TEXT, output TEXT,
+                size INTEGER, created_at REAL, accessed_at REAL
+            )"""
+        )
+        for table in PERSISTENT_CACHE_TABLES:
+            conn.execute(f"CREATE INDEX IF NOT EXISTS {table}_accessed_at ON {table} (accessed_at)")
+        conn.execute(
+            "INSERT OR REPLACE INTO meta (key, value) VALUES ('schema_version', ?)",
+            (str(PERSISTENT_CACHE_SCHEMA_VERSION),),
+        )
+        conn.commit()
+    except Exception:
+        return None
+
+    cache = {"lock": threading.Lock(), "conn": conn, "path": path}
+    threading.Thread(
+        target=_persistent_cache_compactor,
+        args=(cache,),
+        name="bedrock-cache-compactor",
+        daemon=True,
+    ).start()
+    return cache
+
+
+def _persistent_cache_run(sql: str, params: tuple = (), fetch: bool = False):
+    cache = _persistent_cache(get_persistent_cache_path())
+    if not cache:
+        return [] if fetch else None
+    try:
+        with cache["lock"]:
+            cursor = cache["conn"].execute(sql, params)
+            rows = cursor.fetchall() if fetch else None
+            cache["conn"].commit()
+        return rows
+    except Exception:
+        return [] if fetch else None
+
+
+@st.cache_resource(show_spinner=False)
+def _persistent_touch_store() -> dict:
+    return {"lock": threading.Lock(), "pending": {}, "flushed_at": time.monotonic()}
+
+
+def persistent_touch(table: str, key: tuple):
+    """Queue an accessed_at bump for one row instead of writing it on the read path."""
+    store = _persistent_touch_store()
+    with store["lock"]:
+        store["pending"][(table, key)] = time.time()
+        due = (
+            len(store["pending"]) >= PERSISTENT_TOUCH_FLUSH_ROWS
+            or time.monotonic() - store["flushed_at"] >= PERSISTENT_TOUCH_FLUSH_SECONDS
+        )
+    if due:
+        flush_persistent_touches()
+
+
+def flush_persistent_touches(cache: dict = None):
+    store = _persistent_touch_store()
+    with store["lock"]:
+        pending, store["pending"] = store["pending"], {}
+        store["flushed_at"] = time.monotonic()
+    cache = cache or _persistent_cache(get_persistent_cache_path())
+    if not pending or not cache:
+        return
+    by_table = {}
+    for (table, key), accessed_at in pending.items():
+        by_table.setdefault(table, []).append((accessed_at, *key))
+    try:
+        with cache["lock"]:
+            for table, rows in by_table.items():
+                cache["conn"].executemany(PERSISTENT_TOUCH_SQL[table], rows)
+            cache["conn"].commit()
+    except Exception:
+        pass
+
+
+def compact_persistent_cache(cache: dict):
+    """Drop expired rows, trim least-recently-read rows to the size cap, and reclaim pages."""
+    flush_persistent_touches(cache)
+    cutoff = time.time() - PERSISTENT_CACHE_TTL_SECONDS
+    with cache["lock"]:
+        conn = cache["conn"]
+        for table in PERSISTENT_CACHE_TABLES:
+            conn.execute(f"DELETE FROM {table} WHERE created_at < ?", (cutoff,))
+        total = sum(
+            conn.execute(f"SELECT COALESCE(SUM(size), 0) FROM {table}").fetchone()[0]
+            for table in PERSISTENT_CACHE_TABLES
+        )
+        target = PERSISTENT_CACHE_MAX_BYTES * 0.9
+        while total > target:
+            # Oldest rows across all tables, read in index order and merged.
+            oldest = heapq.merge(
+                *(
+                    conn.execute(
+                        f"SELECT accessed_at, size, '{table}' FROM {table} ORDER BY accessed_at LIMIT ?",
+                        (PERSISTENT_CACHE_EVICT_BATCH,),
+                    ).fetchall()
+                    for table in PERSISTENT_CACHE_TABLES
+                )
+            )
+            evict = dict.fromkeys(PERSISTENT_CACHE_TABLES, 0)
+            for _, size, table in oldest:
+                if total <= target or sum(evict.values()) >= PERSISTENT_CACHE_EVICT_BATCH:
+                    break
+                evict[table] += 1
+                total -= size or 0
+            if not any(evict.values()):
+                break
+            for table, count in evict.items():
+                if count:
+                    conn.execute(
+                        f"DELETE FROM {table} WHERE rowid IN "
+                        f"(SELECT rowid FROM {table} ORDER BY accessed_at LIMIT ?)",
+                        (count,),
+                    )
+            record_cache_event("persistent", "all", "evictions", count=sum(evict.values()))
+        conn.commit()
+        conn.execute("PRAGMA incremental_vacuum")
+
+
+def _persistent_cache_compactor(cache: dict):
+    while True:
+        try:
+            compact_persistent_cache(cache)
+        except Exception:
+            pass
+        time.sleep(PERSISTENT_CACHE_COMPACT_SECONDS)
+
+
+def persistent_answer_get(mode: str, kb_id: str, cache_key: str, kb_version: str):
+    rows = _persistent_cache_run(
+        "SELECT question, response, citations, kb_version, created_at FROM answers "
+        "WHERE mode = ? AND kb_id = ? AND cache_key = ?",
+        (mode, kb_id, cache_key),
+        fetch=True,
+    )
+    if not rows or rows[0][4] < time.time() - PERSISTENT_CACHE_TTL_SECONDS:
+        return None
+    if rows[0][3] != kb_version:
+        _persistent_cache_run(
+            "DELETE FROM answers WHERE mode = ? AND kb_id = ? AND cache_key = ?",
+            (mode, kb_id, cache_key),
+        )
+        return None
+    persistent_touch("answers", (mode, kb_id, cache_key))
+    question, response, citations, _, _ = rows[0]
+    return {"question": question, "response": response, "citations": json.loads(citations)}
+
+
+def persistent_answer_set(mode: str, kb_id: str, cache_key: str, model_arn: str, question: str,
+                          signature: str, response: str, citations: list, kb_version: str):
+    citations_json = json.dumps(citations, default=str)
+    now = time.time()
+    _persistent_cache_run(
+        "INSERT OR REPLACE INTO answers VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+        (
+            mode, kb_id, cache_key, model_arn, question, normalize_query_text(question), signature,
+            response, citations_json, kb_version, len(response.encode("utf-8")) + len(citations_json), now, now,
+        ),
+    )
+
+
+def persistent_recent_answers(limit: int) -> list:
+    rows = _persistent_cache_run(
+        "SELECT mode, kb_id, cache_key, question, response, citations, kb_version FROM answers "
+        "WHERE created_at >= ? ORDER BY accessed_at DESC LIMIT ?",
+        (time.time() - PERSISTENT_CACHE_TTL_SECONDS, limit),
+        fetch=True,
+    )
+    answers = []
+    for mode, kb_id, cache_key, question, response, citations, kb_version in reversed(rows):
+        answers.append({
+            "mode": mode,
+            "kb_id": kb_id,
+            "cache_key": cache_key,
+            "question": question,
+            "response": response,
+            "citations": json.loads(citations),
+            "kb_version": kb_version,
+        })
+    return answers
+
+
+def _retrieval_cache_key(query: str, vector_cfg: dict) -> str:
+    payload = json.dumps(
+        {"query": normalize_query_text(query), "config": vector_cfg},
+        sort_keys=True,
+        separators=(",", ":"),
+        default=str,
+    )
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+
+def persistent_retrieval_get(kb_id: str, query: str, vector_cfg: dict):
+    cache_key = _retrieval_cache_key(query, vector_cfg)
+    rows = _persistent_cache_run(
+        "SELECT chunks, kb_version, created_at FROM retrievals WHERE kb_id = ? AND cache_key = ?",
+        (kb_id, cache_key),
+        fetch=True,
+    )
+    if not rows or rows[0][2] < time.time() - PERSISTENT_CACHE_TTL_SECONDS:
+        return None
+    if rows[0][1] != kb_content_version(kb_id):
+        _persistent_cache_run("DELETE FROM retrievals WHERE kb_id = ? AND cache_key = ?", (kb_id, cache_key))
+        return None
+    persistent_touch("retrievals", (kb_id, cache_key))
+    return json.loads(rows[0][0])
+
+
+def persistent_retrieval_set(kb_id: str, query: str, vector_cfg: dict, chunks: list):
+    chunks_json = json.dumps(chunks, default=str)
+    now = time.time()
+    _persistent_cache_run(
+        "INSERT OR REPLACE INTO retrievals VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+        (
+            kb_id, _retrieval_cache_key(query, vector_cfg), normalize_query_text(query),
+            chunks_json, kb_content_version(kb_id), len(chunks_json), now, now,
+        ),
+    )
+
+
+def persistent_aux_get(cache_key: str):
+    rows = _persistent_cache_run(
+        "SELECT output, created_at FROM aux_llm WHERE cache_key = ?",
+        (cache_key,),
+        fetch=True,
+    )
+    if not rows or rows[0][1] < time.time() - AUX_LLM_MEMO_TTL_SECONDS:
+        return None
+    persistent_touch("aux_llm", (cache_key,))
+    return rows[0][0]
+
+
+def persistent_aux_set(cache_key: str, helper: str, mode: str, output: str):
+    now = time.time()
+    _persistent_cache_run(
+        "INSERT OR REPLACE INTO aux_llm VALUES (?, ?, ?, ?, ?, ?, ?)",
+        (cache_key, helper, mode, output, len(output.encode("utf-8")), now, now),
+    )
 
 
 def save_bookmark(mode: str, msg: dict):
@@ -974,6 +2228,7 @@ def save_helpful_question(mode: str, question: str, message_id: str = "", source
     if len(helpful) > 120:
         helpful.sort(key=lambda item: item.get("created_at", 0), reverse=True)
         del helpful[120:]
+    st.session_state.helpful_norms_by_mode.pop(mode, None)
 
 
 def remove_helpful_question(mode: str, message_id: str):
@@ -983,6 +2238,7 @@ def remove_helpful_question(mode: str, message_id: str):
     st.session_state.helpful_questions_by_mode[mode] = [
         item for item in helpful if item.get("message_id") != message_id
     ]
+    st.session_state.helpful_norms_by_mode.pop(mode, None)
 
 
 def record_feedback(mode: str, message_id: str, label: str, msg: dict = None):
@@ -994,6 +2250,10 @@ def record_feedback(mode: str, message_id: str, label: str, msg: dict = None):
     question_text = (msg or {}).get("question", "").strip()
     prior_label = (prior.get("label") or "").lower()
     current_label = label.lower()
+    cache_match = (msg or {}).get("cache_match") or {}
+    if cache_match.get("semantic_score") is not None and current_label != prior_label:
+        cache_match["labeled"] = True
+        record_semantic_outcome(mode, cache_match["semantic_score"], current_label == "helpful")
     if current_label == "helpful" and question_text:
         save_helpful_question(mode, question_text, message_id=message_id, source="feedback")
     elif prior_label == "helpful" and current_label != "helpful":
@@ -1314,24 +2574,81 @@ def is_hypothetical_question(question: str) -> bool:
     return False
 
 
-def extract_hypothetical_topics(question: str, mode: str, region_name: str = None) -> list:
-    """Use a fast LLM call to decompose a hypothetical question into
-    2-4 concrete rule/CBA topics suitable for KB retrieval."""
+# Auxiliary helpers (topic extraction, query rewrites, term definitions) are
+# deterministic Haiku calls, so their raw output is memoized process-wide and
+# on disk, keyed by helper, mode, model id, prompt template and normalized input.
+AUX_LLM_MEMO_SIZE = 1024
+AUX_LLM_MEMO_TTL_SECONDS = 7 * 24 * 60 * 60
+
+
+def invoke_aux_llm(helper: str, mode: str, prompt_template: str, prompt_args: dict, question: str,
+                   max_tokens: int, region_name: str = None):
+    """Memoized temperature-0 call for a cascade helper; returns the stripped text or None.
+
+    Failed calls are not memoized, so a transient error is retried next time.
+    """
+    template_hash = hashlib.sha1(prompt_template.encode("utf-8")).hexdigest()
+    memo_key = hashlib.sha1(
+        json.dumps([helper, mode, DEFAULT_QUIZ_MODEL_ID, template_hash, normalize_query_text(question)])
+        .encode("utf-8")
+    ).hexdigest()
+    lru_key = (mode, memo_key)
+    cached = _shared_lru_get("aux_llm", lru_key)
+    if cached is not None:
+        record_cache_hit("aux_llm", mode, "aux_llm")
+        return cached
+    record_cache_event("aux_llm", mode, "misses")
+    cached = persistent_aux_get(memo_key)
+    if cached is not None:
+        record_cache_hit("persistent", mode, "aux_llm")
+        record_cache_event(
+            "aux_llm", mode, "evictions",
+            count=_shared_lru_set("aux_llm", lru_key, cached, AUX_LLM_MEMO_SIZE, ttl_seconds=AUX_LLM_MEMO_TTL_SECONDS),
+        )
+        return cached
+    record_cache_event("persistent", mode, "misses")
+
     try:
         client = get_bedrock_client("bedrock-runtime", region_name)
     except Exception:
         client = None
     if not client:
-        return []
-
-    if mode == "rulebook":
-        domain = "NBA Official Rulebook"
-    elif mode == "cba":
-        domain = "NBA Collective Bargaining Agreement (CBA) and Basketball Operations Manual"
-    else:
-        domain = "NBA Rulebook and CBA"
+        return None
 
-    system_prompt = f"""You are a query decomposer for an NBA {domain} retrieval system.
+    started = time.monotonic()
+    try:
+        response = bedrock_call(
+            "invoke_model",
+            client.invoke_model,
+            model_id=DEFAULT_QUIZ_MODEL_ID,
+            modelId=DEFAULT_QUIZ_MODEL_ID,
+            contentType="application/json",
+            accept="application/json",
+            body=json.dumps({
+                "anthropic_version": "bedrock-2023-05-31",
+                "max_tokens": max_tokens,
+                "temperature": 0.0,
+                "messages": [{"role": "user", "content": question}],
+                "system": prompt_template.format(**prompt_args),
+            }),
+        )
+        result = json.loads(response["body"].read())
+        text = result["content"][0]["text"].strip()
+    except Exception:
+        return None
+    if not text:
+        return None
+    record_stage_latency(mode, "aux_llm", time.monotonic() - started)
+
+    record_cache_event(
+        "aux_llm", mode, "evictions",
+        count=_shared_lru_set("aux_llm", lru_key, text, AUX_LLM_MEMO_SIZE, ttl_seconds=AUX_LLM_MEMO_TTL_SECONDS),
+    )
+    persistent_aux_set(memo_key, helper, mode, text)
+    return text
+
+
+HYPOTHETICAL_TOPICS_PROMPT = """You are a query decomposer for an NBA {domain} retrieval system.
 
 The user asked a hypothetical or scenario question. Your job is to extract the 2-4 specific
 rules, provisions, or topics that need to be looked up in the {domain} to properly answer
@@ -1354,21 +2671,23 @@ Output: ["mid-level salary exception taxpayer", "first apron signing restriction
 User: "Could a player on a two-way contract be included in a trade"
 Output: ["two-way contract trade eligibility", "two-way player roster status restrictions", "trade rules player contract types"]"""
 
+
+def extract_hypothetical_topics(question: str, mode: str, region_name: str = None) -> list:
+    """Use a fast LLM call to decompose a hypothetical question into
+    2-4 concrete rule/CBA topics suitable for KB retrieval."""
+    if mode == "rulebook":
+        domain = "NBA Official Rulebook"
+    elif mode == "cba":
+        domain = "NBA Collective Bargaining Agreement (CBA) and Basketball Operations Manual"
+    else:
+        domain = "NBA Rulebook and CBA"
+
+    raw_text = invoke_aux_llm(
+        "hypothetical_topics", mode, HYPOTHETICAL_TOPICS_PROMPT, {"domain": domain}, question, 200, region_name
+    )
+    if not raw_text:
+        return []
     try:
-        response = client.invoke_model(
-            modelId=DEFAULT_QUIZ_MODEL_ID,
-            contentType="application/json",
-            accept="application/json",
-            body=json.dumps({
-                "anthropic_version": "bedrock-2023-05-31",
-                "max_tokens": 200,
-                "temperature": 0.0,
-                "messages": [{"role": "user", "content": question}],
-                "system": system_prompt,
-            }),
-        )
-        result = json.loads(response["body"].read())
-        raw_text = result["content"][0]["text"].strip()
         # Strip markdown fences if present
         raw_text = re.sub(r"^```(?:json)?\s*", "", raw_text)
         raw_text = re.sub(r"\s*```$", "", raw_text)
@@ -1418,7 +2737,7 @@ def loading_state_for(mode: str) -> dict:
     }
 
 
-def build_status_timeline_html(active_stage: str, detail: str = "") -> str:
+def build_status_timeline_html(active_stage: str, detail: str = "", notice: str = "") -> str:
     stages = [
         ("retrieving", "Retrieving"),
         ("ranking", "Ranking"),
@@ -1436,10 +2755,12 @@ def build_status_timeline_html(active_stage: str, detail: str = "") -> str:
             cls += " status-active"
         pills.append(f'<span class="{cls}">{label}</span>')
     detail_html = f'<div class="status-detail">{html.escape(detail)}</div>' if detail else ""
+    notice_html = f'<div class="status-breaker">⚡ {html.escape(notice)}</div>' if notice else ""
     return (
         '<div class="status-timeline">'
         f'{"".join(pills)}'
         f"{detail_html}"
+        f"{notice_html}"
         "</div>"
     )
 
@@ -1513,19 +2834,25 @@ def expand_query_for_retrieval(question: str, mode: str) -> str:
     return f"{question}\n\nRetrieval hints: {'; '.join(unique_hints)}."
 
 
+QUERY_REWRITE_PROMPT = """You are a query rewriter for an NBA {domain_context} retrieval system.
+
+Your job: take the user's question (which may use slang, abbreviations, nicknames, or casual basketball terminology) and rewrite it using the FORMAL terminology that appears in the official {domain_context}.
+
+Rules:
+- Keep the question's intent and meaning identical.
+- Replace slang, abbreviations, and nicknames with official terms.
+  Examples: "2nd apron" → "second apron / Tax Level 2", "bird rights" → "qualifying veteran free agent Bird exception", "MLE" → "mid-level salary exception", "euro step" → "gather step traveling", "hack-a" → "away-from-the-play foul".
+- Append 3-5 formal keyword hints at the end, prefixed with "Retrieval hints:".
+- Output ONLY the rewritten query. No explanation, no preamble.
+- If the query already uses formal terms, return it unchanged but still add keyword hints."""
+
+
 def rewrite_query_for_retrieval(question: str, mode: str, region_name: str = None) -> str:
     """Use a fast LLM call to expand slang/colloquial terms into formal document language.
 
     Only called when the static glossary in expand_query_for_retrieval did not fire,
     so this handles novel slang the glossary doesn't cover yet.
     """
-    try:
-        client = get_bedrock_client("bedrock-runtime", region_name)
-    except Exception:
-        client = None
-    if not client:
-        return question
-
     if mode == "rulebook":
         domain_context = "NBA Official Rulebook"
     elif mode == "cba":
@@ -1533,39 +2860,91 @@ def rewrite_query_for_retrieval(question: str, mode: str, region_name: str = Non
     else:
         return question
 
-    system_prompt = f"""You are a query rewriter for an NBA {domain_context} retrieval system.
+    rewritten = invoke_aux_llm(
+        "query_rewrite", mode, QUERY_REWRITE_PROMPT, {"domain_context": domain_context}, question, 250, region_name
+    )
+    if rewritten and len(rewritten) > 5:
+        return rewritten
+    return question
 
-Your job: take the user's question (which may use slang, abbreviations, nicknames, or casual basketball terminology) and rewrite it using the FORMAL terminology that appears in the official {domain_context}.
 
-Rules:
-- Keep the question's intent and meaning identical.
-- Replace slang, abbreviations, and nicknames with official terms.
-  Examples: "2nd apron" → "second apron / Tax Level 2", "bird rights" → "qualifying veteran free agent Bird exception", "MLE" → "mid-level salary exception", "euro step" → "gather step traveling", "hack-a" → "away-from-the-play foul".
-- Append 3-5 formal keyword hints at the end, prefixed with "Retrieval hints:".
-- Output ONLY the rewritten query. No explanation, no preamble.
-- If the query already uses formal terms, return it unchanged but still add keyword hints."""
+REWRITE_PLAN_CACHE_SIZE = 512
+REWRITE_MISS_TTL_SECONDS = 60
+# LLM rewrites go stale as prompts and models change; glossary plans only change on deploy.
+REWRITE_LLM_PLAN_TTL_SECONDS = 6 * 60 * 60
 
-    try:
-        response = client.invoke_model(
-            modelId=DEFAULT_QUIZ_MODEL_ID,
-            contentType="application/json",
-            accept="application/json",
-            body=json.dumps({
-                "anthropic_version": "bedrock-2023-05-31",
-                "max_tokens": 250,
-                "temperature": 0.0,
-                "messages": [{"role": "user", "content": question}],
-                "system": system_prompt,
-            }),
-        )
-        result = json.loads(response["body"].read())
-        rewritten = result["content"][0]["text"].strip()
-        if rewritten and len(rewritten) > 5:
-            return rewritten
-    except Exception:
-        pass
 
-    return question
+def plan_retrieval_rewrite(question: str, mode: str, region_name: str = None) -> dict:
+    """Resolve the retrieval query for a question once and share it process-wide.
+
+    Returns {"question", "retrieval_query", "source"} where source is "glossary",
+    "llm" or "none". Plans are keyed by (mode, normalized question) so every pass
+    of the fallback cascade, both crossbook lanes, and other sessions asking the
+    same question reuse a single rewrite instead of repeating the Haiku call.
+    A shared plan is returned with the caller's own wording as "question", and
+    as "retrieval_query" too when there was nothing to rewrite.
+    """
+    key = (mode, normalize_query_text(question))
+    cached = _shared_lru_get("rewrite_plans", key)
+    if cached:
+        plan = {**cached, "question": question}
+        if cached["source"] == "none":
+            plan["retrieval_query"] = question
+        return plan
+
+    retrieval_query = expand_query_for_retrieval(question, mode)
+    source = "glossary"
+    if retrieval_query == question:
+        # Glossary didn't match — try LLM-based rewrite for novel slang
+        retrieval_query = rewrite_query_for_retrieval(question, mode, region_name)
+        source = "llm" if retrieval_query != question else "none"
+
+    plan = {"question": question, "retrieval_query": retrieval_query, "source": source}
+    # A "none" plan may just be a failed rewrite call, so only hold it briefly.
+    if source == "none" and mode in ("rulebook", "cba"):
+        ttl = REWRITE_MISS_TTL_SECONDS
+    elif source == "llm":
+        ttl = REWRITE_LLM_PLAN_TTL_SECONDS
+    else:
+        ttl = None
+    _shared_lru_set("rewrite_plans", key, plan, REWRITE_PLAN_CACHE_SIZE, ttl_seconds=ttl)
+    return plan
+
+
+def rewrite_plan_needs_llm(question: str, mode: str) -> bool:
+    """Whether plan_retrieval_rewrite would call the rewrite model for this question."""
+    if mode not in ("rulebook", "cba"):
+        return False
+    if _shared_lru_get("rewrite_plans", (mode, normalize_query_text(question))):
+        return False
+    return expand_query_for_retrieval(question, mode) == question
+
+
+async def aplan_retrieval_rewrite(question: str, mode: str, region_name: str = None) -> dict:
+    return await run_aux_offloaded(
+        plan_retrieval_rewrite,
+        question,
+        mode,
+        region_name,
+        # Not cached: the rewrite was skipped, not answered.
+        fallback={"question": question, "retrieval_query": question, "source": "none"},
+        needs_llm=rewrite_plan_needs_llm(question, mode),
+    )
+
+
+DEFINE_TERM_PROMPT = """You are a definitional expansion engine for an NBA {domain_context} retrieval system.
+
+The user's question contains a term or concept the retrieval system could not find. Your job is to produce a 2-3 sentence DEFINITIONAL DESCRIPTION of the unfamiliar concept using the formal terminology, mechanics, and rule references that would appear in the {domain_context}.
+
+Focus areas: {domain_topics}.
+
+Rules:
+- Identify the unfamiliar term in the user's question.
+- Write 2-3 sentences that DESCRIBE the underlying mechanic using words the {domain_context} would actually use (e.g., instead of "poison pill" write "offer sheet signed by a restricted free agent where the salary in later years is much higher than year 1, causing the trade value to be calculated as the average annual salary rather than the year-by-year salary, making the player difficult to trade").
+- Include the formal CBA/Rulebook terms, article numbers if well-known, and the practical mechanic.
+- Do NOT answer the question. Do NOT speculate beyond the definition.
+- Output ONLY the definitional description — no preamble, no JSON, no bullet points.
+- If the question uses only standard formal terminology, output the question unchanged."""
 
 
 def define_unknown_term(question: str, mode: str, region_name: str = None) -> str:
@@ -1578,13 +2957,6 @@ def define_unknown_term(question: str, mode: str, region_name: str = None) -> st
     Returns an expanded query with definitional language, or the original
     question if the call fails.
     """
-    try:
-        client = get_bedrock_client("bedrock-runtime", region_name)
-    except Exception:
-        client = None
-    if not client:
-        return question
-
     if mode == "rulebook":
         domain_context = "NBA Official Rulebook"
         domain_topics = "game rules, fouls, violations, officiating, replay review, scoring, and game administration"
@@ -1598,42 +2970,19 @@ def define_unknown_term(question: str, mode: str, region_name: str = None) -> st
     else:
         return question
 
-    system_prompt = f"""You are a definitional expansion engine for an NBA {domain_context} retrieval system.
-
-The user's question contains a term or concept the retrieval system could not find. Your job is to produce a 2-3 sentence DEFINITIONAL DESCRIPTION of the unfamiliar concept using the formal terminology, mechanics, and rule references that would appear in the {domain_context}.
-
-Focus areas: {domain_topics}.
-
-Rules:
-- Identify the unfamiliar term in the user's question.
-- Write 2-3 sentences that DESCRIBE the underlying mechanic using words the {domain_context} would actually use (e.g., instead of "poison pill" write "offer sheet signed by a restricted free agent where the salary in later years is much higher than year 1, causing the trade value to be calculated as the average annual salary rather than the year-by-year salary, making the player difficult to trade").
-- Include the formal CBA/Rulebook terms, article numbers if well-known, and the practical mechanic.
-- Do NOT answer the question. Do NOT speculate beyond the definition.
-- Output ONLY the definitional description — no preamble, no JSON, no bullet points.
-- If the question uses only standard formal terminology, output the question unchanged."""
-
-    try:
-        response = client.invoke_model(
-            modelId=DEFAULT_QUIZ_MODEL_ID,
-            contentType="application/json",
-            accept="application/json",
-            body=json.dumps({
-                "anthropic_version": "bedrock-2023-05-31",
-                "max_tokens": 300,
-                "temperature": 0.0,
-                "messages": [{"role": "user", "content": question}],
-                "system": system_prompt,
-            }),
-        )
-        result = json.loads(response["body"].read())
-        definition = result["content"][0]["text"].strip()
-        if definition and len(definition) > 20 and definition.lower() != question.lower():
-            # Return the original question PLUS the definitional expansion so the
-            # KB has both the user's exact wording and the formal description.
-            return f"{question}\n\nConcept description for retrieval: {definition}"
-    except Exception:
-        pass
-
+    definition = invoke_aux_llm(
+        "define_term",
+        mode,
+        DEFINE_TERM_PROMPT,
+        {"domain_context": domain_context, "domain_topics": domain_topics},
+        question,
+        300,
+        region_name,
+    )
+    if definition and len(definition) > 20 and definition.lower() != question.lower():
+        # Return the original question PLUS the definitional expansion so the
+        # KB has both the user's exact wording and the formal description.
+        return f"{question}\n\nConcept description for retrieval: {definition}"
     return question
 
 
@@ -2889,6 +4238,14 @@ footer {{
     font-size: 0.85rem;
     color: var(--muted) !important;
 }}
+.status-breaker {{
+    width: 100%;
+    font-size: 0.8rem;
+    font-weight: 600;
+    color: var(--ink) !important;
+    border-left: 3px solid {s}AA;
+    padding-left: 0.5rem;
+}}
 .citation-chip-row {{
     display: flex;
     flex-wrap: wrap;
@@ -3052,6 +4409,14 @@ def _parse_positive_int(value, default=None):
         return default
 
 
+def _parse_non_negative_float(value, default=None):
+    try:
+        parsed = float(value)
+        return parsed if parsed >= 0 else default
+    except Exception:
+        return default
+
+
 def get_aws_region():
     aws = _secret_section("aws")
     return (
@@ -3073,6 +4438,8 @@ def get_mode_runtime_config(mode: str) -> dict:
             "metadata_filter": None,
             "reranker_model_arn": None,
             "reranker_results": None,
+            "hedge_delay_seconds": None,
+            "kb_version": None,
             "quiz_model_id": DEFAULT_QUIZ_MODEL_ID,
             "region": get_aws_region(),
         }
@@ -3090,6 +4457,8 @@ def get_mode_runtime_config(mode: str) -> dict:
     reranker_env_key = "RULEBOOK_RERANKER_MODEL_ARN" if mode == "rulebook" else "CBA_RERANKER_MODEL_ARN"
     rerank_count_env_key = "RULEBOOK_RERANK_RESULTS" if mode == "rulebook" else "CBA_RERANK_RESULTS"
     low_latency_model_env_key = "RULEBOOK_LOW_LATENCY_MODEL_ARN" if mode == "rulebook" else "CBA_LOW_LATENCY_MODEL_ARN"
+    hedge_delay_env_key = "RULEBOOK_HEDGE_DELAY_SECONDS" if mode == "rulebook" else "CBA_HEDGE_DELAY_SECONDS"
+    kb_version_env_key = "RULEBOOK_KB_VERSION" if mode == "rulebook" else "CBA_KB_VERSION"
 
     base_model_arn = (
         _section_get(models, f"{mode}_model_arn")
@@ -3137,6 +4506,13 @@ def get_mode_runtime_config(mode: str) -> dict:
     )
     if mode == "cba" and not low_latency_model_arn:
         low_latency_model_arn = DEFAULT_MODEL_ARNS["rulebook"]
+    # Unset disables hedging; 0 starts the primary pass alongside triage.
+    hedge_delay_seconds = _parse_non_negative_float(
+        _section_get(retrieval, f"{mode}_hedge_delay_seconds")
+        if _section_get(retrieval, f"{mode}_hedge_delay_seconds") is not None
+        else _secret_value(f"{mode}_hedge_delay_seconds", os.getenv(hedge_delay_env_key)),
+        default=None,
+    )
 
     return {
         "kb_id": (
@@ -3152,6 +4528,13 @@ def get_mode_runtime_config(mode: str) -> dict:
         "metadata_filter": metadata_filter,
         "reranker_model_arn": reranker_model_arn,
         "reranker_results": reranker_results,
+        "hedge_delay_seconds": hedge_delay_seconds,
+        # Pinned content version; unset means it is polled from ingestion jobs.
+        "kb_version": (
+            _section_get(knowledge_bases, f"{mode}_version")
+            or _secret_value(f"{mode}_kb_version")
+            or os.getenv(kb_version_env_key)
+        ),
         "quiz_model_id": (
             _section_get(models, "quiz_model_id")
             or _secret_value("quiz_model_id")
@@ -3181,10 +4564,79 @@ def get_boto_client_kwargs(region_name: str = None) -> dict:
 # ─────────────────────────────────────────────
 # AWS BEDROCK CLIENT
 # ─────────────────────────────────────────────
+# One client per (service, region, call class). Every client shares the pool
+# size; connect/read timeouts follow the call class so a stuck retrieve fails
+# fast while a long generation is allowed to finish. Rate-limited classes use
+# standard retries with few attempts, so throttles surface to the client-side
+# limiter instead of being absorbed by botocore's own backoff.
+BEDROCK_POOL_CONNECTIONS_DEFAULT = 32
+BEDROCK_MAX_ATTEMPTS_DEFAULT = 4
+BEDROCK_LIMITED_MAX_ATTEMPTS_DEFAULT = 2
+BEDROCK_RATE_LIMITED_CALL_CLASSES = {"retrieve", "generate"}
+BEDROCK_CALL_CLASS_TIMEOUTS = {
+    "retrieve": {"connect_timeout": 3, "read_timeout": 20},
+    "generate": {"connect_timeout": 5, "read_timeout": 90},
+    "control": {"connect_timeout": 5, "read_timeout": 15},
+}
+BEDROCK_DEFAULT_CALL_CLASS = {
+    "bedrock-agent-runtime": "retrieve",
+    "bedrock-runtime": "generate",
+    "bedrock-agent": "control",
+}
+
+
+def get_bedrock_pool_connections() -> int:
+    """HTTP pool size per client; never smaller than the fan-out pool that shares it."""
+    concurrency = _secret_section("concurrency")
+    configured = _parse_positive_int(
+        _section_get(concurrency, "pool_connections")
+        or _secret_value("bedrock_pool_connections")
+        or os.getenv("BEDROCK_POOL_CONNECTIONS"),
+        default=BEDROCK_POOL_CONNECTIONS_DEFAULT,
+    )
+    return max(configured, get_fanout_workers())
+
+
+def get_bedrock_client_config(call_class: str) -> Config:
+    concurrency = _secret_section("concurrency")
+    if call_class in BEDROCK_RATE_LIMITED_CALL_CLASSES:
+        retries = {
+            "mode": "standard",
+            "max_attempts": _parse_positive_int(
+                _section_get(concurrency, "limited_max_attempts")
+                or _secret_value("bedrock_limited_max_attempts")
+                or os.getenv("BEDROCK_LIMITED_MAX_ATTEMPTS"),
+                default=BEDROCK_LIMITED_MAX_ATTEMPTS_DEFAULT,
+            ),
+        }
+    else:
+        retries = {
+            "mode": "adaptive",
+            "max_attempts": _parse_positive_int(
+                _section_get(concurrency, "max_attempts")
+                or _secret_value("bedrock_max_attempts")
+                or os.getenv("BEDROCK_MAX_ATTEMPTS"),
+                default=BEDROCK_MAX_ATTEMPTS_DEFAULT,
+            ),
+        }
+    return Config(
+        max_pool_connections=get_bedrock_pool_connections(),
+        retries=retries,
+        tcp_keepalive=True,
+        **BEDROCK_CALL_CLASS_TIMEOUTS[call_class],
+    )
+
+
 @st.cache_resource
-def get_bedrock_client(service_name: str, region_name: str = None):
+def get_bedrock_client(service_name: str, region_name: str = None, call_class: str = None):
+    """Pooled client; call_class ("retrieve", "generate", "control") picks the timeouts."""
+    call_class = call_class or BEDROCK_DEFAULT_CALL_CLASS.get(service_name, "generate")
     try:
-        return boto3.client(service_name=service_name, **get_boto_client_kwargs(region_name))
+        return boto3.client(
+            service_name=service_name,
+            config=get_bedrock_client_config(call_class),
+            **get_boto_client_kwargs(region_name),
+        )
     except Exception as e:
         st.error(f"⚠️ Error initialising {service_name} client: {e}")
         return None
@@ -3196,93 +4648,1273 @@ def get_bedrock_runtime_client(region_name: str = None):
     return get_bedrock_client("bedrock-runtime", region_name)
 
 
-# ─────────────────────────────────────────────
-# CITATION RENDERING (single helper – no duplication)
-# ─────────────────────────────────────────────
-def render_citations(citations: list, mode: str):
-    """Deduplicate, badge, and render citations for any mode."""
-    if not citations:
-        return
+# Well-formed but nonexistent: the service rejects the retrieve before any
+# vector search runs, so warming the agent-runtime pools bills nothing.
+BEDROCK_WARMUP_KB_ID = "WARMUP0000"
 
-    # ── Safety-net dedup (primary dedup happens in _extract_citations) ──
-    seen, unique = set(), []
-    for c in citations:
-        fp = c.get("content", "").strip()[:150]
-        if fp not in seen:
-            seen.add(fp)
-            unique.append(c)
 
-    # ── Confidence indicator ──
-    conf_label, conf_color = get_confidence(unique)
-    st.markdown(
-        f'<span class="conf-badge" style="background:{conf_color}22;color:{conf_color};'
-        f'border:1px solid {conf_color};">Confidence: {conf_label}</span>',
-        unsafe_allow_html=True,
-    )
+def bedrock_warmup_enabled() -> bool:
+    configured = _section_get(_secret_section("concurrency"), "warmup")
+    if configured is None:
+        configured = os.getenv("BEDROCK_WARMUP", "true")
+    return str(configured).strip().lower() not in ("0", "false", "off", "no")
 
-    for citation in unique:
-        content  = citation.get("content", "No content available")
-        metadata = citation.get("metadata", {})
-        uri      = citation.get("uri", "")
 
-        badge_html = ""
+def _warm_bedrock_connection(client, operation: str, request: dict):
+    # Any answer, including a validation error, means the TLS connection is
+    # open and parked in the client's pool for the first real call.
+    try:
+        getattr(client, operation)(**request)
+    except Exception:
+        pass
 
-        # ── CBA source-document badge (CBA mode only) ──
-        if mode == "cba":
-            badge_label, css_cls, doc_name = identify_cba_source(uri)
-            badge_html += f'<span class="source-type-badge {css_cls}">{badge_label}</span>'
 
-        # ── Location / rule metadata badge ──
-        loc_parts = [
-            f"{k.title()} {metadata[k]}"
-            for k in ["rule", "section", "article", "part", "subsection", "page"]
-            if k in metadata
-        ]
-        if loc_parts:
-            badge_html += f'<span class="rule-location">📍 {", ".join(loc_parts)}</span>'
+def start_bedrock_warmup(region_name: str = None) -> dict:
+    """Build the pooled clients on the script thread and warm them once per process and region.
 
-        if badge_html:
-            st.markdown(f'<div style="margin-bottom:0.3rem">{badge_html}</div>', unsafe_allow_html=True)
+    Returns the warm-up status, or None when warm-up is disabled in config.
+    """
+    if not bedrock_warmup_enabled():
+        return None
+    region_name = region_name or get_aws_region()
+    clients = (
+        get_bedrock_client("bedrock-agent-runtime", region_name),
+        get_bedrock_client("bedrock-agent-runtime", region_name, call_class="generate"),
+        get_bedrock_runtime_client(region_name),
+    )
+    # Start the KB content-version polls now so the first question already has them.
+    for kb_id in set(_configured_kbs()["kb_ids"].values()):
+        kb_content_version(kb_id)
+    return warm_bedrock_connections(region_name, clients)
 
-        # ── Excerpt preview ──
-        preview = (content[:200] + "…") if len(content) > 200 else content
-        st.markdown(
-            f'<div class="source-excerpt">{preview.replace("$", r"$")}</div>',
-            unsafe_allow_html=True,
-        )
 
-        # ── Full text expander ──
-        if len(content) > 200:
-            with st.expander("📖 Read full excerpt"):
-                st.markdown(f"_{content.replace('$', r'$')}_")
+@st.cache_resource(show_spinner=False)
+def warm_bedrock_connections(region_name: str, _clients: tuple) -> dict:
+    """Once per region, open connections for the given clients in the background.
 
-        # ── Copy source text ──
-        with st.expander("📋 Copy source text"):
-            st.code(content, language=None)
+    Only requests the service rejects before doing any work are sent.
+    """
+    status = {"started_at": time.time(), "finished_at": None}
+    rag_client, generate_client, runtime_client = _clients
+
+    def warm():
+        for client in (rag_client, generate_client):
+            if client:
+                resolve_request_shapes(client)
+                _warm_bedrock_connection(client, "retrieve", {
+                    "knowledgeBaseId": BEDROCK_WARMUP_KB_ID,
+                    "retrievalQuery": {"text": "warm-up"},
+                })
+        if runtime_client:
+            # An empty body is rejected before any model runs, so nothing is billed.
+            _warm_bedrock_connection(runtime_client, "invoke_model", {
+                "modelId": DEFAULT_QUIZ_MODEL_ID,
+                "contentType": "application/json",
+                "accept": "application/json",
+                "body": "{}",
+            })
+        status["finished_at"] = time.time()
 
-        st.markdown("")
+    threading.Thread(target=warm, name="bedrock-warmup", daemon=True).start()
+    return status
 
 
-def dedupe_citations(citations: list) -> list:
-    seen, unique = set(), []
-    for citation in citations or []:
-        fingerprint = (
-            citation.get("content", "").strip()[:150],
-            citation.get("uri", "").split("#")[0],
-        )
-        if fingerprint in seen:
-            continue
-        seen.add(fingerprint)
-        unique.append(citation)
-    return unique
+# ─────────────────────────────────────────────
+# REQUEST SHAPE VALIDATION
+# ─────────────────────────────────────────────
+# Optional request fields (overrideSearchType, filter, rerankingConfiguration,
+# generationConfiguration, ...) are checked against the installed botocore
+# service model and pruned before the call, so an older SDK never costs a
+# failed round trip to find out what it does not support.
+RESOLVED_OPERATIONS = {
+    "bedrock-agent-runtime": ("retrieve", "retrieve_and_generate", "retrieve_and_generate_stream"),
+}
 
 
-def citation_title(citation: dict, mode: str) -> str:
-    metadata = citation.get("metadata", {})
-    loc_parts = [
-        f"{key.title()} {metadata[key]}"
-        for key in ["rule", "section", "article", "part", "page"]
-        if key in metadata
+@st.cache_resource(show_spinner=False)
+def _request_shape_store() -> dict:
+    return {"lock": threading.Lock(), "shapes": {}}
+
+
+def request_input_shape(client, operation: str):
+    """Input shape for a client method (e.g. "retrieve"), or None if the model can't say."""
+    meta = getattr(client, "meta", None)
+    service_model = getattr(meta, "service_model", None)
+    if service_model is None:
+        return None
+    key = (service_model.service_name, service_model.api_version, operation)
+    store = _request_shape_store()
+    with store["lock"]:
+        if key in store["shapes"]:
+            return store["shapes"][key]
+    try:
+        api_name = meta.method_to_api_mapping.get(operation)
+        shape = service_model.operation_model(api_name).input_shape if api_name else None
+    except Exception:
+        shape = None
+    with store["lock"]:
+        store["shapes"][key] = shape
+    return shape
+
+
+def _prune_to_shape(value, shape, path: str, pruned: list):
+    if shape is None or getattr(shape, "is_document_type", False):
+        return
+    if shape.type_name == "structure" and isinstance(value, dict):
+        for name in list(value):
+            member = shape.members.get(name)
+            if member is None:
+                value.pop(name)
+                pruned.append(f"{path}{name}")
+            else:
+                _prune_to_shape(value[name], member, f"{path}{name}.", pruned)
+    elif shape.type_name == "list" and isinstance(value, list):
+        for item in value:
+            _prune_to_shape(item, shape.member, path, pruned)
+    elif shape.type_name == "map" and isinstance(value, dict):
+        for item in value.values():
+            _prune_to_shape(item, shape.value, path, pruned)
+
+
+def prune_request_params(client, operation: str, params: dict) -> list:
+    """Drop fields the installed SDK doesn't model, in place. Returns the pruned dotted paths."""
+    pruned = []
+    _prune_to_shape(params, request_input_shape(client, operation), "", pruned)
+    return pruned
+
+
+def resolve_request_shapes(client):
+    """Resolve every operation this app calls on the client so the first query pays nothing."""
+    service_name = getattr(getattr(getattr(client, "meta", None), "service_model", None), "service_name", None)
+    for operation in RESOLVED_OPERATIONS.get(service_name, ()):
+        request_input_shape(client, operation)
+
+
+# ─────────────────────────────────────────────
+# BEDROCK FEATURE SUPPORT
+# ─────────────────────────────────────────────
+# What the service accepted or rejected, keyed by (region, KB id, model ARN)
+# and shared by every session and worker thread. None means not yet seen.
+# Only unambiguous rejections are recorded (the SDK's own parameter
+# validation, or a service message naming an unknown parameter), and those
+# are sticky until an admin resets the registry; any other validation error
+# strips the field for that call only.
+KB_CONFIG_FEATURES = ("retrievalConfiguration", "generationConfiguration")
+VECTOR_SEARCH_FEATURES = ("overrideSearchType", "filter", "rerankingConfiguration")
+UNKNOWN_PARAMETER_PATTERN = re.compile(
+    r"unknown parameter|extraneous key|unrecognized field|is not (?:a )?supported|unsupported (?:parameter|field)",
+    re.IGNORECASE,
+)
+
+
+@st.cache_resource(show_spinner=False)
+def _feature_support_store() -> dict:
+    return {"lock": threading.Lock(), "entries": {}}
+
+
+def feature_support_key(client, kb_cfg: dict) -> tuple:
+    region = getattr(getattr(client, "meta", None), "region_name", None)
+    return region, kb_cfg.get("knowledgeBaseId"), kb_cfg.get("modelArn")
+
+
+def get_feature_support(key: tuple) -> dict:
+    store = _feature_support_store()
+    with store["lock"]:
+        return dict(store["entries"].get(key, {}))
+
+
+def record_feature_support(key: tuple, feature: str, supported: bool):
+    store = _feature_support_store()
+    with store["lock"]:
+        support = store["entries"].setdefault(key, {})
+        if not supported or support.get(feature) is None:
+            support[feature] = supported
+
+
+def kb_feature_support(region: str, kb_id: str) -> dict:
+    """Vector-search support for a KB across every model lane; retrieve calls have no model."""
+    store = _feature_support_store()
+    merged = {}
+    with store["lock"]:
+        for (entry_region, entry_kb_id, _), support in store["entries"].items():
+            if (entry_region, entry_kb_id) != (region, kb_id):
+                continue
+            for feature in VECTOR_SEARCH_FEATURES:
+                if support.get(feature) is False:
+                    merged[feature] = False
+    return merged
+
+
+def feature_support_snapshot() -> dict:
+    store = _feature_support_store()
+    with store["lock"]:
+        return {key: dict(support) for key, support in store["entries"].items()}
+
+
+def reset_feature_support():
+    store = _feature_support_store()
+    with store["lock"]:
+        store["entries"].clear()
+
+
+# ─────────────────────────────────────────────
+# KNOWLEDGE BASE CONTENT VERSIONS
+# ─────────────────────────────────────────────
+# Every cache tier stamps entries with the content version of the KB they were
+# answered from and drops them lazily once the version moves (a re-sync after
+# a CBA amendment, say). Versions are pinned in config or polled from the
+# latest completed ingestion job per data source.
+KB_VERSION_POLL_SECONDS_DEFAULT = 300
+
+
+def get_kb_version_poll_seconds() -> float:
+    """Seconds between ingestion polls per KB; 0 disables polling."""
+    cache_cfg = _secret_section("cache")
+    return _parse_non_negative_float(
+        _section_get(cache_cfg, "kb_version_poll_seconds")
+        if _section_get(cache_cfg, "kb_version_poll_seconds") is not None
+        else os.getenv("BEDROCK_KB_VERSION_POLL_SECONDS"),
+        default=KB_VERSION_POLL_SECONDS_DEFAULT,
+    )
+
+
+# Configured KB ids and pinned versions come from secrets/env, which only
+# change on redeploy; re-read them at most this often instead of per lookup.
+CONFIGURED_KB_RECHECK_SECONDS = 30.0
+
+
+@st.cache_resource(show_spinner=False)
+def _configured_kb_store() -> dict:
+    return {"lock": threading.Lock(), "kb_ids": {}, "versions": {}, "loaded_at": None}
+
+
+def _configured_kbs() -> dict:
+    """{"kb_ids": mode -> KB id, "versions": KB id -> pinned version}."""
+    store = _configured_kb_store()
+    with store["lock"]:
+        now = time.monotonic()
+        if store["loaded_at"] is None or now - store["loaded_at"] >= CONFIGURED_KB_RECHECK_SECONDS:
+            kb_ids, versions = {}, {}
+            for mode in MODE_KEYS:
+                if mode == "both":
+                    continue
+                config = get_mode_runtime_config(mode)
+                kb_ids[mode] = config["kb_id"]
+                if config.get("kb_version"):
+                    versions.setdefault(config["kb_id"], str(config["kb_version"]))
+            store.update(kb_ids=kb_ids, versions=versions, loaded_at=now)
+        return {"kb_ids": store["kb_ids"], "versions": store["versions"]}
+
+
+def _configured_kb_version(kb_id: str):
+    return _configured_kbs()["versions"].get(kb_id)
+
+
+def mode_kb_id(mode: str) -> str:
+    """KB id a mode answers from; crossbook joins both books' ids."""
+    kb_ids = _configured_kbs()["kb_ids"]
+    if mode == "both":
+        return f"{kb_ids['rulebook']}+{kb_ids['cba']}"
+    return kb_ids[mode]
+
+
+def fetch_kb_ingestion_version(kb_id: str, region_name: str = None) -> str:
+    """Latest completed ingestion job per data source, e.g. "DS1:JOB9+DS2:JOB4"."""
+    client = get_bedrock_client("bedrock-agent", region_name)
+    if client is None:
+        raise RuntimeError("bedrock-agent client unavailable")
+    summaries = client.list_data_sources(knowledgeBaseId=kb_id, maxResults=100).get("dataSourceSummaries", [])
+    parts = []
+    for data_source_id in sorted(summary["dataSourceId"] for summary in summaries):
+        jobs = client.list_ingestion_jobs(
+            knowledgeBaseId=kb_id,
+            dataSourceId=data_source_id,
+            filters=[{"attribute": "STATUS", "operator": "EQ", "values": ["COMPLETE"]}],
+            sortBy={"attribute": "STARTED_AT", "order": "DESCENDING"},
+            maxResults=1,
+        ).get("ingestionJobSummaries", [])
+        parts.append(f"{data_source_id}:{jobs[0]['ingestionJobId'] if jobs else 'none'}")
+    return "+".join(parts)
+
+
+@st.cache_resource(show_spinner=False)
+def _kb_version_store() -> dict:
+    """Process-wide (region, KB id) -> {"version", "checked_at", "refreshing"}."""
+    return {"lock": threading.Lock(), "kbs": {}}
+
+
+def _refresh_kb_version(store: dict, region: str, kb_id: str):
+    try:
+        version = fetch_kb_ingestion_version(kb_id, region)
+    except Exception:
+        version = None
+    with store["lock"]:
+        state = store["kbs"][(region, kb_id)]
+        if version is not None:
+            state["version"] = version
+        state["checked_at"] = time.monotonic()
+        state["refreshing"] = False
+
+
+def kb_content_version(kb_id: str) -> str:
+    """Current content version for a KB id (or "+"-joined ids); "" when unknown.
+
+    Every lookup serves the last known version ("" until the first poll lands)
+    while a background thread polls, so the query path never waits on the
+    control plane. A failed poll keeps the last known version.
+    """
+    if not kb_id:
+        return ""
+    if "+" in kb_id:
+        return "+".join(kb_content_version(part) for part in kb_id.split("+"))
+    configured = _configured_kb_version(kb_id)
+    if configured:
+        return configured
+    poll_seconds = get_kb_version_poll_seconds()
+    if not poll_seconds:
+        return ""
+
+    region = get_aws_region()
+    store = _kb_version_store()
+    with store["lock"]:
+        state = store["kbs"].setdefault((region, kb_id), {"version": "", "checked_at": None, "refreshing": False})
+        if state["refreshing"] or (
+            state["checked_at"] is not None and time.monotonic() - state["checked_at"] < poll_seconds
+        ):
+            return state["version"]
+        state["refreshing"] = True
+        version = state["version"]
+    threading.Thread(
+        target=_refresh_kb_version,
+        args=(store, region, kb_id),
+        name="kb-version-poll",
+        daemon=True,
+    ).start()
+    return version
+
+
+def mode_content_version(mode: str) -> str:
+    return kb_content_version(mode_kb_id(mode))
+
+
+# ─────────────────────────────────────────────
+# BEDROCK FAN-OUT EXECUTOR
+# ─────────────────────────────────────────────
+FANOUT_WORKERS_DEFAULT = 8
+_fanout_thread = threading.local()
+
+
+def get_fanout_workers() -> int:
+    concurrency = _secret_section("concurrency")
+    return _parse_positive_int(
+        _section_get(concurrency, "fanout_workers")
+        or _secret_value("fanout_workers")
+        or os.getenv("BEDROCK_FANOUT_WORKERS"),
+        default=FANOUT_WORKERS_DEFAULT,
+    )
+
+
+@st.cache_resource(show_spinner=False)
+def _fanout_executor() -> dict:
+    """Process-wide bounded pool that every Bedrock lane, retry and fan-out submits to.
+
+    Tasks queue per session and workers take them round-robin across sessions,
+    so one session's fan-out cannot starve another's.
+    """
+    lock = threading.Lock()
+    return {
+        "lock": lock,
+        "ready": threading.Condition(lock),
+        "queues": OrderedDict(),
+        "max_workers": 0,
+        "workers": set(),
+        "stats": {
+            "submitted": 0,
+            "completed": 0,
+            "running": 0,
+            "queue_depth": 0,
+            "peak_queue_depth": 0,
+            "wait_seconds_total": 0.0,
+            "wait_seconds_max": 0.0,
+        },
+    }
+
+
+def _fanout_pool() -> dict:
+    """The shared executor, resized in place when fanout_workers changes.
+
+    Growing starts the missing workers; shrinking lets workers above the new
+    size exit once they finish their current task.
+    """
+    executor = _fanout_executor()
+    max_workers = get_fanout_workers()
+    if executor["max_workers"] == max_workers:
+        return executor
+    with executor["ready"]:
+        executor["max_workers"] = max_workers
+        for index in range(max_workers):
+            if index in executor["workers"]:
+                continue
+            executor["workers"].add(index)
+            threading.Thread(
+                target=_fanout_worker,
+                args=(executor, index),
+                name=f"bedrock-fanout-{index}",
+                daemon=True,
+            ).start()
+        executor["ready"].notify_all()
+    return executor
+
+
+def _fanout_worker(executor: dict, index: int):
+    _fanout_thread.active = True
+    stats = executor["stats"]
+    while True:
+        with executor["ready"]:
+            while True:
+                if index >= executor["max_workers"]:
+                    executor["workers"].discard(index)
+                    # Hand any wake-up this worker absorbed to one that stays.
+                    executor["ready"].notify()
+                    return
+                if executor["queues"]:
+                    break
+                executor["ready"].wait()
+            session_key, queue = next(iter(executor["queues"].items()))
+            future, context, fn, args, kwargs, enqueued_at = queue.popleft()
+            # Rotate so the next pick comes from a different session.
+            del executor["queues"][session_key]
+            if queue:
+                executor["queues"][session_key] = queue
+            waited = time.monotonic() - enqueued_at
+            stats["queue_depth"] -= 1
+            stats["running"] += 1
+            stats["wait_seconds_total"] += waited
+            stats["wait_seconds_max"] = max(stats["wait_seconds_max"], waited)
+        try:
+            if future.set_running_or_notify_cancel():
+                try:
+                    future.set_result(context.run(fn, *args, **kwargs))
+                except BaseException as exc:
+                    future.set_exception(exc)
+        finally:
+            with executor["lock"]:
+                stats["running"] -= 1
+                stats["completed"] += 1
+
+
+def _fanout_session_key() -> str:
+    try:
+        return st.session_state.get("fanout_key") or "anonymous"
+    except Exception:
+        return "anonymous"
+
+
+def fanout_submit(fn, *args, **kwargs) -> Future:
+    """Queue fn on the shared fan-out executor under the calling session.
+
+    fn runs in a copy of the caller's context, so its Bedrock priority
+    carries over. Calls made from a fan-out worker run inline, so nested
+    fan-out cannot deadlock the bounded pool.
+    """
+    if getattr(_fanout_thread, "active", False):
+        future = Future()
+        future.set_running_or_notify_cancel()
+        try:
+            future.set_result(fn(*args, **kwargs))
+        except BaseException as exc:
+            future.set_exception(exc)
+        return future
+
+    executor = _fanout_pool()
+    future = Future()
+    session_key = _fanout_session_key()
+    with executor["ready"]:
+        executor["queues"].setdefault(session_key, deque()).append(
+            (future, contextvars.copy_context(), fn, args, kwargs, time.monotonic())
+        )
+        stats = executor["stats"]
+        stats["submitted"] += 1
+        stats["queue_depth"] += 1
+        stats["peak_queue_depth"] = max(stats["peak_queue_depth"], stats["queue_depth"])
+        executor["ready"].notify()
+    return future
+
+
+def fanout_stats() -> dict:
+    executor = _fanout_pool()
+    with executor["lock"]:
+        stats = dict(executor["stats"])
+        stats["queued_sessions"] = len(executor["queues"])
+    started = stats["completed"] + stats["running"]
+    stats["max_workers"] = executor["max_workers"]
+    stats["wait_seconds_avg"] = round(stats["wait_seconds_total"] / started, 3) if started else 0.0
+    return stats
+
+
+# ─────────────────────────────────────────────
+# BEDROCK RATE LIMITING
+# ─────────────────────────────────────────────
+# Token buckets per API and per model ARN, shared by every session. Waiters
+# are served in priority order (the interactive first pass ahead of fallback
+# passes, fallbacks ahead of quiz/background work). A throttling error halves
+# the bucket's concurrency and rate; clean calls grow them back gradually.
+BEDROCK_RATE_LIMITS_DEFAULT = {
+    # api: (requests per second, burst)
+    "retrieve": (10.0, 20),
+    "retrieve_and_generate": (4.0, 8),
+    "invoke_model": (4.0, 8),
+}
+BEDROCK_MODEL_RATE_LIMIT_DEFAULT = (3.0, 6)
+BEDROCK_PRIORITY_LEVELS = {"interactive": 0, "fallback": 1, "background": 2}
+BEDROCK_THROTTLE_CODES = {"ThrottlingException", "TooManyRequestsException"}
+# How long after a throttle fallback stages that use the throttled bucket stand down.
+BEDROCK_THROTTLE_COOLDOWN_SECONDS = 20.0
+# APIs each cascade stage calls; generation APIs also use the lane's model bucket.
+STAGE_BEDROCK_APIS = {
+    "first_pass": ("retrieve_and_generate",),
+    "triage_escalation": ("retrieve_and_generate", "retrieve", "invoke_model"),
+    "depth_escalation": ("retrieve_and_generate", "retrieve", "invoke_model"),
+    "lane_escalation": ("retrieve_and_generate",),
+    "fallback": ("retrieve_and_generate", "retrieve", "invoke_model"),
+    "hypothetical": ("invoke_model", "retrieve"),
+    "definitional": ("invoke_model", "retrieve_and_generate"),
+}
+
+BEDROCK_PRIORITY = contextvars.ContextVar("bedrock_priority", default="interactive")
+
+
+@contextmanager
+def bedrock_priority(level: str):
+    """Run the enclosed Bedrock calls (and any fan-out they submit) at level."""
+    token = BEDROCK_PRIORITY.set(level)
+    try:
+        yield
+    finally:
+        BEDROCK_PRIORITY.reset(token)
+
+
+def get_bedrock_rate_limit(name: str, default: tuple) -> tuple:
+    """(rate, burst) for an API name or "model", from [rate_limits] or BEDROCK_RATE_<NAME>_RPS/_BURST."""
+    limits = _secret_section("rate_limits")
+    env_name = name.upper()
+    rate = _parse_non_negative_float(
+        _section_get(limits, f"{name}_rps") or os.getenv(f"BEDROCK_RATE_{env_name}_RPS"),
+        default=default[0],
+    )
+    burst = _parse_positive_int(
+        _section_get(limits, f"{name}_burst") or os.getenv(f"BEDROCK_RATE_{env_name}_BURST"),
+        default=default[1],
+    )
+    return max(rate, 0.1), burst
+
+
+@st.cache_resource(show_spinner=False)
+def _bedrock_rate_limiter() -> dict:
+    lock = threading.Lock()
+    return {
+        "lock": lock,
+        "changed": threading.Condition(lock),
+        "buckets": {},
+        "waiters": [],
+        "sequence": 0,
+        "stats": {"granted": 0, "throttles": 0, "timeouts": 0, "wait_seconds_total": 0.0},
+    }
+
+
+def _rate_bucket(limiter: dict, key: tuple) -> dict:
+    bucket = limiter["buckets"].get(key)
+    if bucket is None:
+        if key[0] == "api":
+            rate, burst = get_bedrock_rate_limit(key[1], BEDROCK_RATE_LIMITS_DEFAULT[key[1]])
+        else:
+            rate, burst = get_bedrock_rate_limit("model", BEDROCK_MODEL_RATE_LIMIT_DEFAULT)
+        max_concurrency = get_fanout_workers()
+        bucket = {
+            "rate": rate,
+            "base_rate": rate,
+            "burst": burst,
+            "tokens": float(burst),
+            "updated_at": time.monotonic(),
+            "in_flight": 0,
+            "limit": max_concurrency,
+            "max_limit": max_concurrency,
+            "clean_calls": 0,
+            "throttled_at": None,
+        }
+        limiter["buckets"][key] = bucket
+    return bucket
+
+
+def _refill(bucket: dict, now: float):
+    bucket["tokens"] = min(bucket["burst"], bucket["tokens"] + (now - bucket["updated_at"]) * bucket["rate"])
+    bucket["updated_at"] = now
+
+
+def _rate_wait_exceeded(api: str) -> ClientError:
+    return ClientError(
+        {"Error": {"Code": "ThrottlingException", "Message": "Client-side rate limit wait exceeded"}},
+        api,
+    )
+
+
+def _join_waiters(limiter: dict, api: str, model_id: str, wake=None) -> dict:
+    keys = (("api", api),) + ((("model", model_id),) if model_id else ())
+    limiter["sequence"] += 1
+    waiter = {
+        "rank": (BEDROCK_PRIORITY_LEVELS.get(BEDROCK_PRIORITY.get(), 0), limiter["sequence"]),
+        "keys": keys,
+        "wake": wake,
+        "started": time.monotonic(),
+    }
+    limiter["waiters"].append(waiter)
+    return waiter
+
+
+def _leave_waiters(limiter: dict, waiter: dict):
+    limiter["waiters"].remove(waiter)
+    _wake_waiters(limiter)
+
+
+def _wake_waiters(limiter: dict):
+    limiter["changed"].notify_all()
+    for waiter in limiter["waiters"]:
+        if waiter["wake"]:
+            waiter["wake"]()
+
+
+def _try_grant(limiter: dict, waiter: dict, now: float):
+    """Consume a token and slot for waiter if it is first in line; else seconds to wait."""
+    buckets = [_rate_bucket(limiter, key) for key in waiter["keys"]]
+    for bucket in buckets:
+        _refill(bucket, now)
+    keys = set(waiter["keys"])
+    ahead = any(other["rank"] < waiter["rank"] and set(other["keys"]) & keys for other in limiter["waiters"])
+    if not ahead and all(bucket["tokens"] >= 1 and bucket["in_flight"] < bucket["limit"] for bucket in buckets):
+        for bucket in buckets:
+            bucket["tokens"] -= 1
+            bucket["in_flight"] += 1
+        limiter["stats"]["granted"] += 1
+        limiter["stats"]["wait_seconds_total"] += now - waiter["started"]
+        return 0.0
+    return max(
+        ((1 - bucket["tokens"]) / bucket["rate"] for bucket in buckets if bucket["tokens"] < 1),
+        default=1.0,
+    )
+
+
+def acquire_bedrock_capacity(api: str, model_id: str = None, deadline: float = None) -> tuple:
+    """Block until a token and a concurrency slot are free in every bucket the call uses.
+
+    Returns the bucket keys to pass to release_bedrock_capacity. Waiting past
+    deadline (time.monotonic()) raises a ThrottlingException ClientError.
+    """
+    limiter = _bedrock_rate_limiter()
+    if deadline is None:
+        deadline = time.monotonic() + BEDROCK_AWAIT_TIMEOUTS[api]
+    with limiter["changed"]:
+        waiter = _join_waiters(limiter, api, model_id)
+        try:
+            while True:
+                now = time.monotonic()
+                wait = _try_grant(limiter, waiter, now)
+                if not wait:
+                    return waiter["keys"]
+                if now >= deadline:
+                    limiter["stats"]["timeouts"] += 1
+                    raise _rate_wait_exceeded(api)
+                limiter["changed"].wait(min(wait, deadline - now, 1.0))
+        finally:
+            _leave_waiters(limiter, waiter)
+
+
+async def admit_bedrock_call(api: str, model_id: str = None, deadline: float = None) -> tuple:
+    """Async acquire_bedrock_capacity: waits on the event loop, so no fan-out worker is held."""
+    limiter = _bedrock_rate_limiter()
+    if deadline is None:
+        deadline = time.monotonic() + BEDROCK_AWAIT_TIMEOUTS[api]
+    loop = asyncio.get_running_loop()
+    woken = asyncio.Event()
+
+    def wake():
+        try:
+            loop.call_soon_threadsafe(woken.set)
+        except RuntimeError:
+            pass  # Loop already closed.
+
+    with limiter["lock"]:
+        waiter = _join_waiters(limiter, api, model_id, wake=wake)
+    try:
+        while True:
+            now = time.monotonic()
+            with limiter["lock"]:
+                wait = _try_grant(limiter, waiter, now)
+                if wait and now >= deadline:
+                    limiter["stats"]["timeouts"] += 1
+                    raise _rate_wait_exceeded(api)
+            if not wait:
+                return waiter["keys"]
+            woken.clear()
+            try:
+                await asyncio.wait_for(woken.wait(), min(wait, deadline - now, 1.0))
+            except asyncio.TimeoutError:
+                pass
+    finally:
+        with limiter["lock"]:
+            _leave_waiters(limiter, waiter)
+
+
+def release_bedrock_capacity(keys: tuple, throttled: bool = False, unused: bool = False):
+    """Return a slot. unused=True gives back the token too (the call was never sent)."""
+    limiter = _bedrock_rate_limiter()
+    with limiter["changed"]:
+        for key in keys:
+            bucket = _rate_bucket(limiter, key)
+            bucket["in_flight"] -= 1
+            if unused:
+                bucket["tokens"] = min(bucket["burst"], bucket["tokens"] + 1)
+            elif throttled:
+                bucket["limit"] = max(1, bucket["limit"] // 2)
+                bucket["rate"] = max(bucket["base_rate"] / 10, bucket["rate"] / 2)
+                bucket["tokens"] = min(bucket["tokens"], 0.0)
+                bucket["clean_calls"] = 0
+                bucket["throttled_at"] = time.monotonic()
+            else:
+                bucket["clean_calls"] += 1
+                if bucket["clean_calls"] >= bucket["limit"]:
+                    bucket["limit"] = min(bucket["max_limit"], bucket["limit"] + 1)
+                    bucket["rate"] = min(bucket["base_rate"], bucket["rate"] * 1.25)
+                    bucket["clean_calls"] = 0
+        if throttled:
+            limiter["stats"]["throttles"] += 1
+        _wake_waiters(limiter)
+
+
+# A capacity grant taken on the event loop before dispatch, handed to the
+# first matching bedrock_slot on the worker; and the caller's deadline, past
+# which a worker must not send anything for a caller that has given up.
+BEDROCK_GRANT = contextvars.ContextVar("bedrock_grant", default=None)
+BEDROCK_DEADLINE = contextvars.ContextVar("bedrock_deadline", default=None)
+
+
+def _claim_grant(grant: dict) -> bool:
+    limiter = _bedrock_rate_limiter()
+    with limiter["lock"]:
+        if grant["claimed"]:
+            return False
+        grant["claimed"] = True
+        return True
+
+
+def is_throttle_error(error) -> bool:
+    # Event-stream errors carry the event name ("throttlingException") as the code.
+    code = getattr(error, "response", {}).get("Error", {}).get("Code", "")
+    return code.lower() in {throttle_code.lower() for throttle_code in BEDROCK_THROTTLE_CODES}
+
+
+def raise_stream_error_event(event: dict, operation: str):
+    """Raise the ClientError an event-stream exception event carries, e.g. {"throttlingException": {...}}."""
+    for name, payload in event.items():
+        if name.endswith("Exception"):
+            message = payload.get("message", "") if isinstance(payload, dict) else str(payload)
+            raise ClientError({"Error": {"Code": name[:1].upper() + name[1:], "Message": message}}, operation)
+
+
+@contextmanager
+def bedrock_slot(api: str, model_id: str = None):
+    """Hold a rate-limiter slot for the enclosed call, including any stream it returns.
+
+    A throttling ClientError raised inside (by the call or while reading its
+    stream) is fed back into the buckets before it propagates.
+    """
+    grant = BEDROCK_GRANT.get()
+    if grant and (grant["api"], grant["model_id"]) == (api, model_id) and _claim_grant(grant):
+        keys = grant["keys"]
+    else:
+        deadline = BEDROCK_DEADLINE.get()
+        if deadline is not None and time.monotonic() >= deadline:
+            raise _rate_wait_exceeded(api)
+        keys = acquire_bedrock_capacity(api, model_id, deadline=deadline)
+    throttled = False
+    try:
+        yield
+    except ClientError as e:
+        throttled = is_throttle_error(e)
+        raise
+    finally:
+        release_bedrock_capacity(keys, throttled)
+
+
+def bedrock_call(api: str, fn, *args, model_id: str = None, **kwargs):
+    """Run one blocking, non-streaming Bedrock call under the rate limiter."""
+    with bedrock_slot(api, model_id):
+        return fn(*args, **kwargs)
+
+
+def stage_bedrock_keys(stage: str, model_id: str = None) -> tuple:
+    """Limiter bucket keys a cascade stage would draw from."""
+    apis = STAGE_BEDROCK_APIS.get(stage, ())
+    keys = tuple(("api", api) for api in apis)
+    if model_id and set(apis) & {"retrieve_and_generate", "invoke_model"}:
+        keys += (("model", model_id),)
+    return keys
+
+
+def bedrock_throttle_active(keys: tuple = None) -> bool:
+    """True shortly after Bedrock throttled one of keys (any bucket when keys is None)."""
+    limiter = _bedrock_rate_limiter()
+    now = time.monotonic()
+    with limiter["lock"]:
+        buckets = limiter["buckets"] if keys is None else {key: limiter["buckets"].get(key) for key in keys}
+        return any(
+            bucket
+            and bucket["throttled_at"] is not None
+            and now - bucket["throttled_at"] < BEDROCK_THROTTLE_COOLDOWN_SECONDS
+            for bucket in buckets.values()
+        )
+
+
+def rate_limiter_stats() -> dict:
+    limiter = _bedrock_rate_limiter()
+    with limiter["lock"]:
+        stats = dict(limiter["stats"])
+        stats["waiting"] = len(limiter["waiters"])
+        stats["buckets"] = {
+            f"{kind}:{name.rsplit('/', 1)[-1]}": {
+                "rate": round(bucket["rate"], 2),
+                "base_rate": bucket["base_rate"],
+                "in_flight": bucket["in_flight"],
+                "limit": bucket["limit"],
+                "max_limit": bucket["max_limit"],
+                "cooling_down": bucket["throttled_at"] is not None
+                and time.monotonic() - bucket["throttled_at"] < BEDROCK_THROTTLE_COOLDOWN_SECONDS,
+            }
+            for (kind, name), bucket in limiter["buckets"].items()
+        }
+    return stats
+
+
+# ─────────────────────────────────────────────
+# CIRCUIT BREAKERS
+# ─────────────────────────────────────────────
+# One breaker per (KB id, model ARN) lane. Consecutive failures (timeouts and
+# service-side errors) or answers slower than the response profile's SLO open
+# it; while open, questions go to the low-latency lane or to saved answers
+# instead of walking the cascade into the same timeouts. After the cool-down
+# the next request that actually calls the lane probes it (half-open), and
+# the probe's outcome closes or re-opens the breaker.
+BREAKER_FAILURES_DEFAULT = 3
+BREAKER_OPEN_SECONDS_DEFAULT = 30.0
+BREAKER_LOCAL_MIN_SIMILARITY = 0.6
+BREAKER_SERVICE_ERROR_CODES = {
+    "InternalServerException",
+    "ServiceUnavailableException",
+    "ModelTimeoutException",
+    "ModelNotReadyException",
+    "ModelErrorException",
+    "DependencyFailedException",
+    "BadGatewayException",
+}
+# Latency SLO of the response profile the current question runs under.
+BREAKER_SLO_SECONDS = contextvars.ContextVar("breaker_slo_seconds", default=None)
+
+
+def get_breaker_settings() -> dict:
+    resilience = _secret_section("resilience")
+    return {
+        "failures": _parse_positive_int(
+            _section_get(resilience, "breaker_failures") or os.getenv("BEDROCK_BREAKER_FAILURES"),
+            default=BREAKER_FAILURES_DEFAULT,
+        ),
+        "open_seconds": _parse_non_negative_float(
+            _section_get(resilience, "breaker_open_seconds") or os.getenv("BEDROCK_BREAKER_OPEN_SECONDS"),
+            default=BREAKER_OPEN_SECONDS_DEFAULT,
+        ),
+        # Unset: each response profile's breaker_slo_seconds applies.
+        "slo_seconds": _parse_non_negative_float(
+            _section_get(resilience, "breaker_slo_seconds") or os.getenv("BEDROCK_BREAKER_SLO_SECONDS"),
+            default=None,
+        ),
+    }
+
+
+def breaker_slo_seconds() -> float:
+    return (
+        get_breaker_settings()["slo_seconds"]
+        or BREAKER_SLO_SECONDS.get()
+        or RESPONSE_PROFILES["balanced"]["breaker_slo_seconds"]
+    )
+
+
+def is_breaker_failure(error) -> bool:
+    """Timeouts and service-side errors count against a lane; client-side ones do not.
+
+    Local rate-limit waits, Bedrock throttles and validation errors say nothing
+    about the lane's health.
+    """
+    if isinstance(error, (asyncio.TimeoutError, ConnectTimeoutError, ReadTimeoutError, EndpointConnectionError)):
+        return True
+    if isinstance(error, ClientError):
+        status = error.response.get("ResponseMetadata", {}).get("HTTPStatusCode") or 0
+        return status >= 500 or error.response.get("Error", {}).get("Code") in BREAKER_SERVICE_ERROR_CODES
+    return False
+
+
+@st.cache_resource(show_spinner=False)
+def _circuit_breakers() -> dict:
+    return {"lock": threading.Lock(), "breakers": {}}
+
+
+def _breaker_state(breaker: dict, settings: dict, now: float) -> str:
+    if breaker["opened_at"] is None:
+        return "closed"
+    if now - breaker["opened_at"] < settings["open_seconds"]:
+        return "open"
+    return "half_open"
+
+
+def breaker_state(kb_id: str, model_arn: str) -> str:
+    """"closed", "open" (cooling down) or "half_open" (ready for a probe)."""
+    store = _circuit_breakers()
+    with store["lock"]:
+        breaker = store["breakers"].get((kb_id, model_arn))
+        if breaker is None:
+            return "closed"
+        return _breaker_state(breaker, get_breaker_settings(), time.monotonic())
+
+
+def breaker_allows(kb_id: str, model_arn: str, claim: bool = True) -> bool:
+    """Whether a request may call the lane. In half-open, only the caller that claims the probe may.
+
+    claim=False only checks, for picking a lane before it is known whether
+    Bedrock will be called at all; the probe is claimed by the call itself.
+    """
+    settings = get_breaker_settings()
+    store = _circuit_breakers()
+    now = time.monotonic()
+    with store["lock"]:
+        breaker = store["breakers"].get((kb_id, model_arn))
+        if breaker is None:
+            return True
+        state = _breaker_state(breaker, settings, now)
+        if state == "closed":
+            return True
+        if state == "open":
+            return False
+        # A probe that never reported back (abandoned mid-call) expires.
+        if breaker["probe_started_at"] and now - breaker["probe_started_at"] < settings["open_seconds"]:
+            return False
+        if claim:
+            breaker["probe_started_at"] = now
+        return True
+
+
+def record_breaker_outcome(kb_id: str, model_arn: str, ok: bool):
+    settings = get_breaker_settings()
+    store = _circuit_breakers()
+    now = time.monotonic()
+    with store["lock"]:
+        breaker = store["breakers"].setdefault(
+            (kb_id, model_arn),
+            {"failures": 0, "opened_at": None, "probe_started_at": None, "trips": 0},
+        )
+        if ok:
+            breaker.update(failures=0, opened_at=None, probe_started_at=None)
+            return
+        breaker["failures"] += 1
+        probing = breaker["probe_started_at"] is not None
+        if probing or (breaker["opened_at"] is None and breaker["failures"] >= settings["failures"]):
+            if breaker["opened_at"] is None:
+                breaker["trips"] += 1
+            breaker.update(opened_at=now, probe_started_at=None)
+
+
+async def run_breaker_lane(kb_id: str, model_arn: str, call, paused):
+    """Await call(outcome) as one call on the (kb_id, model_arn) lane and feed its breaker.
+
+    A half-open lane is probed here, by the first real call; paused is
+    returned without calling when the lane is open or another request holds
+    the probe. call reports the error behind an error result in outcome.
+    Failures and answers slower than the profile SLO count against the lane.
+    """
+    if not breaker_allows(kb_id, model_arn):
+        return paused
+    started = time.monotonic()
+    slo_seconds = breaker_slo_seconds()
+    outcome = {}
+    try:
+        result = await call(outcome)
+    except asyncio.CancelledError:
+        # Abandoned at a deadline or by a faster hedge lane; only a slow lane counts here.
+        if time.monotonic() - started >= slo_seconds:
+            record_breaker_outcome(kb_id, model_arn, ok=False)
+        raise
+    ok = not is_breaker_failure(outcome.get("error")) and time.monotonic() - started < slo_seconds
+    record_breaker_outcome(kb_id, model_arn, ok=ok)
+    return result
+
+
+def breaker_lane(kb_id: str, primary_model_arn: str, fallback_model_arn: str = None) -> dict:
+    """Pick the model lane for a question: the primary, the fallback, or None (no lane available)."""
+    state = breaker_state(kb_id, primary_model_arn)
+    lane = {"kb_id": kb_id, "primary_model_arn": primary_model_arn, "state": state, "skipped": []}
+    if breaker_allows(kb_id, primary_model_arn, claim=False):
+        lane.update(model_arn=primary_model_arn, fallback=False)
+    elif (
+        fallback_model_arn
+        and fallback_model_arn != primary_model_arn
+        and breaker_allows(kb_id, fallback_model_arn, claim=False)
+    ):
+        lane.update(model_arn=fallback_model_arn, fallback=True)
+    else:
+        lane.update(model_arn=None, fallback=False)
+    return lane
+
+
+def breaker_notice(lane: dict) -> str:
+    """One-line explanation of a non-closed breaker for the status timeline and the answer."""
+    if not lane or lane.get("state") == "closed" and not lane.get("skipped"):
+        return ""
+    model_name = str(lane["primary_model_arn"]).rsplit("/", 1)[-1]
+    if lane.get("model_arn") is None:
+        return "Knowledge base lane paused after repeated failures — answering from saved answers"
+    if lane.get("fallback"):
+        return f"{model_name} paused after repeated failures or slow answers — using the fast lane"
+    if lane.get("state") == "half_open":
+        return f"Re-checking {model_name} after recent failures"
+    return f"{model_name} paused mid-answer after repeated failures — remaining passes skipped"
+
+
+def breaker_snapshot() -> list:
+    settings = get_breaker_settings()
+    store = _circuit_breakers()
+    now = time.monotonic()
+    with store["lock"]:
+        return [
+            {
+                "kb_id": kb_id,
+                "model_arn": model_arn,
+                "state": _breaker_state(breaker, settings, now),
+                "failures": breaker["failures"],
+                "trips": breaker["trips"],
+            }
+            for (kb_id, model_arn), breaker in store["breakers"].items()
+        ]
+
+
+# ─────────────────────────────────────────────
+# ASYNC BEDROCK CALLS
+# ─────────────────────────────────────────────
+# Upper bounds for a single awaited Bedrock call; stage budgets may cut shorter.
+BEDROCK_AWAIT_TIMEOUTS = {
+    "retrieve": 20.0,
+    "retrieve_and_generate": 75.0,
+    "invoke_model": 75.0,
+}
+
+
+async def run_offloaded(fn, *args, timeout: float = None, on_delta=None, admit: tuple = None, **kwargs):
+    """Await a blocking call on the shared fan-out executor.
+
+    admit=(api, model_id) takes rate-limiter capacity on the event loop, in
+    priority order, before the call is queued; a worker never sits waiting
+    for tokens. The timeout covers the admission wait too, and a worker that
+    picks the call up after the caller gave up sends nothing.
+    With on_delta, fn receives a relay callback instead and every event is
+    replayed on the event loop thread, so UI callbacks never run on a worker.
+    On timeout or cancellation the call is abandoned, not interrupted.
+    """
+    deadline = time.monotonic() + timeout if timeout is not None else None
+    grant = None
+    if admit:
+        api, model_id = admit
+        keys = await admit_bedrock_call(api, model_id, deadline)
+        grant = {"api": api, "model_id": model_id, "keys": keys, "claimed": False}
+    grant_token = BEDROCK_GRANT.set(grant)
+    deadline_token = BEDROCK_DEADLINE.set(deadline)
+    try:
+        return await _run_offloaded(fn, args, kwargs, deadline, on_delta)
+    finally:
+        BEDROCK_GRANT.reset(grant_token)
+        BEDROCK_DEADLINE.reset(deadline_token)
+        if grant and _claim_grant(grant):
+            release_bedrock_capacity(grant["keys"], unused=True)
+
+
+async def run_aux_offloaded(fn, *args, fallback, needs_llm: bool = True):
+    """Await a cascade helper that makes at most one invoke_aux_llm call.
+
+    Its invoke_model capacity is admitted on the event loop first, as for
+    every other Bedrock call, so the helper never holds a worker while it
+    waits on the limiter. If no capacity frees up in time the helper is
+    skipped and fallback returned, as if its call had failed. needs_llm=False
+    skips admission for a helper that will answer without the model.
+    """
+    try:
+        return await run_offloaded(
+            fn, *args, admit=("invoke_model", DEFAULT_QUIZ_MODEL_ID) if needs_llm else None
+        )
+    except ClientError as exc:
+        if not is_throttle_error(exc):
+            raise
+        return fallback
+
+
+async def _run_offloaded(fn, args: tuple, kwargs: dict, deadline: float, on_delta):
+    timeout = max(deadline - time.monotonic(), 0.0) if deadline is not None else None
+    if on_delta is None:
+        return await asyncio.wait_for(asyncio.wrap_future(fanout_submit(fn, *args, **kwargs)), timeout)
+
+    loop = asyncio.get_running_loop()
+    events = asyncio.Queue()
+
+    def relay(event: str, payload=None):
+        try:
+            loop.call_soon_threadsafe(events.put_nowait, (event, payload))
+        except RuntimeError:
+            pass  # Loop already closed; the caller stopped listening.
+
+    async def pump():
+        while True:
+            event, payload = await events.get()
+            on_delta(event, payload)
+
+    pump_task = asyncio.ensure_future(pump())
+    try:
+        return await asyncio.wait_for(
+            asyncio.wrap_future(fanout_submit(fn, *args, on_delta=relay, **kwargs)),
+            timeout,
+        )
+    finally:
+        pump_task.cancel()
+        while not events.empty():
+            event, payload = events.get_nowait()
+            on_delta(event, payload)
+
+
+async def gather_bounded(awaitables: list, limit: int) -> list:
+    """Await at most limit awaitables at once; results (or exceptions) keep input order."""
+    semaphore = asyncio.Semaphore(max(limit, 1))
+
+    async def bounded(awaitable):
+        async with semaphore:
+            return await awaitable
+
+    return await asyncio.gather(*(bounded(awaitable) for awaitable in awaitables), return_exceptions=True)
+
+
+async def aretrieve_and_generate(client, params: dict, on_delta=None, timeout: float = None) -> dict:
+    model_arn = params.get("retrieveAndGenerateConfiguration", {}).get("knowledgeBaseConfiguration", {}).get("modelArn")
+    return await run_offloaded(
+        run_retrieve_and_generate,
+        client,
+        params,
+        timeout=timeout or BEDROCK_AWAIT_TIMEOUTS["retrieve_and_generate"],
+        on_delta=on_delta,
+        admit=("retrieve_and_generate", model_arn),
+    )
+
+
+async def ainvoke_model_text(runtime_client, model_id: str, body: dict, on_delta=None,
+                             timeout: float = None) -> str:
+    return await run_offloaded(
+        invoke_model_text,
+        runtime_client,
+        model_id,
+        body,
+        timeout=timeout or BEDROCK_AWAIT_TIMEOUTS["invoke_model"],
+        on_delta=on_delta,
+        admit=("invoke_model", model_id),
+    )
+
+
+# ─────────────────────────────────────────────
+# CITATION RENDERING (single helper – no duplication)
+# ─────────────────────────────────────────────
+def render_citations(citations: list, mode: str):
+    """Deduplicate, badge, and render citations for any mode."""
+    if not citations:
+        return
+
+    # ── Safety-net dedup (primary dedup happens in _extract_citations) ──
+    seen, unique = set(), []
+    for c in citations:
+        fp = c.get("content", "").strip()[:150]
+        if fp not in seen:
+            seen.add(fp)
+            unique.append(c)
+
+    # ── Confidence indicator ──
+    conf_label, conf_color = get_confidence(unique)
+    st.markdown(
+        f'<span class="conf-badge" style="background:{conf_color}22;color:{conf_color};'
+        f'border:1px solid {conf_color};">Confidence: {conf_label}</span>',
+        unsafe_allow_html=True,
+    )
+
+    for citation in unique:
+        content  = citation.get("content", "No content available")
+        metadata = citation.get("metadata", {})
+        uri      = citation.get("uri", "")
+
+        badge_html = ""
+
+        # ── CBA source-document badge (CBA mode only) ──
+        if mode == "cba":
+            badge_label, css_cls, doc_name = identify_cba_source(uri)
+            badge_html += f'<span class="source-type-badge {css_cls}">{badge_label}</span>'
+
+        # ── Location / rule metadata badge ──
+        loc_parts = [
+            f"{k.title()} {metadata[k]}"
+            for k in ["rule", "section", "article", "part", "subsection", "page"]
+            if k in metadata
+        ]
+        if loc_parts:
+            badge_html += f'<span class="rule-location">📍 {", ".join(loc_parts)}</span>'
+
+        if badge_html:
+            st.markdown(f'<div style="margin-bottom:0.3rem">{badge_html}</div>', unsafe_allow_html=True)
+
+        # ── Excerpt preview ──
+        preview = (content[:200] + "…") if len(content) > 200 else content
+        st.markdown(
+            f'<div class="source-excerpt">{preview.replace("$", r"$")}</div>',
+            unsafe_allow_html=True,
+        )
+
+        # ── Full text expander ──
+        if len(content) > 200:
+            with st.expander("📖 Read full excerpt"):
+                st.markdown(f"_{content.replace('$', r'$')}_")
+
+        # ── Copy source text ──
+        with st.expander("📋 Copy source text"):
+            st.code(content, language=None)
+
+        st.markdown("")
+
+
+def dedupe_citations(citations: list) -> list:
+    seen, unique = set(), []
+    for citation in citations or []:
+        fingerprint = (
+            citation.get("content", "").strip()[:150],
+            citation.get("uri", "").split("#")[0],
+        )
+        if fingerprint in seen:
+            continue
+        seen.add(fingerprint)
+        unique.append(citation)
+    return unique
+
+
+def citation_title(citation: dict, mode: str) -> str:
+    metadata = citation.get("metadata", {})
+    loc_parts = [
+        f"{key.title()} {metadata[key]}"
+        for key in ["rule", "section", "article", "part", "page"]
+        if key in metadata
     ]
     base = ", ".join(loc_parts) if loc_parts else citation.get("uri", "Source").split("/")[-1][:48]
     source_domain = citation.get("source_domain")
@@ -3445,6 +6077,23 @@ def render_assistant_message(msg: dict, mode: str):
         if msg.get("timestamp"):
             st.markdown(f'<div class="msg-ts">🕐 {msg["timestamp"]}</div>', unsafe_allow_html=True)
         render_answer_sections(msg["content"], msg.get("citations", []), mode, message_key)
+        if msg.get("skipped_stages"):
+            skipped = ", ".join(stage.replace("_", " ") for stage in msg["skipped_stages"])
+            st.markdown(
+                f'<div class="relevance-note">⏱ Skipped to stay within the latency budget: {html_safe(skipped)}</div>',
+                unsafe_allow_html=True,
+            )
+        if msg.get("breaker_notice"):
+            st.markdown(
+                f'<div class="relevance-note">⚡ {html_safe(msg["breaker_notice"])}</div>',
+                unsafe_allow_html=True,
+            )
+        if msg.get("throttled_stages"):
+            throttled = ", ".join(stage.replace("_", " ") for stage in msg["throttled_stages"])
+            st.markdown(
+                f'<div class="relevance-note">⏳ Skipped while Bedrock was throttling: {html_safe(throttled)}</div>',
+                unsafe_allow_html=True,
+            )
         render_message_controls(msg, mode, message_key)
         with st.expander("📋 Copy response"):
             st.code(msg["content"], language=None)
@@ -3561,6 +6210,8 @@ def filter_relevant_citations(citations: list, question: str,
     """
     Keep only citations that are meaningfully relevant to the user's question.
     Returns an empty list when no citation clears the relevance threshold.
+    Chunks from fuse_chunk_rankings keep their fused order; the lexical score
+    only decides which of them clear the threshold.
     """
     if not citations:
         return []
@@ -3575,7 +6226,10 @@ def filter_relevant_citations(citations: list, question: str,
             "match_terms": match_terms,
         }
         scored.append((annotated, score))
-    scored.sort(key=lambda x: x[1], reverse=True)
+    if all("fused_rank" in citation for citation in citations):
+        scored.sort(key=lambda x: x[0]["fused_rank"])
+    else:
+        scored.sort(key=lambda x: x[1], reverse=True)
 
     kept = []
     for c, score in scored:
@@ -3663,79 +6317,190 @@ Answer:
 """
 
 
-def run_retrieve_and_generate(client, params: dict):
-    """Call Bedrock retrieve_and_generate, progressively stripping unsupported fields."""
+def iter_retrieve_and_generate_stream(client, params: dict):
+    """Yield ("session", id), ("text", delta) and ("citation", citation) events as Bedrock streams them."""
+    model_arn = params.get("retrieveAndGenerateConfiguration", {}).get("knowledgeBaseConfiguration", {}).get("modelArn")
+    # The slot stays held until the stream is drained or closed.
+    with bedrock_slot("retrieve_and_generate", model_arn):
+        response = client.retrieve_and_generate_stream(**params)
+        if response.get("sessionId"):
+            yield "session", response["sessionId"]
+        for event in response.get("stream", []):
+            raise_stream_error_event(event, "RetrieveAndGenerateStream")
+            if "output" in event:
+                delta = event["output"].get("text", "")
+                if delta:
+                    yield "text", delta
+            elif "citation" in event:
+                yield "citation", event["citation"].get("citation") or event["citation"]
+
+
+def _collect_retrieve_and_generate_stream(client, params: dict, on_delta) -> dict:
+    """Drain a retrieve_and_generate stream into the non-streaming response shape."""
+    on_delta("reset", None)
+    text_parts, raw_citations, session_id = [], [], None
+    with closing(iter_retrieve_and_generate_stream(client, params)) as events:
+        for event, payload in events:
+            if event == "session":
+                session_id = payload
+            elif event == "text":
+                text_parts.append(payload)
+                on_delta("text", payload)
+            elif event == "citation":
+                raw_citations.append(payload)
+                on_delta("citations", _extract_citations({"citations": raw_citations}))
+
+    response = {"output": {"text": "".join(text_parts)}, "citations": raw_citations}
+    if session_id:
+        response["sessionId"] = session_id
+    return response
+
+
+def invoke_model_text(runtime_client, model_id: str, body: dict, on_delta=None) -> str:
+    """Invoke a Claude model and return its text, streaming deltas to on_delta when given."""
+    if on_delta is None:
+        response = bedrock_call(
+            "invoke_model",
+            runtime_client.invoke_model,
+            model_id=model_id,
+            modelId=model_id,
+            contentType="application/json",
+            accept="application/json",
+            body=json.dumps(body),
+        )
+        result = json.loads(response["body"].read())
+        return result.get("content", [{}])[0].get("text", "")
+
+    text_parts = []
+    # The slot stays held until the stream is drained.
+    with bedrock_slot("invoke_model", model_id):
+        response = runtime_client.invoke_model_with_response_stream(
+            modelId=model_id,
+            contentType="application/json",
+            accept="application/json",
+            body=json.dumps(body),
+        )
+        on_delta("reset", None)
+        for event in response.get("body", []):
+            raise_stream_error_event(event, "InvokeModelWithResponseStream")
+            chunk = event.get("chunk")
+            if not chunk:
+                continue
+            payload = json.loads(chunk["bytes"])
+            if payload.get("type") != "content_block_delta":
+                continue
+            delta = payload.get("delta", {}).get("text", "")
+            if delta:
+                text_parts.append(delta)
+                on_delta("text", delta)
+    return "".join(text_parts)
+
+
+def _strip_unsupported_features(kb_cfg: dict, support: dict):
+    """Drop fields the feature-support registry has already seen rejected."""
+    for feature in KB_CONFIG_FEATURES:
+        if support.get(feature) is False:
+            kb_cfg.pop(feature, None)
+    vector_cfg = kb_cfg.get("retrievalConfiguration", {}).get("vectorSearchConfiguration", {})
+    for feature in VECTOR_SEARCH_FEATURES:
+        if support.get(feature) is False:
+            vector_cfg.pop(feature, None)
+
+
+def _rejected_features(message: str) -> list:
+    """Features a validation error message names, most specific first."""
+    message_lower = message.lower()
+    rejected = []
+    if "overridesearchtype" in message_lower:
+        rejected.append("overrideSearchType")
+    if "filter" in message_lower:
+        rejected.append("filter")
+    if "rerankingconfiguration" in message_lower:
+        rejected.append("rerankingConfiguration")
+    # A vector-search field's path also names retrievalConfiguration; only
+    # drop the whole block when nothing narrower was rejected.
+    if not rejected and ("retrievalConfiguration" in message or "numberOfResults" in message):
+        rejected.append("retrievalConfiguration")
+    if (
+        "generationConfiguration" in message
+        or "inferenceConfig" in message
+        or "textInferenceConfig" in message
+        or "maxTokens" in message
+    ):
+        rejected.append("generationConfiguration")
+    return rejected
+
+
+def _reject_features(key: tuple, kb_cfg: dict, message: str, sticky: bool = None) -> bool:
+    """Strip the features named in message. Returns True if anything was removed.
+
+    The rejection is recorded in the registry only when sticky, which
+    defaults to whether message explicitly names an unknown parameter.
+    """
+    if sticky is None:
+        sticky = bool(UNKNOWN_PARAMETER_PATTERN.search(message))
+    vector_cfg = kb_cfg.get("retrievalConfiguration", {}).get("vectorSearchConfiguration", {})
+    stripped = False
+    for feature in _rejected_features(message):
+        target = kb_cfg if feature in KB_CONFIG_FEATURES else vector_cfg
+        if feature in target:
+            target.pop(feature, None)
+            if sticky:
+                record_feature_support(key, feature, False)
+            stripped = True
+    return stripped
+
+
+def _record_accepted_features(key: tuple, kb_cfg: dict):
+    vector_cfg = kb_cfg.get("retrievalConfiguration", {}).get("vectorSearchConfiguration", {})
+    for feature in KB_CONFIG_FEATURES:
+        if feature in kb_cfg:
+            record_feature_support(key, feature, True)
+    for feature in VECTOR_SEARCH_FEATURES:
+        if feature in vector_cfg:
+            record_feature_support(key, feature, True)
+
+
+def run_retrieve_and_generate(client, params: dict, on_delta=None):
+    """Call Bedrock retrieve_and_generate, stripping fields the SDK or service doesn't support.
+
+    Fields missing from the installed service model are pruned up front, and
+    fields the registry has seen rejected for this (region, KB, model) are
+    skipped; the ParamValidationError loop remains for anything else. Safe to
+    run on worker threads: it never touches session state.
+    When on_delta is given and the client supports it, the answer is streamed and
+    each text delta / citation batch is forwarded as it arrives.
+    """
+    stream = on_delta is not None and hasattr(client, "retrieve_and_generate_stream")
     kb_cfg = params.get("retrieveAndGenerateConfiguration", {}).get("knowledgeBaseConfiguration", {})
-    feature_support = st.session_state.get(
-        "bedrock_feature_support",
-        {"retrievalConfiguration": None, "generationConfiguration": None},
-    )
+    support_key = feature_support_key(client, kb_cfg)
 
-    # Skip fields already known to be unsupported in this runtime.
-    if feature_support.get("retrievalConfiguration") is False:
-        kb_cfg.pop("retrievalConfiguration", None)
-    if feature_support.get("generationConfiguration") is False:
-        kb_cfg.pop("generationConfiguration", None)
+    pruned = prune_request_params(
+        client, "retrieve_and_generate_stream" if stream else "retrieve_and_generate", params
+    )
+    for path in pruned:
+        feature = path.rsplit(".", 1)[-1]
+        if feature in KB_CONFIG_FEATURES + VECTOR_SEARCH_FEATURES:
+            record_feature_support(support_key, feature, False)
+    _strip_unsupported_features(kb_cfg, get_feature_support(support_key))
 
     last_error = None
     for _ in range(3):
         try:
-            response = client.retrieve_and_generate(**params)
-            if feature_support.get("retrievalConfiguration") is None:
-                feature_support["retrievalConfiguration"] = "retrievalConfiguration" in kb_cfg
-            if feature_support.get("generationConfiguration") is None:
-                feature_support["generationConfiguration"] = "generationConfiguration" in kb_cfg
-            st.session_state.bedrock_feature_support = feature_support
+            if stream:
+                response = _collect_retrieve_and_generate_stream(client, params, on_delta)
+            else:
+                response = bedrock_call(
+                    "retrieve_and_generate", client.retrieve_and_generate, model_id=kb_cfg.get("modelArn"), **params
+                )
+            _record_accepted_features(support_key, kb_cfg)
             return response
         except ParamValidationError as e:
-            message = str(e)
-            message_lower = message.lower()
-            stripped = False
-            retrieval_cfg = kb_cfg.get("retrievalConfiguration", {})
-            vector_cfg = retrieval_cfg.get("vectorSearchConfiguration", {})
-
-            if "overrideSearchType" in message or "overridesearchtype" in message_lower:
-                if "overrideSearchType" in vector_cfg:
-                    vector_cfg.pop("overrideSearchType", None)
-                    stripped = True
-
-            if "filter" in message_lower:
-                if "filter" in vector_cfg:
-                    vector_cfg.pop("filter", None)
-                    stripped = True
-
-            if "rerankingconfiguration" in message_lower or "bedrockrerankingconfiguration" in message_lower:
-                if "rerankingConfiguration" in vector_cfg:
-                    vector_cfg.pop("rerankingConfiguration", None)
-                    stripped = True
-
-            if (
-                "retrievalConfiguration" in message
-                or "numberOfResults" in message
-            ):
-                if "retrievalConfiguration" in kb_cfg:
-                    kb_cfg.pop("retrievalConfiguration", None)
-                    stripped = True
-                feature_support["retrievalConfiguration"] = False
-
-            if (
-                "generationConfiguration" in message
-                or "inferenceConfig" in message
-                or "textInferenceConfig" in message
-                or "maxTokens" in message
-            ):
-                if "generationConfiguration" in kb_cfg:
-                    kb_cfg.pop("generationConfiguration", None)
-                    stripped = True
-                feature_support["generationConfiguration"] = False
-
-            if not stripped:
+            if not _reject_features(support_key, kb_cfg, str(e), sticky=True):
                 raise
-
             last_error = e
             continue
 
-    st.session_state.bedrock_feature_support = feature_support
     if last_error:
         raise last_error
 
@@ -3768,11 +6533,44 @@ def build_vector_search_config(retrieval_settings: dict, number_of_results: int
     return vector_cfg
 
 
-def query_knowledge_base(question: str, knowledge_base_id: str, model_arn: str,
-                          mode: str = "rulebook", session_id: str = None,
-                          region_name: str = None, retrieval_settings: dict = None):
-    """Query Bedrock Knowledge Base. Returns (response_text, citations, session_id)."""
-    client = get_bedrock_client("bedrock-agent-runtime", region_name)
+async def query_knowledge_base(question: str, knowledge_base_id: str, model_arn: str,
+                               mode: str = "rulebook", session_id: str = None,
+                               region_name: str = None, retrieval_settings: dict = None,
+                               on_delta=None, retrieval_query: str = None):
+    """Query Bedrock Knowledge Base. Returns (response_text, citations, session_id).
+
+    Pass on_delta to stream the generated answer (see run_retrieve_and_generate).
+    retrieval_query overrides the rewritten query; by default the shared
+    rewrite plan for the question is used. Every outcome feeds the lane's
+    circuit breaker (see run_breaker_lane).
+    """
+    return await run_breaker_lane(
+        knowledge_base_id,
+        model_arn,
+        lambda outcome: _query_knowledge_base(
+            question,
+            knowledge_base_id,
+            model_arn,
+            mode=mode,
+            session_id=session_id,
+            region_name=region_name,
+            retrieval_settings=retrieval_settings,
+            on_delta=on_delta,
+            retrieval_query=retrieval_query,
+            outcome=outcome,
+        ),
+        ("Error: this model lane is paused while another request re-checks it.", [], session_id),
+    )
+
+
+async def _query_knowledge_base(question: str, knowledge_base_id: str, model_arn: str,
+                                mode: str = "rulebook", session_id: str = None,
+                                region_name: str = None, retrieval_settings: dict = None,
+                                on_delta=None, retrieval_query: str = None, outcome: dict = None):
+    """query_knowledge_base without the breaker; the error behind an error answer goes to outcome."""
+    if outcome is None:
+        outcome = {}
+    client = get_bedrock_client("bedrock-agent-runtime", region_name, call_class="generate")
     if not client:
         return "Error: Could not initialise Bedrock client.", [], None
 
@@ -3782,12 +6580,11 @@ def query_knowledge_base(question: str, knowledge_base_id: str, model_arn: str,
         session_id = str(uuid.uuid4())
 
     # ── Query expansion: static glossary first, LLM rewrite as fallback ──
-    expanded_question = expand_query_for_retrieval(question, mode)
-    if expanded_question == question:
-        # Glossary didn't match — try LLM-based rewrite for novel slang
-        expanded_question = rewrite_query_for_retrieval(question, mode, region_name)
+    if retrieval_query is None:
+        rewrite_plan = await aplan_retrieval_rewrite(question, mode, region_name)
+        retrieval_query = rewrite_plan["retrieval_query"]
 
-    prompt = build_query_prompt(expanded_question, mode, retrieval_settings)
+    prompt = build_query_prompt(retrieval_query, mode, retrieval_settings)
     vector_search_cfg = build_vector_search_config(retrieval_settings)
 
     params = {
@@ -3816,7 +6613,7 @@ def query_knowledge_base(question: str, knowledge_base_id: str, model_arn: str,
         params["sessionId"] = session_id
 
     try:
-        resp              = run_retrieve_and_generate(client, params)
+        resp              = await aretrieve_and_generate(client, params, on_delta)
         new_session_id    = resp.get("sessionId", session_id) if use_session else None
         generated_text    = resp["output"]["text"]
         citations         = _extract_citations(resp)
@@ -3829,6 +6626,7 @@ def query_knowledge_base(question: str, knowledge_base_id: str, model_arn: str,
         return generated_text, citations, new_session_id
 
     except ClientError as e:
+        outcome["error"] = e
         code    = e.response["Error"]["Code"]
         message = e.response["Error"]["Message"]
 
@@ -3844,39 +6642,10 @@ def query_knowledge_base(question: str, knowledge_base_id: str, model_arn: str,
             or "textInferenceConfig" in message
             or "maxTokens" in message
         ):
-            feature_support = st.session_state.get(
-                "bedrock_feature_support",
-                {"retrievalConfiguration": None, "generationConfiguration": None},
-            )
             kb_cfg = params["retrieveAndGenerateConfiguration"]["knowledgeBaseConfiguration"]
-            retrieval_cfg = kb_cfg.get("retrievalConfiguration", {})
-            vector_cfg = retrieval_cfg.get("vectorSearchConfiguration", {})
-            message_lower = message.lower()
-
-            if (
-                "retrievalConfiguration" in message
-                or "numberOfResults" in message
-            ):
-                feature_support["retrievalConfiguration"] = False
-                kb_cfg.pop("retrievalConfiguration", None)
-            else:
-                if "overrideSearchType" in message or "overridesearchtype" in message_lower:
-                    vector_cfg.pop("overrideSearchType", None)
-                if "filter" in message_lower:
-                    vector_cfg.pop("filter", None)
-                if "rerankingConfiguration" in message or "bedrockRerankingConfiguration" in message:
-                    vector_cfg.pop("rerankingConfiguration", None)
-            if (
-                "generationConfiguration" in message
-                or "inferenceConfig" in message
-                or "textInferenceConfig" in message
-                or "maxTokens" in message
-            ):
-                feature_support["generationConfiguration"] = False
-                kb_cfg.pop("generationConfiguration", None)
-            st.session_state.bedrock_feature_support = feature_support
+            _reject_features(feature_support_key(client, kb_cfg), kb_cfg, message)
             try:
-                resp = run_retrieve_and_generate(client, params)
+                resp = await aretrieve_and_generate(client, params, on_delta)
                 new_session_id = resp.get("sessionId", session_id) if use_session else None
                 gen_text = resp["output"]["text"]
                 cits = filter_relevant_citations(
@@ -3887,6 +6656,7 @@ def query_knowledge_base(question: str, knowledge_base_id: str, model_arn: str,
                 )
                 return gen_text, cits, new_session_id
             except Exception as retry_err:
+                outcome["error"] = retry_err
                 return f"Retry failed: {retry_err}", [], None
 
         # Retry without session if session/config is stale
@@ -3896,7 +6666,7 @@ def query_knowledge_base(question: str, knowledge_base_id: str, model_arn: str,
         ):
             params.pop("sessionId", None)
             try:
-                resp           = run_retrieve_and_generate(client, params)
+                resp           = await aretrieve_and_generate(client, params, on_delta)
                 new_session_id = resp.get("sessionId") if use_session else None
                 gen_text       = resp["output"]["text"]
                 cits           = filter_relevant_citations(
@@ -3907,14 +6677,21 @@ def query_knowledge_base(question: str, knowledge_base_id: str, model_arn: str,
                 )
                 return gen_text, cits, new_session_id
             except Exception as retry_err:
+                outcome["error"] = retry_err
                 return f"Retry failed: {retry_err}", [], None
 
         return f"AWS Error ({code}): {message}", [], session_id
 
     except ParamValidationError as e:
+        outcome["error"] = e
         return f"Error querying knowledge base: {e}", [], session_id
 
+    except asyncio.TimeoutError as e:
+        outcome["error"] = e
+        return "Error querying knowledge base: the request timed out.", [], session_id
+
     except Exception as e:
+        outcome["error"] = e
         return f"Error querying knowledge base: {e}", [], session_id
 
 
@@ -3969,54 +6746,236 @@ def build_manual_answer_prompt(question: str, mode: str, retrieval_settings: dic
     )
 
 
-def manual_retrieve_and_answer(question: str, knowledge_base_id: str, model_arn: str,
-                               mode: str, region_name: str, retrieval_settings: dict):
-    rag_client = get_bedrock_client("bedrock-agent-runtime", region_name)
-    runtime_client = get_bedrock_runtime_client(region_name)
-    if not rag_client or not runtime_client:
-        return None, []
+def build_kb_answer_prompt(question: str, mode: str, retrieval_settings: dict, source_text: str) -> str:
+    """The knowledge-base generation prompt, with pooled sources in place of Bedrock's own retrieval."""
+    base_prompt = build_query_prompt(question, mode, retrieval_settings).rsplit("Answer:", 1)[0].rstrip()
+    return f"{base_prompt}\n\nRetrieved sources:\n{source_text}\n\nAnswer:"
 
-    raw_citations = []
-    seen = set()
-    for retrieval_query in build_manual_retrieval_queries(question, mode):
-        manual_vector_cfg = build_vector_search_config(
-            retrieval_settings,
-            number_of_results=max(retrieval_settings.get("number_of_results", 5), 4),
-        )
-        try:
-            retrieval_resp = rag_client.retrieve(
-                knowledgeBaseId=knowledge_base_id,
-                retrievalQuery={"text": retrieval_query},
-                retrievalConfiguration={
-                    "vectorSearchConfiguration": manual_vector_cfg
-                },
-            )
-        except Exception:
+
+RETRIEVAL_POOL_RESULTS = 10  # Deep profile caps numberOfResults at 10.
+RRF_K = 60
+
+
+# Shared retrieve cache: every path that calls Bedrock retrieve (cascade
+# pools, manual and hypothetical fallbacks, quiz, sample questions) goes
+# through retrieve_cached. It sits above the persistent retrievals table.
+RETRIEVE_MEMO_SIZE = 512
+RETRIEVE_MEMO_TTL_SECONDS = 60 * 60
+
+
+def chunk_fingerprint(text: str, uri: str) -> str:
+    """Dedupe key for a chunk: base URI plus the first 180 characters."""
+    return f"{uri.split('#')[0]}|{text[:180]}"
+
+
+def parse_retrieval_results(retrieval_resp: dict) -> list:
+    chunks = []
+    for result in retrieval_resp.get("retrievalResults", []):
+        text = result.get("content", {}).get("text", "").strip()
+        if not text:
             continue
+        uri = result.get("location", {}).get("s3Location", {}).get("uri", "Unknown source")
+        chunks.append({
+            "content": text,
+            "uri": uri,
+            "metadata": result.get("metadata", {}),
+            "fingerprint": chunk_fingerprint(text, uri),
+            "low_signal": is_low_signal_chunk(text),
+        })
+    return chunks
+
+
+def _retrieve_memo_key(knowledge_base_id: str, query: str, vector_cfg: dict) -> tuple:
+    return (knowledge_base_id, kb_content_version(knowledge_base_id), _retrieval_cache_key(query, vector_cfg))
+
+
+def retrieve_cached_hit(knowledge_base_id: str, query: str, vector_cfg: dict):
+    """Chunk copies from the in-memory tier, or None; never blocks on Bedrock or disk."""
+    chunks = _shared_lru_get("retrieve", _retrieve_memo_key(knowledge_base_id, query, vector_cfg))
+    if chunks is None:
+        return None
+    record_cache_hit("retrieve", mode_for_kb(knowledge_base_id), "retrieve")
+    return [dict(chunk) for chunk in chunks]
+
+
+def retrieve_cached(rag_client, knowledge_base_id: str, query: str, vector_cfg: dict) -> list:
+    """Parsed chunks for one retrieve call: memory, then the persistent cache, then Bedrock.
+
+    Returns copies, so callers may annotate chunks freely. Bedrock errors propagate.
+    """
+    memo_key = _retrieve_memo_key(knowledge_base_id, query, vector_cfg)
+    mode = mode_for_kb(knowledge_base_id)
+    chunks = _shared_lru_get("retrieve", memo_key)
+    if chunks is not None:
+        record_cache_hit("retrieve", mode, "retrieve")
+    else:
+        record_cache_event("retrieve", mode, "misses")
+        chunks = persistent_retrieval_get(knowledge_base_id, query, vector_cfg)
+        if chunks is not None:
+            record_cache_hit("persistent", mode, "retrieve")
+        else:
+            record_cache_event("persistent", mode, "misses")
+            started = time.monotonic()
+            request = {
+                "knowledgeBaseId": knowledge_base_id,
+                "retrievalQuery": {"text": query},
+                "retrievalConfiguration": {"vectorSearchConfiguration": dict(vector_cfg)},
+            }
+            prune_request_params(rag_client, "retrieve", request)
+            _strip_unsupported_features(
+                request,
+                kb_feature_support(getattr(getattr(rag_client, "meta", None), "region_name", None), knowledge_base_id),
+            )
+            retrieval_resp = bedrock_call("retrieve", rag_client.retrieve, **request)
+            record_stage_latency(mode, "retrieve", time.monotonic() - started)
+            chunks = parse_retrieval_results(retrieval_resp)
+            persistent_retrieval_set(knowledge_base_id, query, vector_cfg, chunks)
+        record_cache_event(
+            "retrieve", mode, "evictions",
+            count=_shared_lru_set("retrieve", memo_key, chunks, RETRIEVE_MEMO_SIZE, ttl_seconds=RETRIEVE_MEMO_TTL_SECONDS),
+        )
+    return [dict(chunk) for chunk in chunks]
+
+
+async def retrieve_chunks(rag_client, knowledge_base_id: str, query: str, retrieval_settings: dict,
+                          number_of_results: int) -> list:
+    """Run one Bedrock retrieve call and return parsed chunks, skipping low-signal text.
+
+    Goes through the shared retrieve cache, keyed by KB id, normalized query
+    and the vector search configuration; memory hits skip the executor.
+    """
+    vector_cfg = build_vector_search_config(retrieval_settings, number_of_results=number_of_results)
+    chunks = retrieve_cached_hit(knowledge_base_id, query, vector_cfg)
+    if chunks is None:
+        chunks = await run_offloaded(
+            retrieve_cached,
+            rag_client,
+            knowledge_base_id,
+            query,
+            vector_cfg,
+            timeout=BEDROCK_AWAIT_TIMEOUTS["retrieve"],
+            admit=("retrieve", None),
+        )
+    return [chunk for chunk in chunks if not chunk["low_signal"]]
+
 
-        for result in retrieval_resp.get("retrievalResults", []):
-            text = result.get("content", {}).get("text", "").strip()
-            if is_low_signal_chunk(text):
+def merge_chunks(chunk_lists: list) -> list:
+    """Merge chunk lists in order, dropping repeats by chunk fingerprint."""
+    merged = []
+    seen = set()
+    for chunks in chunk_lists:
+        for chunk in chunks:
+            if chunk["fingerprint"] in seen:
                 continue
+            seen.add(chunk["fingerprint"])
+            merged.append(dict(chunk))
+    return merged
+
 
-            location = result.get("location", {}).get("s3Location", {})
-            uri = location.get("uri", "Unknown source")
-            metadata = result.get("metadata", {})
-            fingerprint = (text[:180], uri.split("#")[0])
+def fuse_chunk_rankings(chunk_lists: list, k: int = RRF_K) -> list:
+    """Merge ranked chunk lists by reciprocal-rank fusion, deduping like merge_chunks.
+
+    A chunk scores sum(1 / (k + rank)) over the lists it appears in, so chunks
+    that rank well for several query variants lead. Ties keep first-seen order.
+    Each returned chunk carries its "fused_rank" (1-based) and "fused_score".
+    """
+    fused = {}
+    for chunks in chunk_lists:
+        seen = set()
+        for rank, chunk in enumerate(chunks, start=1):
+            fingerprint = chunk["fingerprint"]
             if fingerprint in seen:
                 continue
             seen.add(fingerprint)
-            raw_citations.append({
-                "content": text,
-                "uri": uri,
-                "metadata": metadata,
-            })
+            entry = fused.get(fingerprint)
+            if entry is None:
+                entry = fused[fingerprint] = {"chunk": dict(chunk), "score": 0.0, "order": len(fused)}
+            entry["score"] += 1.0 / (k + rank)
+    ranked = sorted(fused.values(), key=lambda entry: (-entry["score"], entry["order"]))
+    for rank, entry in enumerate(ranked, start=1):
+        entry["chunk"]["fused_rank"] = rank
+        entry["chunk"]["fused_score"] = round(entry["score"], 5)
+    return [entry["chunk"] for entry in ranked]
+
+
+def citation_chunks(citations: list) -> list:
+    """Citations as ranked pool chunks, so a pass's own sources can seed a later pool."""
+    return [
+        {
+            "content": citation["content"],
+            "uri": citation["uri"],
+            "metadata": citation.get("metadata", {}),
+            "fingerprint": chunk_fingerprint(citation["content"], citation["uri"]),
+            "low_signal": False,
+        }
+        for citation in citations
+        if citation.get("content")
+    ]
+
+
+async def build_chunk_pool(queries: list, knowledge_base_id: str, region_name: str,
+                           retrieval_settings: dict) -> list:
+    """Retrieve a superset of chunks once so later cascade passes only need generation.
+
+    Queries run concurrently and their rankings are fused (see fuse_chunk_rankings).
+    """
+    rag_client = get_bedrock_client("bedrock-agent-runtime", region_name)
+    if not rag_client:
+        return []
+
+    pool_results = max(RETRIEVAL_POOL_RESULTS, retrieval_settings.get("number_of_results", 5))
+    query_results = await gather_bounded(
+        [
+            retrieve_chunks(rag_client, knowledge_base_id, query, retrieval_settings, pool_results)
+            for query in queries
+        ],
+        len(queries),
+    )
+    return fuse_chunk_rankings(
+        [chunks for chunks in query_results if not isinstance(chunks, BaseException)]
+    )
+
+
+async def generate_source_answer(runtime_client, model_arn: str, body: dict, knowledge_base_id: str = None,
+                                 on_delta=None):
+    """One generation call over retrieved sources; None when it fails or the lane is paused.
+
+    With knowledge_base_id the call runs as a (knowledge_base_id, model_arn)
+    breaker lane, like query_knowledge_base.
+    """
+    async def generate(outcome: dict):
+        try:
+            return await ainvoke_model_text(runtime_client, model_arn, body, on_delta=on_delta)
+        except Exception as exc:
+            outcome["error"] = exc
+            return None
+
+    if not knowledge_base_id:
+        return await generate({})
+    return await run_breaker_lane(knowledge_base_id, model_arn, generate, None)
+
+
+async def answer_from_chunks(question: str, chunks: list, model_arn: str, mode: str, region_name: str,
+                             retrieval_settings: dict, max_sources: int, exact_match_bias: bool,
+                             on_delta=None, prompt_builder=build_manual_answer_prompt,
+                             knowledge_base_id: str = None):
+    """Re-filter a local chunk set for the question and run generation only.
+
+    Returns (text, citations); text is None when nothing relevant survives the
+    filter, the model call fails or the lane's breaker is open. prompt_builder
+    keeps the lane's own prompt: the manual-fallback prompt by default,
+    build_kb_answer_prompt for lanes that used to go through
+    retrieve_and_generate. knowledge_base_id feeds the lane's breaker.
+    """
+    runtime_client = get_bedrock_runtime_client(region_name)
+    if not runtime_client:
+        return None, []
 
     filtered_citations = filter_relevant_citations(
-        raw_citations,
+        chunks,
         question,
-        max_sources=max(retrieval_settings.get("max_sources", 4), 4),
-        exact_match_bias=True,
+        max_sources=max_sources,
+        exact_match_bias=exact_match_bias,
     )
     if not filtered_citations:
         return None, []
@@ -4028,29 +6987,73 @@ def manual_retrieve_and_answer(question: str, knowledge_base_id: str, model_arn:
     for citation in filtered_citations:
         label = citation_title(citation, mode)
         source_blocks.append(f"[{label}]\n{citation['content']}")
-    prompt = build_manual_answer_prompt(question, mode, retrieval_settings, "\n\n---\n\n".join(source_blocks))
+    prompt = prompt_builder(question, mode, retrieval_settings, "\n\n---\n\n".join(source_blocks))
+
+    text = await generate_source_answer(
+        runtime_client,
+        model_arn,
+        {
+            "anthropic_version": "bedrock-2023-05-31",
+            "max_tokens": 800,
+            "messages": [{"role": "user", "content": prompt}],
+        },
+        knowledge_base_id=knowledge_base_id,
+        on_delta=on_delta,
+    )
+    return text, filtered_citations
 
-    try:
-        response = runtime_client.invoke_model(
-            modelId=model_arn,
-            contentType="application/json",
-            accept="application/json",
-            body=json.dumps({
-                "anthropic_version": "bedrock-2023-05-31",
-                "max_tokens": 800,
-                "messages": [{"role": "user", "content": prompt}],
-            }),
+
+async def manual_retrieve_and_answer(question: str, knowledge_base_id: str, model_arn: str,
+                                     mode: str, region_name: str, retrieval_settings: dict,
+                                     on_delta=None, chunk_pool: list = None):
+    """Answer from directly retrieved chunks, or from chunk_pool when one was already fetched.
+
+    The manual queries run concurrently and merge by reciprocal-rank fusion;
+    filter_relevant_citations keeps that consensus order when truncating.
+    """
+    if chunk_pool is None:
+        rag_client = get_bedrock_client("bedrock-agent-runtime", region_name)
+        if not rag_client:
+            return None, []
+
+        queries = build_manual_retrieval_queries(question, mode)
+        query_results = await gather_bounded(
+            [
+                retrieve_chunks(
+                    rag_client,
+                    knowledge_base_id,
+                    retrieval_query,
+                    retrieval_settings,
+                    max(retrieval_settings.get("number_of_results", 5), 4),
+                )
+                for retrieval_query in queries
+            ],
+            len(queries),
         )
-        result = json.loads(response["body"].read())
-        text = result.get("content", [{}])[0].get("text", "")
-        return text, filtered_citations
-    except Exception:
-        return None, filtered_citations
+        chunk_pool = fuse_chunk_rankings(
+            [chunks for chunks in query_results if not isinstance(chunks, BaseException)]
+        )
+
+    return await answer_from_chunks(
+        question,
+        chunk_pool,
+        model_arn,
+        mode,
+        region_name,
+        retrieval_settings,
+        max_sources=max(retrieval_settings.get("max_sources", 4), 4),
+        exact_match_bias=True,
+        on_delta=on_delta,
+        knowledge_base_id=knowledge_base_id,
+    )
 
 
 # ─────────────────────────────────────────────
 # HYPOTHETICAL / SCENARIO RETRIEVAL + REASONING
 # ─────────────────────────────────────────────
+HYPOTHETICAL_TOPIC_CONCURRENCY = 4
+
+
 def build_hypothetical_answer_prompt(question: str, mode: str, retrieval_settings: dict, source_text: str) -> str:
     """Build a prompt that asks the model to reason through a hypothetical scenario
     using only the retrieved source material."""
@@ -4100,9 +7103,9 @@ Answer:
 """
 
 
-def hypothetical_retrieve_and_answer(question: str, knowledge_base_id: str, model_arn: str,
-                                      mode: str, region_name: str, retrieval_settings: dict,
-                                      status_cb=None):
+async def hypothetical_retrieve_and_answer(question: str, knowledge_base_id: str, model_arn: str,
+                                           mode: str, region_name: str, retrieval_settings: dict,
+                                           status_cb=None, on_delta=None):
     """Handle hypothetical/scenario questions by:
     1. Extracting the underlying rule topics from the scenario
     2. Running targeted KB retrievals for each topic
@@ -4119,7 +7122,7 @@ def hypothetical_retrieve_and_answer(question: str, knowledge_base_id: str, mode
 
     # Step 1: Extract retrievable topics from the hypothetical
     status("retrieving", "Decomposing scenario into rule topics")
-    topics = extract_hypothetical_topics(question, mode, region_name)
+    topics = await run_aux_offloaded(extract_hypothetical_topics, question, mode, region_name, fallback=[])
 
     if not topics:
         # Fallback: use glossary expansion + the raw question
@@ -4129,49 +7132,27 @@ def hypothetical_retrieve_and_answer(question: str, knowledge_base_id: str, mode
             hints_text = expanded.split("Retrieval hints:", 1)[1].replace(";", " ").strip()
             topics.append(hints_text)
 
-    # Step 2: Retrieve KB chunks for each extracted topic
+    # Step 2: Retrieve KB chunks for every extracted topic concurrently.
+    # Results merge in topic order, so the answer does not depend on which
+    # search returned first.
     status("retrieving", f"Searching {len(topics)} rule topics")
-    raw_citations = []
-    seen = set()
-    for topic in topics:
-        # Also run the topic through glossary expansion for better retrieval
-        expanded_topic = expand_query_for_retrieval(topic, mode)
-        queries_to_run = [expanded_topic]
-        if expanded_topic == topic:
-            queries_to_run = [topic]
-
-        for query in queries_to_run:
-            manual_vector_cfg = build_vector_search_config(
+    topic_results = await gather_bounded(
+        [
+            # Also run the topic through glossary expansion for better retrieval
+            retrieve_chunks(
+                rag_client,
+                knowledge_base_id,
+                expand_query_for_retrieval(topic, mode),
                 retrieval_settings,
-                number_of_results=max(retrieval_settings.get("number_of_results", 5), 5),
+                max(retrieval_settings.get("number_of_results", 5), 5),
             )
-            try:
-                retrieval_resp = rag_client.retrieve(
-                    knowledgeBaseId=knowledge_base_id,
-                    retrievalQuery={"text": query},
-                    retrievalConfiguration={
-                        "vectorSearchConfiguration": manual_vector_cfg
-                    },
-                )
-            except Exception:
-                continue
-
-            for result in retrieval_resp.get("retrievalResults", []):
-                text = result.get("content", {}).get("text", "").strip()
-                if is_low_signal_chunk(text):
-                    continue
-                location = result.get("location", {}).get("s3Location", {})
-                uri = location.get("uri", "Unknown source")
-                metadata = result.get("metadata", {})
-                fingerprint = (text[:180], uri.split("#")[0])
-                if fingerprint in seen:
-                    continue
-                seen.add(fingerprint)
-                raw_citations.append({
-                    "content": text,
-                    "uri": uri,
-                    "metadata": metadata,
-                })
+            for topic in topics
+        ],
+        HYPOTHETICAL_TOPIC_CONCURRENCY,
+    )
+    raw_citations = merge_chunks(
+        [chunks for chunks in topic_results if not isinstance(chunks, BaseException)]
+    )
 
     # Step 3: Filter and rank citations
     status("ranking", f"{len(raw_citations)} source chunks retrieved")
@@ -4197,23 +7178,19 @@ def hypothetical_retrieve_and_answer(question: str, knowledge_base_id: str, mode
 
     prompt = build_hypothetical_answer_prompt(question, mode, retrieval_settings, source_text)
 
-    try:
-        response = runtime_client.invoke_model(
-            modelId=model_arn,
-            contentType="application/json",
-            accept="application/json",
-            body=json.dumps({
-                "anthropic_version": "bedrock-2023-05-31",
-                "max_tokens": 1200,
-                "temperature": 0.0,
-                "messages": [{"role": "user", "content": prompt}],
-            }),
-        )
-        result = json.loads(response["body"].read())
-        text = result.get("content", [{}])[0].get("text", "")
-        return text, filtered_citations
-    except Exception:
-        return None, filtered_citations
+    text = await generate_source_answer(
+        runtime_client,
+        model_arn,
+        {
+            "anthropic_version": "bedrock-2023-05-31",
+            "max_tokens": 1200,
+            "temperature": 0.0,
+            "messages": [{"role": "user", "content": prompt}],
+        },
+        knowledge_base_id=knowledge_base_id,
+        on_delta=on_delta,
+    )
+    return text, filtered_citations
 
 
 def combine_crossbook_answers(question: str, rulebook_text: str, cba_text: str) -> str:
@@ -4274,23 +7251,95 @@ def should_run_manual_fallback(response: str, citations: list) -> bool:
     return any(marker in lower for marker in hard_failure_markers)
 
 
-def query_app_mode(
+async def query_app_mode_async(
     question: str,
     mode: str,
     runtime_config: dict,
     retrieval_settings: dict,
     response_mode: str = "balanced",
     status_cb=None,
+    stream_cb=None,
+    trace: dict = None,
 ):
+    """Answer a question for the given mode, running the fallback cascade as needed.
+
+    Runs on the event loop started by query_app_mode; Bedrock calls are
+    offloaded to the shared fan-out executor, so status_cb and stream_cb are
+    always invoked on the calling thread. stream_cb receives
+    ("reset" | "text" | "citations", payload) events from the sequential
+    passes. Raced fallback lanes and crossbook lanes are not streamed.
+
+    The cascade is scheduled against the profile's latency budget: a stage only
+    starts if its p50 cost fits in the remaining time, and skipped stages are
+    recorded in trace["stages_skipped"] when a trace dict is passed.
+    """
     profile = RESPONSE_PROFILES.get(response_mode, RESPONSE_PROFILES["balanced"])
+    BREAKER_SLO_SECONDS.set(profile.get("breaker_slo_seconds"))
+    budget_seconds = profile.get("latency_budget_seconds")
+    deadline = time.monotonic() + budget_seconds if budget_seconds else None
+    if trace is None:
+        trace = {}
+    trace.setdefault("stages_run", [])
+    trace.setdefault("stages_skipped", [])
+    trace["budget_seconds"] = budget_seconds
 
     def status(stage: str, detail: str = ""):
         if status_cb:
             status_cb(stage, detail)
 
+    def remaining_budget():
+        if deadline is None:
+            return None
+        return max(deadline - time.monotonic(), 0.0)
+
+    def stage_fits(stage: str, stage_mode: str = mode) -> bool:
+        lane = trace.get("breaker")
+        if lane and lane.get("model_arn") and breaker_state(lane["kb_id"], lane["model_arn"]) == "open":
+            lane["skipped"].append(stage)
+            status("ranking", f"Skipped {stage.replace('_', ' ')}: {breaker_notice(lane)}")
+            return False
+        if bedrock_throttle_active(stage_bedrock_keys(stage, lane and lane.get("model_arn"))):
+            trace.setdefault("stages_throttled", []).append(stage)
+            status("ranking", f"Skipped {stage.replace('_', ' ')} while Bedrock is throttling")
+            return False
+        remaining = remaining_budget()
+        if remaining is None or remaining >= stage_p50(stage_mode, stage):
+            return True
+        trace["stages_skipped"].append(stage)
+        status("ranking", f"Skipped {stage.replace('_', ' ')} to stay within the {profile['label']} budget")
+        return False
+
+    def stage_done(stage: str, started: float, stage_mode: str = mode):
+        seconds = time.monotonic() - started
+        record_stage_latency(stage_mode, stage, seconds)
+        trace["stages_run"].append({"stage": stage, "seconds": round(seconds, 2)})
+
+    def stage_abandoned(stage: str, started: float, stage_mode: str = mode):
+        # The stage took at least this long; leaving it out would bias its p50 low.
+        seconds = time.monotonic() - started
+        record_stage_latency(stage_mode, stage, seconds)
+        trace["stages_skipped"].append(f"{stage}_deadline")
+        # A deadline timeout counts against the model lane the stage ran on. Past
+        # the SLO the abandoned call has already recorded its own failure.
+        lane = trace.get("breaker")
+        if lane and lane.get("model_arn") and seconds < breaker_slo_seconds():
+            record_breaker_outcome(lane["kb_id"], lane["model_arn"], ok=False)
+
+    async def run_stage(stage: str, awaitable, default, stage_mode: str = mode):
+        """Await one cascade stage, abandoning it at the latency deadline."""
+        started = time.monotonic()
+        try:
+            result = await asyncio.wait_for(awaitable, remaining_budget())
+        except asyncio.TimeoutError:
+            stage_abandoned(stage, started, stage_mode)
+            return default
+        stage_done(stage, started, stage_mode)
+        return result
+
     def better_candidate(curr_resp, curr_cits, new_resp, new_cits):
         return (
-            bool(new_cits)
+            bool(new_resp)
+            and bool(new_cits)
             and (
                 not curr_cits
                 or len(new_cits) > len(curr_cits)
@@ -4298,11 +7347,29 @@ def query_app_mode(
             )
         )
 
+    def route_rules_out(stage: str) -> bool:
+        """Skip a stage that kept failing for this question's cluster and never won it.
+
+        Applies to every late stage: depth escalation, each fallback lane,
+        hypothetical and definitional. The first pass always runs.
+        """
+        route = trace.get("route")
+        if not route or route["winner"] == stage:
+            return False
+        if route["failed"].get(stage, 0) < ROUTE_NEGATIVE_MIN_FAILURES:
+            return False
+        trace.setdefault("stages_ruled_out", []).append(stage)
+        status("ranking", f"Skipped {stage.replace('_', ' ')}: it has not resolved similar questions")
+        return True
+
     if mode in ("rulebook", "cba"):
         primary_model_arn = runtime_config.get("model_arn", "")
         is_opus_cba = mode == "cba" and "opus" in primary_model_arn.lower()
         simple_cba = mode == "cba" and is_simple_cba_question(question)
         low_latency_model_arn = runtime_config.get("low_latency_model_arn") or DEFAULT_MODEL_ARNS["rulebook"]
+        trace["breaker"] = breaker_lane(runtime_config["kb_id"], primary_model_arn, low_latency_model_arn)
+        if trace["breaker"]["model_arn"]:
+            primary_model_arn = trace["breaker"]["model_arn"]
         cba_deep_guardrails = is_opus_cba and response_mode == "deep"
         use_cba_fast_lane = (
             is_opus_cba
@@ -4351,17 +7418,205 @@ def query_app_mode(
             response, citations = cached
             for citation in citations:
                 citation["source_domain"] = mode
+            trace["cache_tier"] = "session"
             status("finalizing", "Loaded from cache")
             return response, citations
 
-        similar_cached = _cache_get_similar(mode, question, response_mode, retrieval_settings)
-        if similar_cached:
-            response, citations, matched_question = similar_cached
+        similar_cached = _cache_get_similar(mode, question, response_mode, retrieval_settings)
+        if similar_cached:
+            response, citations, matched_question, trace["cache_match"] = similar_cached
+            for citation in citations:
+                citation["source_domain"] = mode
+            trace["cache_tier"] = "session"
+            status("finalizing", f"Loaded from similar prior question: {matched_question[:56]}")
+            return response, citations
+
+        shared_key = _shared_answer_key(question, mode, response_mode, retrieval_settings, primary_model_arn)
+        if not has_contextual_reference(question):
+            shared_cached = _shared_answer_get(mode, runtime_config["kb_id"], shared_key)
+            if shared_cached:
+                response, citations = shared_cached
+                for citation in citations:
+                    citation["source_domain"] = mode
+                _cache_set(
+                    mode,
+                    cache_key,
+                    response,
+                    citations,
+                    question=question,
+                    response_mode=response_mode,
+                    retrieval_settings=retrieval_settings,
+                )
+                trace["cache_tier"] = "shared"
+                status("finalizing", "Loaded from shared cache")
+                return response, citations
+
+        if trace["breaker"]["model_arn"] is None:
+            # Every lane for this KB is open: answer locally rather than time out again.
+            local = _cache_get_similar(
+                mode, question, response_mode, retrieval_settings, min_score=BREAKER_LOCAL_MIN_SIMILARITY
+            )
+            if local:
+                response, citations, matched_question, trace["cache_match"] = local
+                for citation in citations:
+                    citation["source_domain"] = mode
+                trace["cache_tier"] = "session"
+                status("finalizing", f"Loaded closest saved answer: {matched_question[:56]}")
+                return response, citations
+            status("finalizing", "Knowledge base unavailable")
+            return (
+                f"The {THEMES[mode]['name']} knowledge base isn't responding right now, so this question "
+                f"wasn't sent. Please try again in about {get_breaker_settings()['open_seconds']:.0f} seconds.",
+                [],
+            )
+
+        # One rewrite plan per question, shared by every pass below.
+        rewrite_plan = await aplan_retrieval_rewrite(question, mode, runtime_config["region"])
+        retrieval_query = rewrite_plan["retrieval_query"]
+
+        # Retrieve once, generate many: escalations and fallbacks re-filter this
+        # chunk superset locally instead of re-running vector search.
+        chunk_pool_state = {}
+
+        async def shared_chunks() -> list:
+            if "chunks" not in chunk_pool_state:
+                pool_queries = build_manual_retrieval_queries(question, mode)
+                if rewrite_plan["source"] == "llm":
+                    pool_queries.append(retrieval_query)
+                pool = await build_chunk_pool(
+                    pool_queries,
+                    runtime_config["kb_id"],
+                    runtime_config["region"],
+                    retrieval_settings,
+                )
+                # The first pass's own sources rank alongside the pool queries.
+                seed = chunk_pool_state.get("seed")
+                chunk_pool_state["chunks"] = fuse_chunk_rankings([seed, pool]) if seed else pool
+            return chunk_pool_state["chunks"]
+
+        async def answer_from_pool(expanded: bool = False, on_delta=None):
+            """Regenerate over pooled chunks with the knowledge-base prompt these lanes always used.
+
+            expanded ranks the rewritten query's own retrieval instead; the
+            user's question is still what the model and the filter see.
+            """
+            if expanded:
+                chunks = await build_chunk_pool(
+                    [retrieval_query], runtime_config["kb_id"], runtime_config["region"], retrieval_settings
+                )
+            else:
+                chunks = await shared_chunks()
+            return await answer_from_chunks(
+                question,
+                chunks,
+                primary_model_arn,
+                mode,
+                runtime_config["region"],
+                retrieval_settings,
+                max_sources=retrieval_settings.get("max_sources", 4),
+                exact_match_bias=retrieval_settings.get("exact_match_bias", False),
+                on_delta=on_delta,
+                prompt_builder=build_kb_answer_prompt,
+                knowledge_base_id=runtime_config["kb_id"],
+            )
+
+        async def definitional_pass():
+            defined_query = await run_aux_offloaded(
+                define_unknown_term, question, mode, runtime_config.get("region"), fallback=question
+            )
+            if defined_query == question:
+                return None
+            status("retrieving", "Re-searching with definitional context")
+            return await query_knowledge_base(
+                defined_query,
+                runtime_config["kb_id"],
+                primary_model_arn,
+                mode,
+                session_id=None,  # fresh session to avoid contamination
+                region_name=runtime_config["region"],
+                retrieval_settings=retrieval_settings,
+                on_delta=stream_cb,
+            )
+
+        async def run_route_stage(stage: str):
+            """Run one late cascade stage on its own, for a route cache jump."""
+            if stage in ("depth_escalation", "fallback_expanded"):
+                return await answer_from_pool(expanded=stage == "fallback_expanded", on_delta=stream_cb)
+            if stage == "fallback_manual":
+                return await manual_retrieve_and_answer(
+                    question,
+                    runtime_config["kb_id"],
+                    primary_model_arn,
+                    mode,
+                    runtime_config["region"],
+                    retrieval_settings,
+                    on_delta=stream_cb,
+                    chunk_pool=await shared_chunks(),
+                )
+            if stage == "hypothetical":
+                return await hypothetical_retrieve_and_answer(
+                    question,
+                    runtime_config["kb_id"],
+                    primary_model_arn,
+                    mode,
+                    runtime_config["region"],
+                    retrieval_settings,
+                    status_cb=status_cb,
+                    on_delta=stream_cb,
+                )
+            definitional = await definitional_pass()
+            return definitional[:2] if definitional else (None, [])
+
+        def finish(response: str, citations: list, new_session, persist_session: bool = True):
+            if persist_session and not stateless_mode:
+                st.session_state.session_ids[mode] = new_session
             for citation in citations:
                 citation["source_domain"] = mode
-            status("finalizing", f"Loaded from similar prior question: {matched_question[:56]}")
+
+            final_scope = new_session or session_scope
+            final_cache_key = _cache_key(question, mode, response_mode, retrieval_settings, final_scope)
+            _cache_set(
+                mode,
+                final_cache_key,
+                response,
+                citations,
+                question=question,
+                response_mode=response_mode,
+                retrieval_settings=retrieval_settings,
+            )
+            _shared_answer_set(
+                mode,
+                runtime_config["kb_id"],
+                shared_key,
+                question,
+                response,
+                citations,
+                model_arn=primary_model_arn,
+                signature=retrieval_signature(response_mode, retrieval_settings),
+            )
             return response, citations
 
+        route = route_cache_get(mode, response_mode, question)
+        trace["route"] = route
+        routed_stage = route["winner"] if route else None
+        # A routed stage that missed is not run again by the cascade below.
+        routed_missed = []
+        if (
+            routed_stage in ROUTE_STAGE_COSTS
+            and not has_contextual_reference(question)
+            and stage_fits(ROUTE_STAGE_COSTS[routed_stage])
+        ):
+            status("retrieving", f"Routing straight to {routed_stage.replace('_', ' ')} (resolved similar questions)")
+            routed_response, routed_citations = await run_stage(
+                ROUTE_STAGE_COSTS[routed_stage], run_route_stage(routed_stage), (None, [])
+            )
+            if routed_response and not needs_reformulation(routed_response, routed_citations):
+                record_route(mode, response_mode, question, routed_stage, [])
+                status("drafting", "Composing grounded answer")
+                return finish(routed_response, routed_citations, cur_session, persist_session=False)
+            routed_missed.append(routed_stage)
+            status("retrieving", "Routed stage missed, running the full cascade")
+
         first_pass_settings = progressive_first_pass_settings(retrieval_settings, response_mode)
         if use_cba_deep_hybrid:
             first_pass_settings = dict(first_pass_settings)
@@ -4379,64 +7634,117 @@ def query_app_mode(
             first_pass_label = "Deep hybrid triage (Sonnet)"
         else:
             first_pass_label = "Initial retrieval pass"
-        status("retrieving", first_pass_label)
-        response, citations, new_session = query_knowledge_base(
-            question,
-            runtime_config["kb_id"],
-            first_pass_model_arn,
-            mode,
-            session_id=cur_session,
-            region_name=runtime_config["region"],
-            retrieval_settings=first_pass_settings,
-        )
-        passes_run = 1
-        status("ranking", f"{len(citations)} source matches")
+        q_class = question_class(question, mode)
+        hedge_delay = hedge_delay_for(runtime_config, mode, q_class) if low_latency_triage else None
         single_pass_override = False
-        triage_satisfied = low_latency_triage and not needs_reformulation(response, citations)
 
-        if low_latency_triage and not triage_satisfied:
-            escalate_label = (
-                "Escalating to Opus quality pass"
-                if use_cba_fast_lane
-                else "Escalating to Opus deep-quality pass"
+        async def hedge_escalation():
+            escalated_response, escalated_citations = await answer_from_pool()
+            if not escalated_response:
+                # No answer is no result, so hedged_race falls back to the triage answer.
+                return None
+            return escalated_response, escalated_citations, None
+
+        if hedge_delay is not None:
+            # Hedged first pass: race triage against the primary-model escalation
+            # lane (the same one the unhedged path escalates to) and keep
+            # whichever acceptable answer lands first. Neither lane streams.
+            status("retrieving", f"{first_pass_label}, hedged with primary pass")
+            stage_started = time.monotonic()
+            hedge_winner, hedged = await hedged_race(
+                lambda: query_knowledge_base(
+                    question,
+                    runtime_config["kb_id"],
+                    low_latency_model_arn,
+                    mode,
+                    session_id=cur_session,
+                    region_name=runtime_config["region"],
+                    retrieval_settings=first_pass_settings,
+                    retrieval_query=retrieval_query,
+                ),
+                hedge_escalation,
+                hedge_delay,
+                acceptable=lambda result: not needs_reformulation(result[0], result[1]),
+                timeout=remaining_budget(),
             )
-            status("retrieving", escalate_label)
-            response, citations, new_session = query_knowledge_base(
+            stage_done("first_pass", stage_started)
+            response, citations, _ = hedged or ("", [], None)
+            chunk_pool_state["seed"] = citation_chunks(citations)
+            answer_stage = "first_pass"
+            # On a timeout hedged_race hands back the lead even when it is not acceptable.
+            triage_satisfied = hedge_winner == "lead" and not needs_reformulation(response, citations)
+            record_triage_outcome(mode, q_class, escalated=not triage_satisfied)
+            # Neither lane's session is safe to persist over the prior one.
+            new_session = cur_session
+            passes_run = 1 if triage_satisfied else 2
+            status("ranking", f"{len(citations)} source matches")
+            single_pass_override = True
+        else:
+            status("retrieving", first_pass_label)
+            stage_started = time.monotonic()
+            response, citations, new_session = await query_knowledge_base(
                 question,
                 runtime_config["kb_id"],
-                primary_model_arn,
+                first_pass_model_arn,
                 mode,
                 session_id=cur_session,
                 region_name=runtime_config["region"],
-                retrieval_settings=retrieval_settings,
+                retrieval_settings=first_pass_settings,
+                on_delta=stream_cb,
+                retrieval_query=retrieval_query,
             )
-            passes_run += 1
+            stage_done("first_pass", stage_started)
+            chunk_pool_state["seed"] = citation_chunks(citations)
+            answer_stage = "first_pass"
+            passes_run = 1
             status("ranking", f"{len(citations)} source matches")
+            triage_satisfied = low_latency_triage and not needs_reformulation(response, citations)
+            if low_latency_triage:
+                record_triage_outcome(mode, q_class, escalated=not triage_satisfied)
+
+        attempted_stages = ["first_pass", *routed_missed]
+        # Everything past the first pass yields to other users' first passes.
+        BEDROCK_PRIORITY.set("fallback")
+
+        if low_latency_triage and not triage_satisfied and hedge_delay is None:
+            # Generation-only passes have no Bedrock session, and the triage
+            # session is Sonnet-only; keep the prior one either way.
+            new_session = cur_session
+            if stage_fits("triage_escalation"):
+                escalate_label = (
+                    "Escalating to Opus quality pass"
+                    if use_cba_fast_lane
+                    else "Escalating to Opus deep-quality pass"
+                )
+                status("retrieving", escalate_label)
+                escalated_response, escalated_citations = await run_stage(
+                    "triage_escalation",
+                    answer_from_pool(on_delta=stream_cb),
+                    (None, []),
+                )
+                if escalated_response:
+                    response, citations = escalated_response, escalated_citations
+                    answer_stage = "triage_escalation"
+                attempted_stages.append("triage_escalation")
+                passes_run += 1
+                status("ranking", f"{len(citations)} source matches")
             single_pass_override = True
         elif triage_satisfied:
             single_pass_override = True
 
         if profile.get("single_pass_only") or single_pass_override:
             status("drafting", "Composing fast-path answer")
-            if not stateless_mode:
-                # Avoid persisting a Sonnet-only session when primary lane is Opus.
-                if (not low_latency_triage) or (low_latency_triage and not triage_satisfied):
-                    st.session_state.session_ids[mode] = new_session
-            for citation in citations:
-                citation["source_domain"] = mode
-
-            final_scope = new_session or session_scope
-            final_cache_key = _cache_key(question, mode, response_mode, retrieval_settings, final_scope)
-            _cache_set(
+            accepted = not needs_reformulation(response, citations)
+            record_route(
                 mode,
-                final_cache_key,
-                response,
-                citations,
-                question=question,
-                response_mode=response_mode,
-                retrieval_settings=retrieval_settings,
+                response_mode,
+                question,
+                answer_stage if accepted else None,
+                [stage for stage in attempted_stages if not accepted or stage != answer_stage],
             )
-            return response, citations
+            # Avoid persisting a Sonnet-only session when primary lane is Opus.
+            persist_session = (not low_latency_triage) or (low_latency_triage and not triage_satisfied)
+            return finish(response, citations, new_session, persist_session=persist_session)
 
         needs_followup = needs_reformulation(response, citations)
         first_pass_differs = (
@@ -4444,20 +7752,25 @@ def query_app_mode(
             or first_pass_settings.get("max_sources") != retrieval_settings.get("max_sources")
         )
 
-        if needs_followup and first_pass_differs and (not cba_deep_guardrails or passes_run < 2):
+        if (
+            needs_followup
+            and first_pass_differs
+            and (not cba_deep_guardrails or passes_run < 2)
+            and "depth_escalation" not in attempted_stages
+            and not route_rules_out("depth_escalation")
+            and stage_fits("depth_escalation")
+        ):
             status("retrieving", "Escalating retrieval depth")
-            deep_response, deep_citations, new_session = query_knowledge_base(
-                question,
-                runtime_config["kb_id"],
-                primary_model_arn,
-                mode,
-                session_id=new_session,
-                region_name=runtime_config["region"],
-                retrieval_settings=retrieval_settings,
+            deep_response, deep_citations = await run_stage(
+                "depth_escalation",
+                answer_from_pool(on_delta=stream_cb),
+                (None, []),
             )
             passes_run += 1
+            attempted_stages.append("depth_escalation")
             if better_candidate(response, citations, deep_response, deep_citations):
                 response, citations = deep_response, deep_citations
+                answer_stage = "depth_escalation"
             needs_followup = needs_reformulation(response, citations)
             status("ranking", f"{len(citations)} source matches")
 
@@ -4483,56 +7796,62 @@ def query_app_mode(
 
         expanded_question = question
         run_expanded = False
-        if allow_expanded_retry and needs_followup and (not cba_deep_guardrails or passes_run < 2):
-            expanded_question = expand_query_for_retrieval(question, mode)
-            if expanded_question == question:
-                # Glossary didn't fire — try LLM rewrite for the retry path
-                expanded_question = rewrite_query_for_retrieval(question, mode, runtime_config.get("region"))
-            run_expanded = expanded_question != question
+        if (
+            allow_expanded_retry
+            and needs_followup
+            and (not cba_deep_guardrails or passes_run < 2)
+            and "fallback_expanded" not in attempted_stages
+        ):
+            expanded_question = retrieval_query
+            run_expanded = (
+                normalize_query_text(expanded_question) != normalize_query_text(question)
+                and not route_rules_out("fallback_expanded")
+            )
 
-        run_manual = allow_manual_fallback and needs_followup
+        run_manual = (
+            allow_manual_fallback
+            and needs_followup
+            and "fallback_manual" not in attempted_stages
+            and not route_rules_out("fallback_manual")
+        )
 
-        if run_expanded or run_manual:
+        if (run_expanded or run_manual) and stage_fits("fallback"):
             status("retrieving", "Running fallback retrieval")
-            with ThreadPoolExecutor(max_workers=2) as pool:
-                retry_future = (
-                    pool.submit(
-                        query_knowledge_base,
-                        expanded_question,
-                        runtime_config["kb_id"],
-                        primary_model_arn,
-                        mode,
-                        new_session,
-                        runtime_config["region"],
-                        retrieval_settings,
-                    )
-                    if run_expanded
-                    else None
-                )
-                manual_future = (
-                    pool.submit(
-                        manual_retrieve_and_answer,
-                        question,
-                        runtime_config["kb_id"],
-                        primary_model_arn,
-                        mode,
-                        runtime_config["region"],
-                        retrieval_settings,
-                    )
-                    if run_manual
-                    else None
-                )
+            stage_started = time.monotonic()
 
-                if retry_future:
-                    retry_response, retry_citations, retry_session = retry_future.result()
-                    new_session = retry_session
-                    if better_candidate(response, citations, retry_response, retry_citations):
-                        response, citations = retry_response, retry_citations
+            async def manual_lane():
+                # The pool build runs inside the lane so the fallback deadline bounds it too.
+                return await manual_retrieve_and_answer(
+                    question,
+                    runtime_config["kb_id"],
+                    primary_model_arn,
+                    mode,
+                    runtime_config["region"],
+                    retrieval_settings,
+                    chunk_pool=await shared_chunks(),
+                )
 
-                if manual_future:
-                    manual_response, manual_citations = manual_future.result()
-                    if better_candidate(response, citations, manual_response, manual_citations):
-                        response, citations = manual_response, manual_citations
+            fallback_lanes = {}
+            if run_expanded:
+                fallback_lanes["expanded"] = answer_from_pool(expanded=True)
+            if run_manual:
+                fallback_lanes["manual"] = manual_lane()
+            # The first lane with a grounded answer wins; the rest are abandoned.
+            winner, lane_results = await first_acceptable(
+                fallback_lanes,
+                acceptable=lambda result: bool(result[0]) and not needs_reformulation(result[0], result[1]),
+                timeout=remaining_budget(),
+            )
+            attempted_stages.extend(f"fallback_{lane_name}" for lane_name in lane_results)
+            for lane_name in ("expanded", "manual"):
+                lane_result = lane_results.get(lane_name)
+                if lane_result and better_candidate(response, citations, lane_result[0], lane_result[1]):
+                    response, citations = lane_result
+                    answer_stage = f"fallback_{lane_name}"
+            if winner is None and len(lane_results) < len(fallback_lanes):
+                stage_abandoned("fallback", stage_started)
+            else:
+                stage_done("fallback", stage_started)
 
             needs_followup = needs_reformulation(response, citations)
             status("ranking", f"{len(citations)} source matches")
@@ -4542,76 +7861,87 @@ def query_app_mode(
         # hasn't produced a solid answer, decompose the scenario into
         # individual rule topics, retrieve each, and reason through it.
         if needs_followup and is_hypothetical_question(question):
-            status("retrieving", "Scenario detected — decomposing into rule topics")
-            hypo_response, hypo_citations = hypothetical_retrieve_and_answer(
-                question,
-                runtime_config["kb_id"],
-                primary_model_arn,
-                mode,
-                runtime_config["region"],
-                retrieval_settings,
-                status_cb=status_cb,
-            )
-            if hypo_response and hypo_citations:
-                if better_candidate(response, citations, hypo_response, hypo_citations):
-                    response, citations = hypo_response, hypo_citations
-                    needs_followup = needs_reformulation(response, citations)
+            if "hypothetical" in attempted_stages or route_rules_out("hypothetical"):
+                pass
+            elif stage_fits("hypothetical"):
+                status("retrieving", "Scenario detected — decomposing into rule topics")
+                hypo_response, hypo_citations = await run_stage(
+                    "hypothetical",
+                    hypothetical_retrieve_and_answer(
+                        question,
+                        runtime_config["kb_id"],
+                        primary_model_arn,
+                        mode,
+                        runtime_config["region"],
+                        retrieval_settings,
+                        status_cb=status_cb,
+                        on_delta=stream_cb,
+                    ),
+                    (None, []),
+                )
+                attempted_stages.append("hypothetical")
+                if hypo_response and hypo_citations:
+                    if better_candidate(response, citations, hypo_response, hypo_citations):
+                        response, citations = hypo_response, hypo_citations
+                        answer_stage = "hypothetical"
+                        needs_followup = needs_reformulation(response, citations)
         # If the question is hypothetical but standard retrieval already
         # succeeded, still check if hypothetical reasoning would be richer.
-        elif not needs_followup and is_hypothetical_question(question) and len(citations) <= 2:
+        elif (
+            not needs_followup
+            and is_hypothetical_question(question)
+            and len(citations) <= 2
+            and "hypothetical" not in attempted_stages
+            and stage_fits("hypothetical")
+        ):
             status("retrieving", "Enriching scenario with additional rule lookups")
-            hypo_response, hypo_citations = hypothetical_retrieve_and_answer(
-                question,
-                runtime_config["kb_id"],
-                primary_model_arn,
-                mode,
-                runtime_config["region"],
-                retrieval_settings,
-                status_cb=status_cb,
+            hypo_response, hypo_citations = await run_stage(
+                "hypothetical",
+                hypothetical_retrieve_and_answer(
+                    question,
+                    runtime_config["kb_id"],
+                    primary_model_arn,
+                    mode,
+                    runtime_config["region"],
+                    retrieval_settings,
+                    status_cb=status_cb,
+                ),
+                (None, []),
             )
             if hypo_response and hypo_citations and len(hypo_citations) > len(citations):
                 response, citations = hypo_response, hypo_citations
+                answer_stage = "hypothetical"
 
         # ── Unknown-term definitional fallback ──────────────────────────
         # If retrieval still hasn't produced a grounded answer, the question
         # may contain a slang term, nickname, or informal concept the glossary
         # doesn't cover. Use an LLM to generate a definitional expansion of
         # the unfamiliar term in formal CBA/Rulebook language, then re-retrieve.
-        if needs_reformulation(response, citations):
+        if (
+            needs_reformulation(response, citations)
+            and "definitional" not in attempted_stages
+            and not route_rules_out("definitional")
+            and stage_fits("definitional")
+        ):
             status("retrieving", "Expanding unfamiliar term definition")
-            defined_query = define_unknown_term(question, mode, runtime_config.get("region"))
-            if defined_query != question:
-                status("retrieving", "Re-searching with definitional context")
-                def_response, def_citations, _ = query_knowledge_base(
-                    defined_query,
-                    runtime_config["kb_id"],
-                    primary_model_arn,
-                    mode,
-                    session_id=None,  # fresh session to avoid contamination
-                    region_name=runtime_config["region"],
-                    retrieval_settings=retrieval_settings,
-                )
+            definitional = await run_stage("definitional", definitional_pass(), None)
+            attempted_stages.append("definitional")
+            if definitional:
+                def_response, def_citations, _ = definitional
                 if def_response and def_citations and better_candidate(response, citations, def_response, def_citations):
                     response, citations = def_response, def_citations
+                    answer_stage = "definitional"
 
         status("drafting", "Composing grounded answer")
-        if not stateless_mode:
-            st.session_state.session_ids[mode] = new_session
-        for citation in citations:
-            citation["source_domain"] = mode
-
-        final_scope = new_session or session_scope
-        final_cache_key = _cache_key(question, mode, response_mode, retrieval_settings, final_scope)
-        _cache_set(
+        accepted = not needs_reformulation(response, citations)
+        record_route(
             mode,
-            final_cache_key,
-            response,
-            citations,
-            question=question,
-            response_mode=response_mode,
-            retrieval_settings=retrieval_settings,
+            response_mode,
+            question,
+            answer_stage if accepted else None,
+            [stage for stage in attempted_stages if not accepted or stage != answer_stage],
         )
-        return response, citations
+        return finish(response, citations, new_session)
 
     rulebook_config = get_mode_runtime_config("rulebook")
     cba_config = get_mode_runtime_config("cba")
@@ -4622,20 +7952,47 @@ def query_app_mode(
     cross_cached = _cache_get("both", cross_cache_key)
     if cross_cached:
         cached_response, cached_citations = cross_cached
+        trace["cache_tier"] = "session"
         status("finalizing", "Loaded crossbook answer from cache")
         return cached_response, cached_citations
 
     cross_similar = _cache_get_similar("both", question, response_mode, retrieval_settings)
     if cross_similar:
-        cached_response, cached_citations, matched_question = cross_similar
+        cached_response, cached_citations, matched_question, trace["cache_match"] = cross_similar
+        trace["cache_tier"] = "session"
         status("finalizing", f"Loaded crossbook answer from similar prior question: {matched_question[:56]}")
         return cached_response, cached_citations
 
+    cross_kb_id = f"{rulebook_config['kb_id']}+{cba_config['kb_id']}"
+    cross_shared_key = _shared_answer_key(
+        question,
+        "both",
+        response_mode,
+        retrieval_settings,
+        f"{rulebook_config['model_arn']}+{cba_config['model_arn']}",
+    )
+    if not has_contextual_reference(question):
+        shared_cached = _shared_answer_get("both", cross_kb_id, cross_shared_key)
+        if shared_cached:
+            cached_response, cached_citations = shared_cached
+            _cache_set(
+                "both",
+                cross_cache_key,
+                cached_response,
+                cached_citations,
+                question=question,
+                response_mode=response_mode,
+                retrieval_settings=retrieval_settings,
+            )
+            trace["cache_tier"] = "shared"
+            status("finalizing", "Loaded crossbook answer from shared cache")
+            return cached_response, cached_citations
+
     status("retrieving", "Querying Rulebook and CBA in parallel")
     first_pass_settings = progressive_first_pass_settings(retrieval_settings, response_mode)
-    with ThreadPoolExecutor(max_workers=2) as pool:
-        rb_future = pool.submit(
-            query_knowledge_base,
+    stage_started = time.monotonic()
+    (rb_response, rb_citations, rb_session), (cba_response, cba_citations, cba_session) = await asyncio.gather(
+        query_knowledge_base(
             question,
             rulebook_config["kb_id"],
             rulebook_config["model_arn"],
@@ -4643,9 +8000,8 @@ def query_app_mode(
             st.session_state.session_ids.get("both_rulebook"),
             rulebook_config["region"],
             first_pass_settings,
-        )
-        cba_future = pool.submit(
-            query_knowledge_base,
+        ),
+        query_knowledge_base(
             question,
             cba_config["kb_id"],
             cba_config["model_arn"],
@@ -4653,9 +8009,10 @@ def query_app_mode(
             st.session_state.session_ids.get("both_cba"),
             cba_config["region"],
             first_pass_settings,
-        )
-        rb_response, rb_citations, rb_session = rb_future.result()
-        cba_response, cba_citations, cba_session = cba_future.result()
+        ),
+    )
+    stage_done("first_pass", stage_started)
+    BEDROCK_PRIORITY.set("fallback")
 
     first_pass_differs = (
         first_pass_settings.get("number_of_results") != retrieval_settings.get("number_of_results")
@@ -4664,45 +8021,45 @@ def query_app_mode(
     rb_weak = needs_reformulation(rb_response, rb_citations)
     cba_weak = needs_reformulation(cba_response, cba_citations)
 
-    if first_pass_differs and (rb_weak or cba_weak):
+    if first_pass_differs and (rb_weak or cba_weak) and stage_fits("lane_escalation"):
         status("retrieving", "Escalating weak lane retrieval")
-        with ThreadPoolExecutor(max_workers=2) as pool:
-            rb_retry_future = (
-                pool.submit(
-                    query_knowledge_base,
-                    question,
-                    rulebook_config["kb_id"],
-                    rulebook_config["model_arn"],
-                    "rulebook",
-                    rb_session,
-                    rulebook_config["region"],
-                    retrieval_settings,
-                )
-                if rb_weak
-                else None
+        stage_started = time.monotonic()
+        retry_lanes = {}
+        if rb_weak:
+            retry_lanes["rulebook"] = query_knowledge_base(
+                question,
+                rulebook_config["kb_id"],
+                rulebook_config["model_arn"],
+                "rulebook",
+                rb_session,
+                rulebook_config["region"],
+                retrieval_settings,
             )
-            cba_retry_future = (
-                pool.submit(
-                    query_knowledge_base,
-                    question,
-                    cba_config["kb_id"],
-                    cba_config["model_arn"],
-                    "cba",
-                    cba_session,
-                    cba_config["region"],
-                    retrieval_settings,
-                )
-                if cba_weak
-                else None
+        if cba_weak:
+            retry_lanes["cba"] = query_knowledge_base(
+                question,
+                cba_config["kb_id"],
+                cba_config["model_arn"],
+                "cba",
+                cba_session,
+                cba_config["region"],
+                retrieval_settings,
             )
-            if rb_retry_future:
-                rb_new_response, rb_new_citations, rb_session = rb_retry_future.result()
-                if better_candidate(rb_response, rb_citations, rb_new_response, rb_new_citations):
-                    rb_response, rb_citations = rb_new_response, rb_new_citations
-            if cba_retry_future:
-                cba_new_response, cba_new_citations, cba_session = cba_retry_future.result()
-                if better_candidate(cba_response, cba_citations, cba_new_response, cba_new_citations):
-                    cba_response, cba_citations = cba_new_response, cba_new_citations
+        # Both books are needed, so collect every lane but stop waiting at the deadline.
+        _, retry_results = await first_acceptable(retry_lanes, timeout=remaining_budget())
+        if retry_results.get("rulebook"):
+            rb_new_response, rb_new_citations, rb_new_session = retry_results["rulebook"]
+            if rb_new_response:
+                rb_session = rb_new_session
+            if better_candidate(rb_response, rb_citations, rb_new_response, rb_new_citations):
+                rb_response, rb_citations = rb_new_response, rb_new_citations
+        if retry_results.get("cba"):
+            cba_new_response, cba_new_citations, cba_new_session = retry_results["cba"]
+            if cba_new_response:
+                cba_session = cba_new_session
+            if better_candidate(cba_response, cba_citations, cba_new_response, cba_new_citations):
+                cba_response, cba_citations = cba_new_response, cba_new_citations
+        stage_done("lane_escalation", stage_started)
 
     status("ranking", f"{len(rb_citations) + len(cba_citations)} combined source matches")
 
@@ -4712,43 +8069,38 @@ def query_app_mode(
     if is_hypothetical_question(question):
         rb_still_weak = needs_reformulation(rb_response, rb_citations)
         cba_still_weak = needs_reformulation(cba_response, cba_citations)
-        if rb_still_weak or cba_still_weak:
+        if (rb_still_weak or cba_still_weak) and stage_fits("hypothetical"):
             status("retrieving", "Scenario detected — decomposing for weak lane(s)")
-            with ThreadPoolExecutor(max_workers=2) as pool:
-                rb_hypo_future = (
-                    pool.submit(
-                        hypothetical_retrieve_and_answer,
-                        question,
-                        rulebook_config["kb_id"],
-                        rulebook_config["model_arn"],
-                        "rulebook",
-                        rulebook_config["region"],
-                        retrieval_settings,
-                    )
-                    if rb_still_weak
-                    else None
+            stage_started = time.monotonic()
+            hypo_lanes = {}
+            if rb_still_weak:
+                hypo_lanes["rulebook"] = hypothetical_retrieve_and_answer(
+                    question,
+                    rulebook_config["kb_id"],
+                    rulebook_config["model_arn"],
+                    "rulebook",
+                    rulebook_config["region"],
+                    retrieval_settings,
                 )
-                cba_hypo_future = (
-                    pool.submit(
-                        hypothetical_retrieve_and_answer,
-                        question,
-                        cba_config["kb_id"],
-                        cba_config["model_arn"],
-                        "cba",
-                        cba_config["region"],
-                        retrieval_settings,
-                    )
-                    if cba_still_weak
-                    else None
+            if cba_still_weak:
+                hypo_lanes["cba"] = hypothetical_retrieve_and_answer(
+                    question,
+                    cba_config["kb_id"],
+                    cba_config["model_arn"],
+                    "cba",
+                    cba_config["region"],
+                    retrieval_settings,
                 )
-                if rb_hypo_future:
-                    hypo_rb_resp, hypo_rb_cits = rb_hypo_future.result()
-                    if hypo_rb_resp and hypo_rb_cits and better_candidate(rb_response, rb_citations, hypo_rb_resp, hypo_rb_cits):
-                        rb_response, rb_citations = hypo_rb_resp, hypo_rb_cits
-                if cba_hypo_future:
-                    hypo_cba_resp, hypo_cba_cits = cba_hypo_future.result()
-                    if hypo_cba_resp and hypo_cba_cits and better_candidate(cba_response, cba_citations, hypo_cba_resp, hypo_cba_cits):
-                        cba_response, cba_citations = hypo_cba_resp, hypo_cba_cits
+            _, hypo_results = await first_acceptable(hypo_lanes, timeout=remaining_budget())
+            if hypo_results.get("rulebook"):
+                hypo_rb_resp, hypo_rb_cits = hypo_results["rulebook"]
+                if hypo_rb_resp and hypo_rb_cits and better_candidate(rb_response, rb_citations, hypo_rb_resp, hypo_rb_cits):
+                    rb_response, rb_citations = hypo_rb_resp, hypo_rb_cits
+            if hypo_results.get("cba"):
+                hypo_cba_resp, hypo_cba_cits = hypo_results["cba"]
+                if hypo_cba_resp and hypo_cba_cits and better_candidate(cba_response, cba_citations, hypo_cba_resp, hypo_cba_cits):
+                    cba_response, cba_citations = hypo_cba_resp, hypo_cba_cits
+            stage_done("hypothetical", stage_started)
             status("ranking", f"{len(rb_citations) + len(cba_citations)} combined source matches (after scenario)")
 
     st.session_state.session_ids["both_rulebook"] = rb_session
@@ -4773,9 +8125,51 @@ def query_app_mode(
         response_mode=response_mode,
         retrieval_settings=retrieval_settings,
     )
+    _shared_answer_set(
+        "both",
+        cross_kb_id,
+        cross_shared_key,
+        question,
+        combined,
+        merged_citations,
+        model_arn=f"{rulebook_config['model_arn']}+{cba_config['model_arn']}",
+        signature=retrieval_signature(response_mode, retrieval_settings),
+    )
     return combined, merged_citations
 
 
+def query_app_mode(
+    question: str,
+    mode: str,
+    runtime_config: dict,
+    retrieval_settings: dict,
+    response_mode: str = "balanced",
+    status_cb=None,
+    stream_cb=None,
+    trace: dict = None,
+):
+    """Synchronous adapter for the Streamlit script thread over query_app_mode_async."""
+    if trace is None:
+        trace = {}
+    started = time.monotonic()
+    result = asyncio.run(
+        query_app_mode_async(
+            question,
+            mode,
+            runtime_config,
+            retrieval_settings,
+            response_mode=response_mode,
+            status_cb=status_cb,
+            stream_cb=stream_cb,
+            trace=trace,
+        )
+    )
+    # Uncached answer latency is what each answer-cache hit is credited with saving.
+    if not trace.get("cache_tier"):
+        record_stage_latency(mode, "answer", time.monotonic() - started)
+    return result
+
+
 # ─────────────────────────────────────────────
 # QUIZ HELPERS
 # ─────────────────────────────────────────────
@@ -4836,23 +8230,17 @@ def generate_quiz_question(mode: str, topic: str, kb_id: str, quiz_model_id: str
 
     # ── Step 1: retrieve a larger pool then randomly sample ──────────────────
     try:
-        retrieval_resp = rag_client.retrieve(
-            knowledgeBaseId=kb_id,
-            retrievalQuery={"text": retrieval_query},
-            retrievalConfiguration={"vectorSearchConfiguration": {"numberOfResults": 10}},
-        )
+        retrieved = retrieve_cached(rag_client, kb_id, retrieval_query, {"numberOfResults": 10})
         all_chunks = []
         seen_chunks = set()
-        for result in retrieval_resp.get("retrievalResults", []):
-            chunk_text = result.get("content", {}).get("text", "").strip()
-            if not chunk_text:
-                continue
+        for chunk in retrieved:
+            chunk_text = chunk["content"]
             fingerprint = chunk_text[:180]
             if fingerprint in seen_chunks:
                 continue
             seen_chunks.add(fingerprint)
 
-            metadata = result.get("metadata", {})
+            metadata = chunk["metadata"]
             location_parts = [
                 f"{label.title()} {metadata[label]}"
                 for label in ["rule", "section", "article", "part", "page"]
@@ -4917,7 +8305,10 @@ ANSWER: [A, B, C, or D]
 EXPLANATION: [one or two sentences citing the specific rule, article, or section that proves the answer]"""
 
     try:
-        response = runtime_client.invoke_model(
+        response = bedrock_call(
+            "invoke_model",
+            runtime_client.invoke_model,
+            model_id=quiz_model_id,
             modelId=quiz_model_id,
             contentType="application/json",
             accept="application/json",
@@ -4999,26 +8390,20 @@ def _build_complex_sample_from_sources(mode: str, quiz_model_id: str, region_nam
     theme_hint = _random.choice(COMPLEX_SAMPLE_THEMES.get(mode) or [fallback])
 
     try:
-        retrieval_resp = rag_client.retrieve(
-            knowledgeBaseId=kb_id,
-            retrievalQuery={"text": theme_hint},
-            retrievalConfiguration={"vectorSearchConfiguration": {"numberOfResults": 8}},
-        )
+        retrieved = retrieve_cached(rag_client, kb_id, theme_hint, {"numberOfResults": 8})
     except Exception:
         return fallback
 
     excerpts = []
     seen = set()
-    for result in retrieval_resp.get("retrievalResults", []):
-        chunk_text = result.get("content", {}).get("text", "").strip()
-        if not chunk_text:
-            continue
+    for chunk in retrieved:
+        chunk_text = chunk["content"]
         fingerprint = chunk_text[:180]
         if fingerprint in seen:
             continue
         seen.add(fingerprint)
 
-        metadata = result.get("metadata", {})
+        metadata = chunk["metadata"]
         location_parts = [
             f"{label.title()} {metadata[label]}"
             for label in ["rule", "section", "article", "part", "page"]
@@ -5051,7 +8436,10 @@ Requirements:
 """
 
     try:
-        response = runtime_client.invoke_model(
+        response = bedrock_call(
+            "invoke_model",
+            runtime_client.invoke_model,
+            model_id=quiz_model_id,
             modelId=quiz_model_id,
             contentType="application/json",
             accept="application/json",
@@ -5071,7 +8459,8 @@ Requirements:
 def generate_sample_question(mode: str, quiz_model_id: str, region_name: str, complexity: str = "quick") -> str:
     fallback = _quick_sample_fallback(mode)
     if complexity == "complex":
-        return _build_complex_sample_from_sources(mode, quiz_model_id, region_name, fallback)
+        with bedrock_priority("background"):
+            return _build_complex_sample_from_sources(mode, quiz_model_id, region_name, fallback)
     return fallback
 
 
@@ -5123,6 +8512,10 @@ def render_system_shell(current_mode: str, active_response_mode: str, current_me
     theme = THEMES[current_mode]
     q_count = sum(1 for msg in current_messages if msg.get("role") == "user")
     cache_count = len(_cache_store(current_mode))
+    hit_rate = cache_hit_rate("session", current_mode)
+    cache_label = (
+        f"CACHE {cache_count} · {hit_rate:.0%} HIT ALL USERS" if hit_rate is not None else f"CACHE {cache_count}"
+    )
 
     st.markdown(
         f"""
@@ -5132,7 +8525,7 @@ def render_system_shell(current_mode: str, active_response_mode: str, current_me
             <div class="sys-metrics">
                 <span>QUESTIONS {q_count}</span>
                 <span>ANSWERS {len(assistant_history)}</span>
-                <span>CACHE {cache_count}</span>
+                <span>{cache_label}</span>
             </div>
         </div>
         """,
@@ -5229,6 +8622,125 @@ def export_chat(messages: list, mode: str, export_format: str = "Transcript") ->
     return "\n".join(lines)
 
 
+# ─────────────────────────────────────────────
+# ADMIN PANEL
+# ─────────────────────────────────────────────
+def admin_panel_enabled() -> bool:
+    """The panel resets process-wide state, so it stays hidden unless configured on."""
+    configured = _section_get(_secret_section("admin"), "enabled")
+    if configured is None:
+        configured = os.getenv("ADMIN_PANEL", "false")
+    return str(configured).strip().lower() in ("1", "true", "on", "yes")
+
+
+def render_admin_panel():
+    """Process-wide runtime stats for sizing the app against Bedrock quotas."""
+    pool = fanout_stats()
+    st.markdown("**Bedrock fan-out pool**")
+    st.caption(
+        f"{pool['running']}/{pool['max_workers']} workers busy · "
+        f"queue depth {pool['queue_depth']} (peak {pool['peak_queue_depth']}) · "
+        f"avg wait {pool['wait_seconds_avg'] * 1000:.0f} ms (max {pool['wait_seconds_max'] * 1000:.0f} ms) · "
+        f"{pool['completed']} tasks completed"
+    )
+    warmup = start_bedrock_warmup()
+    st.markdown("**Bedrock clients**")
+    if warmup is None:
+        warmup_label = "warm-up disabled"
+    elif warmup["finished_at"]:
+        warmup_label = f"warmed in {warmup['finished_at'] - warmup['started_at']:.1f} s"
+    else:
+        warmup_label = "warm-up running"
+    st.caption(
+        f"{get_bedrock_pool_connections()} pooled connections per client · "
+        f"standard retries for retrieve/generate, adaptive for control · {warmup_label}"
+    )
+    limits = rate_limiter_stats()
+    st.markdown("**Bedrock rate limits**")
+    st.caption(
+        f"{limits['granted']} calls granted · {limits['waiting']} waiting · "
+        f"{limits['throttles']} throttles · {limits['timeouts']} client-side timeouts"
+    )
+    for name, bucket in sorted(limits["buckets"].items()):
+        st.caption(
+            f"{name}: {bucket['in_flight']}/{bucket['limit']} in flight (max {bucket['max_limit']}) · "
+            f"{bucket['rate']}/{bucket['base_rate']} req/s"
+            + (" · throttled, fallback stages using it stand down" if bucket["cooling_down"] else "")
+        )
+    breakers = breaker_snapshot()
+    if breakers:
+        st.markdown("**Circuit breakers**")
+        for breaker in sorted(breakers, key=lambda row: (row["kb_id"] or "", row["model_arn"] or "")):
+            st.caption(
+                f"{breaker['kb_id']} · {str(breaker['model_arn']).rsplit('/', 1)[-1]}: "
+                f"{breaker['state'].replace('_', '-')} · {breaker['failures']} consecutive failures · "
+                f"{breaker['trips']} trips"
+            )
+    shared = _shared_answer_cache()
+    with shared["lock"]:
+        entry_count = len(shared["lru"])
+        used_bytes = shared["bytes"]
+    st.markdown("**Shared answer cache**")
+    st.caption(
+        f"{entry_count} answers · {used_bytes / 1024:.0f} KB of "
+        f"{SHARED_ANSWER_CACHE_MAX_BYTES / (1024 * 1024):.0f} MB"
+    )
+    st.markdown("**Cache tiers**")
+    measure_held = st.toggle(
+        "Measure entries and bytes held",
+        value=False,
+        key="admin_measure_cache_held",
+        help="Walks every cache tier and the SQLite file; leave off unless you need sizes.",
+    )
+    stats = cache_stats_snapshot(include_held=measure_held)
+    if stats:
+        st.dataframe(
+            [
+                {
+                    "Tier": row["tier"],
+                    "Mode": row["mode"],
+                    "Hits": row["exact_hits"],
+                    "Similar": row["similar_hits"],
+                    "Misses": row["misses"],
+                    "Hit rate": f"{row['hit_rate']:.0%}" if row["hit_rate"] is not None else "—",
+                    "Evicted": row["evictions"] + row["invalidations"],
+                    "Entries": row["entries"] if measure_held else "—",
+                    "KB": round(row["bytes"] / 1024, 1) if measure_held else "—",
+                    "Avg saved (ms)": row["avg_saved_ms"] if row["avg_saved_ms"] is not None else "—",
+                }
+                for row in stats
+            ],
+            use_container_width=True,
+            hide_index=True,
+        )
+    else:
+        st.caption("No cache activity yet.")
+    st.download_button(
+        "Export cache stats (JSON)",
+        data=json.dumps({"generated_at": datetime.now().isoformat(), "tiers": stats}, indent=2),
+        file_name="cache_stats.json",
+        mime="application/json",
+        use_container_width=True,
+    )
+    st.markdown("**Knowledge base versions**")
+    for mode in ("rulebook", "cba"):
+        version = kb_content_version(mode_kb_id(mode))
+        st.caption(f"{THEMES[mode]['name']}: {version or 'unknown'}")
+    st.markdown("**Bedrock feature support**")
+    support = feature_support_snapshot()
+    for (region, kb_id, model_arn), features in sorted(support.items(), key=lambda item: str(item[0])):
+        unsupported = [feature for feature, supported in features.items() if supported is False]
+        st.caption(
+            f"{kb_id} · {str(model_arn).rsplit('/', 1)[-1]} ({region or 'default region'}): "
+            + (f"unsupported {', '.join(unsupported)}" if unsupported else "all requested fields accepted")
+        )
+    if not support:
+        st.caption("Nothing recorded yet.")
+    if st.button("Reset feature support", key="reset_feature_support", use_container_width=True):
+        reset_feature_support()
+        st.rerun()
+
+
 # ─────────────────────────────────────────────
 # MAIN
 # ─────────────────────────────────────────────
@@ -5237,8 +8749,8 @@ def main():
     current_messages = get_messages(current_mode)
     assistant_history = [msg for msg in current_messages if msg.get("role") == "assistant"]
     runtime_config = get_mode_runtime_config(current_mode)
-    # Warm client initialization on page render to reduce first-query cold-start delay.
-    get_bedrock_client("bedrock-agent-runtime", runtime_config["region"])
+    # Open Bedrock connections once per process to reduce first-query cold-start delay.
+    start_bedrock_warmup(runtime_config["region"])
     retrieval_settings = get_retrieval_settings(current_mode)
     theme = THEMES[current_mode]
     kb_id = runtime_config["kb_id"]
@@ -5338,6 +8850,11 @@ def main():
             if st.button("Clear current mode history", key=f"clear_mode_{current_mode}", use_container_width=True):
                 clear_mode_state(current_mode)
                 st.rerun()
+            st.session_state.stream_answers = st.toggle(
+                "Stream answers as they are written",
+                value=st.session_state.stream_answers,
+                key="stream_answers_toggle",
+            )
             st.session_state.export_format = st.selectbox(
                 "Export style",
                 EXPORT_FORMATS,
@@ -5357,6 +8874,10 @@ def main():
         with lib_right:
             render_sidebar_bookmarks(current_mode)
 
+    if admin_panel_enabled():
+        with st.expander("Admin", expanded=False):
+            render_admin_panel()
+
     # ──────────────────────────────────────────
     # HEADER
     # ──────────────────────────────────────────
@@ -5437,7 +8958,7 @@ def main():
 
             if st.button("🎲 Generate Question", use_container_width=True, key="gen_quiz"):
                 reset_quiz_state(current_mode)
-                with st.spinner("Generating quiz question…"):
+                with st.spinner("Generating quiz question…"), bedrock_priority("background"):
                     raw_resp, _, _ = generate_quiz_question(
                         current_mode,
                         topic,
@@ -5593,6 +9114,8 @@ def main():
         st.session_state.pending_prompt_meta[current_mode] = None
 
     if prompt:
+        if not queued_action:
+            record_semantic_reask(current_mode, current_messages, prompt)
         if not already_logged_user_msg:
             ts = datetime.now().strftime("%b %d, %I:%M %p")
 
@@ -5680,8 +9203,43 @@ def main():
                 request_settings["reranker_model_arn"] = runtime_config["reranker_model_arn"]
             if runtime_config.get("reranker_results"):
                 request_settings["reranker_results"] = runtime_config["reranker_results"]
+            query_trace = {}
+
             def set_stage(stage: str, detail: str = ""):
-                status_timeline.markdown(build_status_timeline_html(stage, detail), unsafe_allow_html=True)
+                status_timeline.markdown(
+                    build_status_timeline_html(stage, detail, notice=breaker_notice(query_trace.get("breaker"))),
+                    unsafe_allow_html=True,
+                )
+
+            # ── Live answer bubble fed by streamed deltas ──
+            stream_placeholder = st.empty()
+            stream_state = {"text": "", "sources": 0, "rendered_at": 0.0}
+
+            def on_stream(event: str, payload=None):
+                if event == "reset":
+                    stream_state["text"] = ""
+                    stream_state["sources"] = 0
+                    stream_placeholder.empty()
+                    return
+                if event == "text":
+                    if not stream_state["text"]:
+                        loading_placeholder.empty()
+                    stream_state["text"] += payload
+                elif event == "citations":
+                    stream_state["sources"] = len(payload or [])
+                now = time.perf_counter()
+                if not stream_state["text"] or now - stream_state["rendered_at"] < 0.05:
+                    return
+                stream_state["rendered_at"] = now
+                sources_note = (
+                    f'<div class="relevance-note">{stream_state["sources"]} sources found so far</div>'
+                    if stream_state["sources"]
+                    else ""
+                )
+                stream_placeholder.markdown(
+                    f'<div class="answer-card"><div class="answer-section">{html_safe(stream_state["text"])}</div>{sources_note}</div>',
+                    unsafe_allow_html=True,
+                )
 
             load_started = time.perf_counter()
             response, citations = query_app_mode(
@@ -5691,6 +9249,8 @@ def main():
                 request_settings,
                 response_mode=active_response_mode,
                 status_cb=set_stage,
+                stream_cb=on_stream if st.session_state.stream_answers else None,
+                trace=query_trace,
             )
             elapsed = time.perf_counter() - load_started
             min_display_seconds = loading_state.get("min_display_seconds", 0.0)
@@ -5700,8 +9260,9 @@ def main():
                 response = enforce_three_bullet_response(response, citations, current_mode)
             set_stage("finalizing", "Rendering response")
 
-            # Swap loading card for the actual response
+            # Swap loading card (or live stream) for the actual response
             loading_placeholder.empty()
+            stream_placeholder.empty()
             status_placeholder.empty()
             status_timeline.empty()
 
@@ -5720,6 +9281,10 @@ def main():
                 "citations": citations,
                 "timestamp": resp_ts,
                 "cross_mode": cross,
+                "skipped_stages": query_trace.get("stages_skipped", []),
+                "throttled_stages": query_trace.get("stages_throttled", []),
+                "breaker_notice": breaker_notice(query_trace.get("breaker")),
+                "cache_match": query_trace.get("cache_match"),
             }
             render_assistant_message(response_msg, current_mode)
 
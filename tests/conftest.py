@@ -0,0 +1,31 @@
+"""Import app.py outside `streamlit run` for unit tests.
+
+Session state and secrets only exist inside a script run, so they are
+replaced with plain containers before the module is imported. The
+persistent cache is disabled; tests that need it open their own file.
+"""
+import os
+import sys
+
+import streamlit as st
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ["BEDROCK_CACHE_PATH"] = ""
+
+
+class _SessionState(dict):
+    def __getattr__(self, name):
+        try:
+            return self[name]
+        except KeyError as exc:
+            raise AttributeError(name) from exc
+
+    def __setattr__(self, name, value):
+        self[name] = value
+
+    def __delattr__(self, name):
+        self.pop(name, None)
+
+
+st.session_state = _SessionState()
+st.secrets = {}
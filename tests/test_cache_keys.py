@@ -0,0 +1,37 @@
+import app
+
+SETTINGS = {"number_of_results": 8, "max_sources": 4, "strict_grounding": True}
+
+
+def key(question, mode="cba", scope="shared"):
+    return app._cache_key(question, mode, "balanced", SETTINGS, scope)
+
+
+def test_canonical_text_drops_filler_and_folds_glossary_aliases():
+    assert app.canonical_query_text("What is the 2nd apron?", "cba") == "what 2nd_apron"
+    assert key("What is the 2nd apron?") == key("What is the tax level 2?")
+    assert key("What is the 2nd apron?") == key("what is the 2nd apron")
+
+
+def test_canonical_text_keeps_answer_changing_words():
+    assert key("Can a team trade a player to the Lakers?") != key("Can a team trade a player from the Lakers?")
+    assert key("Is a player eligible to be traded?") != key("Is a player not eligible to be traded?")
+    assert key("Can a team sign a player?") != key("Should a team sign a player?")
+
+
+def test_canonical_text_keeps_word_order():
+    assert key("Can the Celtics trade the Knicks a pick?") != key("Can the Knicks trade the Celtics a pick?")
+    assert app.canonical_query_text("knicks trade celtics", "cba").split() == ["knicks", "trade", "celtics"]
+
+
+def test_cache_key_separates_settings_and_session_scope():
+    assert key("What is the 2nd apron?", scope="shared") != key("What is the 2nd apron?", scope="session-1")
+    assert key("What is the 2nd apron?", mode="cba") != key("What is the 2nd apron?", mode="both")
+    loose = dict(SETTINGS, strict_grounding=False)
+    assert key("What is the 2nd apron?") != app._cache_key("What is the 2nd apron?", "cba", "balanced", loose, "shared")
+
+
+def test_shared_answer_key_depends_on_model():
+    first = app._shared_answer_key("What is the 2nd apron?", "cba", "balanced", SETTINGS, "model-a")
+    second = app._shared_answer_key("What is the 2nd apron?", "cba", "balanced", SETTINGS, "model-b")
+    assert first != second
@@ -0,0 +1,146 @@
+import asyncio
+
+import pytest
+from botocore.exceptions import ClientError, EndpointConnectionError
+
+import app
+
+KB = "KB00000001"
+PRIMARY = "arn:aws:bedrock:us-east-1::foundation-model/primary"
+FALLBACK = "arn:aws:bedrock:us-east-1::foundation-model/fallback"
+
+
+@pytest.fixture(autouse=True)
+def fresh_breakers(monkeypatch):
+    monkeypatch.setenv("BEDROCK_BREAKER_FAILURES", "3")
+    monkeypatch.setenv("BEDROCK_BREAKER_OPEN_SECONDS", "30")
+    store = app._circuit_breakers()
+    with store["lock"]:
+        store["breakers"].clear()
+    yield store
+
+
+def trip(model_arn=PRIMARY):
+    for _ in range(3):
+        app.record_breaker_outcome(KB, model_arn, ok=False)
+
+
+def cool_down(store, model_arn=PRIMARY):
+    store["breakers"][(KB, model_arn)]["opened_at"] -= 31
+
+
+def client_error(code, status=400):
+    return ClientError(
+        {"Error": {"Code": code, "Message": ""}, "ResponseMetadata": {"HTTPStatusCode": status}}, "Retrieve"
+    )
+
+
+def test_opens_after_consecutive_failures():
+    for _ in range(2):
+        app.record_breaker_outcome(KB, PRIMARY, ok=False)
+    assert app.breaker_state(KB, PRIMARY) == "closed"
+    app.record_breaker_outcome(KB, PRIMARY, ok=False)
+    assert app.breaker_state(KB, PRIMARY) == "open"
+    assert not app.breaker_allows(KB, PRIMARY)
+
+
+def test_success_resets_the_failure_count():
+    for _ in range(2):
+        app.record_breaker_outcome(KB, PRIMARY, ok=False)
+    app.record_breaker_outcome(KB, PRIMARY, ok=True)
+    app.record_breaker_outcome(KB, PRIMARY, ok=False)
+    assert app.breaker_state(KB, PRIMARY) == "closed"
+
+
+def test_half_open_admits_one_probe(fresh_breakers):
+    trip()
+    cool_down(fresh_breakers)
+    assert app.breaker_state(KB, PRIMARY) == "half_open"
+    assert app.breaker_allows(KB, PRIMARY, claim=False)
+    assert app.breaker_allows(KB, PRIMARY)
+    assert not app.breaker_allows(KB, PRIMARY)
+
+
+def test_probe_success_closes_and_failure_reopens(fresh_breakers):
+    trip()
+    cool_down(fresh_breakers)
+    assert app.breaker_allows(KB, PRIMARY)
+    app.record_breaker_outcome(KB, PRIMARY, ok=False)
+    assert app.breaker_state(KB, PRIMARY) == "open"
+    assert fresh_breakers["breakers"][(KB, PRIMARY)]["trips"] == 1
+
+    cool_down(fresh_breakers)
+    assert app.breaker_allows(KB, PRIMARY)
+    app.record_breaker_outcome(KB, PRIMARY, ok=True)
+    assert app.breaker_state(KB, PRIMARY) == "closed"
+
+
+def test_abandoned_probe_expires(fresh_breakers):
+    trip()
+    cool_down(fresh_breakers)
+    assert app.breaker_allows(KB, PRIMARY)
+    fresh_breakers["breakers"][(KB, PRIMARY)]["probe_started_at"] -= 31
+    assert app.breaker_allows(KB, PRIMARY)
+
+
+def test_lane_falls_back_then_closes_when_every_lane_is_open():
+    trip()
+    lane = app.breaker_lane(KB, PRIMARY, FALLBACK)
+    assert (lane["model_arn"], lane["fallback"], lane["state"]) == (FALLBACK, True, "open")
+    trip(FALLBACK)
+    assert app.breaker_lane(KB, PRIMARY, FALLBACK)["model_arn"] is None
+
+
+def test_only_service_side_errors_count_as_failures():
+    assert app.is_breaker_failure(asyncio.TimeoutError())
+    assert app.is_breaker_failure(EndpointConnectionError(endpoint_url="https://bedrock"))
+    assert app.is_breaker_failure(client_error("ServiceUnavailableException", 503))
+    assert app.is_breaker_failure(client_error("ModelTimeoutException"))
+    assert not app.is_breaker_failure(client_error("ThrottlingException", 429))
+    assert not app.is_breaker_failure(client_error("ValidationException"))
+    assert not app.is_breaker_failure(ValueError("bad input"))
+
+
+def test_slo_follows_the_response_profile():
+    token = app.BREAKER_SLO_SECONDS.set(app.RESPONSE_PROFILES["fast"]["breaker_slo_seconds"])
+    try:
+        assert app.breaker_slo_seconds() == app.RESPONSE_PROFILES["fast"]["breaker_slo_seconds"]
+    finally:
+        app.BREAKER_SLO_SECONDS.reset(token)
+    assert app.breaker_slo_seconds() == app.RESPONSE_PROFILES["balanced"]["breaker_slo_seconds"]
+
+
+def test_generation_only_failures_open_the_lane(monkeypatch):
+    async def timed_out(*args, **kwargs):
+        raise asyncio.TimeoutError()
+
+    calls = []
+
+    async def answered(*args, **kwargs):
+        calls.append(args)
+        return "answer"
+
+    monkeypatch.setattr(app, "get_bedrock_runtime_client", lambda region_name=None: object())
+    monkeypatch.setattr(app, "ainvoke_model_text", timed_out)
+    chunks = [{
+        "content": "A player traded to another team keeps his Bird rights under the CBA.",
+        "uri": "s3://kb/cba.pdf",
+        "metadata": {},
+        "fingerprint": "bird",
+        "low_signal": False,
+    }]
+
+    def answer():
+        return asyncio.run(app.answer_from_chunks(
+            "Does a traded player keep his Bird rights?", [dict(chunk) for chunk in chunks], PRIMARY, "cba",
+            "us-east-1", {}, max_sources=4, exact_match_bias=False, knowledge_base_id=KB,
+        ))
+
+    for _ in range(3):
+        text, citations = answer()
+        assert text is None and citations
+    assert app.breaker_state(KB, PRIMARY) == "open"
+
+    monkeypatch.setattr(app, "ainvoke_model_text", answered)
+    assert answer()[0] is None
+    assert not calls
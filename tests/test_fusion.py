@@ -0,0 +1,41 @@
+import app
+
+
+def chunk(name):
+    return {"content": name, "uri": f"s3://kb/{name}", "fingerprint": name}
+
+
+def names(chunks):
+    return [item["content"] for item in chunks]
+
+
+def test_chunks_ranked_by_several_lists_lead():
+    fused = app.fuse_chunk_rankings([
+        [chunk("a"), chunk("b"), chunk("c")],
+        [chunk("c"), chunk("b"), chunk("d")],
+    ])
+    assert names(fused) == ["c", "b", "a", "d"]
+    assert [item["fused_rank"] for item in fused] == [1, 2, 3, 4]
+    assert fused[0]["fused_score"] == round(1 / (app.RRF_K + 3) + 1 / (app.RRF_K + 1), 5)
+
+
+def test_ties_keep_first_seen_order():
+    fused = app.fuse_chunk_rankings([[chunk("a"), chunk("b")], [chunk("b"), chunk("a")]])
+    assert names(fused) == ["a", "b"]
+
+
+def test_duplicates_within_a_list_count_once():
+    fused = app.fuse_chunk_rankings([[chunk("a"), chunk("a"), chunk("b")]])
+    assert names(fused) == ["a", "b"]
+    assert fused[1]["fused_score"] == round(1 / (app.RRF_K + 3), 5)
+
+
+def test_inputs_are_not_mutated():
+    original = chunk("a")
+    app.fuse_chunk_rankings([[original]])
+    assert "fused_rank" not in original
+
+
+def test_empty_lists():
+    assert app.fuse_chunk_rankings([]) == []
+    assert app.fuse_chunk_rankings([[], []]) == []
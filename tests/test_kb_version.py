@@ -0,0 +1,39 @@
+import threading
+
+import pytest
+
+import app
+
+
+@pytest.fixture
+def slow_poll(monkeypatch):
+    release = threading.Event()
+    polled = threading.Event()
+
+    def fetch(kb_id, region_name=None):
+        release.wait(5)
+        polled.set()
+        return f"{kb_id}:JOB1"
+
+    monkeypatch.setattr(app, "fetch_kb_ingestion_version", fetch)
+    monkeypatch.setattr(app, "_configured_kb_version", lambda kb_id: "")
+    monkeypatch.setenv("BEDROCK_KB_VERSION_POLL_SECONDS", "300")
+    app._kb_version_store.clear()
+    yield release, polled
+    release.set()
+    app._kb_version_store.clear()
+
+
+def test_first_lookup_does_not_wait_for_the_poll(slow_poll):
+    release, polled = slow_poll
+
+    assert app.kb_content_version("KB1") == ""
+    assert app.kb_content_version("KB1") == ""
+
+    release.set()
+    assert polled.wait(5)
+    for _ in range(100):
+        if app.kb_content_version("KB1"):
+            break
+        threading.Event().wait(0.01)
+    assert app.kb_content_version("KB1") == "KB1:JOB1"
@@ -0,0 +1,101 @@
+import sqlite3
+import time
+
+import pytest
+
+import app
+
+
+@pytest.fixture
+def cache_path(tmp_path, monkeypatch):
+    path = str(tmp_path / "bedrock_cache.sqlite3")
+    monkeypatch.setenv("BEDROCK_CACHE_PATH", path)
+    return path
+
+
+def add_aux(cache, key, size, accessed_at, created_at=None):
+    with cache["lock"]:
+        cache["conn"].execute(
+            "INSERT OR REPLACE INTO aux_llm VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (key, "rewrite", "rulebook", "x", size, created_at or time.time(), accessed_at),
+        )
+        cache["conn"].commit()
+
+
+def aux_keys(cache):
+    with cache["lock"]:
+        return sorted(row[0] for row in cache["conn"].execute("SELECT cache_key FROM aux_llm"))
+
+
+def test_schema_change_rebuilds_the_tables(cache_path):
+    conn = sqlite3.connect(cache_path)
+    conn.execute("CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT)")
+    conn.execute("INSERT INTO meta VALUES ('schema_version', '1')")
+    conn.execute("CREATE TABLE aux_llm (cache_key TEXT PRIMARY KEY, output TEXT)")
+    conn.execute("INSERT INTO aux_llm VALUES ('stale', 'old layout')")
+    conn.commit()
+    conn.close()
+
+    cache = app._persistent_cache(cache_path)
+    conn = cache["conn"]
+    version = conn.execute("SELECT value FROM meta WHERE key = 'schema_version'").fetchone()[0]
+    assert version == str(app.PERSISTENT_CACHE_SCHEMA_VERSION)
+    assert aux_keys(cache) == []
+    indexes = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'index'")}
+    assert {f"{table}_accessed_at" for table in app.PERSISTENT_CACHE_TABLES} <= indexes
+
+
+def test_matching_schema_keeps_rows(cache_path):
+    app.persistent_aux_set("kept", "rewrite", "rulebook", "output")
+    app._persistent_cache.clear()
+    assert app.persistent_aux_get("kept") == "output"
+
+
+def test_compaction_drops_expired_rows(cache_path):
+    cache = app._persistent_cache(cache_path)
+    expired = time.time() - app.PERSISTENT_CACHE_TTL_SECONDS - 60
+    add_aux(cache, "expired", 10, expired, created_at=expired)
+    add_aux(cache, "fresh", 10, time.time())
+    app.compact_persistent_cache(cache)
+    assert aux_keys(cache) == ["fresh"]
+
+
+def test_compaction_evicts_least_recently_read_rows_across_tables(cache_path, monkeypatch):
+    monkeypatch.setattr(app, "PERSISTENT_CACHE_MAX_BYTES", 1000)
+    monkeypatch.setattr(app, "PERSISTENT_CACHE_EVICT_BATCH", 2)
+    cache = app._persistent_cache(cache_path)
+    now = time.time()
+    for index in range(6):
+        add_aux(cache, f"aux-{index}", 200, now - 100 + index)
+    with cache["lock"]:
+        cache["conn"].execute(
+            "INSERT INTO retrievals VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            ("KB1", "oldest", "query", "[]", "v1", 200, now, now - 200),
+        )
+        cache["conn"].commit()
+
+    app.compact_persistent_cache(cache)
+    # 1400 bytes against a 900-byte target: the three least recently read rows go.
+    assert aux_keys(cache) == ["aux-2", "aux-3", "aux-4", "aux-5"]
+    with cache["lock"]:
+        assert cache["conn"].execute("SELECT COUNT(*) FROM retrievals").fetchone()[0] == 0
+
+
+def test_touches_are_batched_and_flushed_before_compaction(cache_path, monkeypatch):
+    monkeypatch.setattr(app, "PERSISTENT_CACHE_MAX_BYTES", 400)
+    monkeypatch.setattr(app, "PERSISTENT_TOUCH_FLUSH_SECONDS", 3600.0)
+    cache = app._persistent_cache(cache_path)
+    now = time.time()
+    add_aux(cache, "read-recently", 200, now - 100)
+    add_aux(cache, "never-read", 200, now - 50)
+    add_aux(cache, "newest", 100, now)
+
+    app.persistent_touch("aux_llm", ("read-recently",))
+    with cache["lock"]:
+        accessed_at = cache["conn"].execute(
+            "SELECT accessed_at FROM aux_llm WHERE cache_key = 'read-recently'"
+        ).fetchone()[0]
+    assert accessed_at == pytest.approx(now - 100)
+
+    app.compact_persistent_cache(cache)
+    assert aux_keys(cache) == ["newest", "read-recently"]
@@ -0,0 +1,127 @@
+import asyncio
+import time
+
+import pytest
+from botocore.exceptions import ClientError
+
+import app
+
+MODEL = "arn:aws:bedrock:us-east-1::foundation-model/test-model"
+
+
+@pytest.fixture(autouse=True)
+def fresh_limiter(monkeypatch):
+    monkeypatch.setenv("BEDROCK_RATE_RETRIEVE_RPS", "0.1")
+    monkeypatch.setenv("BEDROCK_RATE_RETRIEVE_BURST", "2")
+    monkeypatch.setenv("BEDROCK_RATE_MODEL_RPS", "0.1")
+    monkeypatch.setenv("BEDROCK_RATE_MODEL_BURST", "4")
+    monkeypatch.setenv("BEDROCK_FANOUT_WORKERS", "4")
+    limiter = app._bedrock_rate_limiter()
+    with limiter["lock"]:
+        limiter["buckets"].clear()
+        limiter["waiters"].clear()
+    yield limiter
+
+
+def bucket(limiter, key):
+    return limiter["buckets"][key]
+
+
+def test_acquire_takes_a_token_and_slot_from_every_bucket(fresh_limiter):
+    keys = app.acquire_bedrock_capacity("retrieve", MODEL)
+    assert keys == (("api", "retrieve"), ("model", MODEL))
+    assert bucket(fresh_limiter, ("api", "retrieve"))["in_flight"] == 1
+    assert bucket(fresh_limiter, ("model", MODEL))["tokens"] == pytest.approx(3, abs=0.01)
+
+    app.release_bedrock_capacity(keys)
+    assert bucket(fresh_limiter, ("api", "retrieve"))["in_flight"] == 0
+    assert bucket(fresh_limiter, ("api", "retrieve"))["tokens"] == pytest.approx(1, abs=0.01)
+
+
+def test_unused_release_returns_the_token(fresh_limiter):
+    keys = app.acquire_bedrock_capacity("retrieve")
+    app.release_bedrock_capacity(keys, unused=True)
+    assert bucket(fresh_limiter, ("api", "retrieve"))["tokens"] == pytest.approx(2, abs=0.01)
+
+
+def test_empty_bucket_raises_throttling_at_the_deadline(fresh_limiter):
+    for _ in range(2):
+        app.release_bedrock_capacity(app.acquire_bedrock_capacity("retrieve"))
+    timeouts = fresh_limiter["stats"]["timeouts"]
+    with pytest.raises(ClientError) as excinfo:
+        app.acquire_bedrock_capacity("retrieve", deadline=time.monotonic() + 0.05)
+    assert excinfo.value.response["Error"]["Code"] == "ThrottlingException"
+    assert fresh_limiter["stats"]["timeouts"] == timeouts + 1
+    assert not fresh_limiter["waiters"]
+
+
+def test_throttle_halves_limit_and_rate_for_its_buckets_only(fresh_limiter):
+    keys = app.acquire_bedrock_capacity("retrieve", MODEL)
+    app.release_bedrock_capacity(keys, throttled=True)
+    retrieve = bucket(fresh_limiter, ("api", "retrieve"))
+    assert retrieve["limit"] == 2
+    assert retrieve["rate"] == pytest.approx(0.05)
+    assert retrieve["tokens"] <= 0
+
+    assert app.bedrock_throttle_active((("api", "retrieve"),))
+    assert app.bedrock_throttle_active(app.stage_bedrock_keys("first_pass", MODEL))
+    assert not app.bedrock_throttle_active((("api", "invoke_model"),))
+
+
+def test_repeated_throttles_stop_at_the_floor(fresh_limiter):
+    for _ in range(6):
+        app.release_bedrock_capacity(app.acquire_bedrock_capacity("retrieve"), throttled=True)
+        bucket(fresh_limiter, ("api", "retrieve"))["tokens"] = 1.0
+    retrieve = bucket(fresh_limiter, ("api", "retrieve"))
+    assert retrieve["limit"] == 1
+    assert retrieve["rate"] == pytest.approx(retrieve["base_rate"] / 10)
+
+
+def test_clean_calls_restore_the_limit_one_step_at_a_time(fresh_limiter):
+    keys = app.acquire_bedrock_capacity("retrieve")
+    app.release_bedrock_capacity(keys, throttled=True)
+    retrieve = bucket(fresh_limiter, ("api", "retrieve"))
+    for _ in range(retrieve["limit"]):
+        retrieve["tokens"] = 1.0
+        app.release_bedrock_capacity(app.acquire_bedrock_capacity("retrieve"))
+    assert retrieve["limit"] == 3
+    assert retrieve["rate"] == pytest.approx(0.0625)
+
+
+def test_higher_priority_waiter_is_served_first(fresh_limiter):
+    with fresh_limiter["lock"]:
+        with app.bedrock_priority("background"):
+            background = app._join_waiters(fresh_limiter, "retrieve", None)
+        interactive = app._join_waiters(fresh_limiter, "retrieve", None)
+        now = time.monotonic()
+        assert app._try_grant(fresh_limiter, background, now) > 0
+        assert app._try_grant(fresh_limiter, interactive, now) == 0.0
+        fresh_limiter["waiters"].clear()
+
+
+def test_stage_keys_add_the_model_bucket_only_for_generation():
+    assert app.stage_bedrock_keys("first_pass", MODEL) == (("api", "retrieve_and_generate"), ("model", MODEL))
+    assert app.stage_bedrock_keys("first_pass") == (("api", "retrieve_and_generate"),)
+    assert app.stage_bedrock_keys("unknown", MODEL) == ()
+
+
+def test_aux_helpers_are_admitted_before_dispatch(fresh_limiter):
+    def helper():
+        grant = app.BEDROCK_GRANT.get()
+        return grant is not None and grant["model_id"] == app.DEFAULT_QUIZ_MODEL_ID
+
+    assert asyncio.run(app.run_aux_offloaded(helper, fallback=None))
+
+
+def test_aux_helper_is_skipped_when_no_capacity_frees_up(fresh_limiter, monkeypatch):
+    monkeypatch.setenv("BEDROCK_RATE_INVOKE_MODEL_RPS", "0.1")
+    monkeypatch.setitem(app.BEDROCK_AWAIT_TIMEOUTS, "invoke_model", 0.05)
+    keys = app.acquire_bedrock_capacity("invoke_model", app.DEFAULT_QUIZ_MODEL_ID)
+    bucket(fresh_limiter, ("api", "invoke_model"))["tokens"] = 0.0
+    ran = []
+    try:
+        result = asyncio.run(app.run_aux_offloaded(lambda: ran.append(1), fallback="skipped"))
+    finally:
+        app.release_bedrock_capacity(keys)
+    assert result == "skipped"
+    assert not ran
@@ -0,0 +1,87 @@
+from types import SimpleNamespace
+
+import app
+
+
+def scalar():
+    return SimpleNamespace(type_name="string")
+
+
+def structure(**members):
+    return SimpleNamespace(type_name="structure", members=members)
+
+
+RETRIEVE_SHAPE = structure(
+    knowledgeBaseId=scalar(),
+    retrievalQuery=structure(text=scalar()),
+    retrievalConfiguration=structure(
+        vectorSearchConfiguration=structure(
+            numberOfResults=scalar(),
+            filter=SimpleNamespace(type_name="structure", members={}, is_document_type=True),
+        ),
+    ),
+    tags=SimpleNamespace(type_name="list", member=structure(key=scalar())),
+    labels=SimpleNamespace(type_name="map", value=structure(name=scalar())),
+)
+
+
+def stub_client(api_version, shape=RETRIEVE_SHAPE):
+    service_model = SimpleNamespace(
+        service_name="bedrock-agent-runtime",
+        api_version=api_version,
+        operation_model=lambda api_name: SimpleNamespace(input_shape=shape),
+    )
+    meta = SimpleNamespace(service_model=service_model, method_to_api_mapping={"retrieve": "Retrieve"})
+    return SimpleNamespace(meta=meta)
+
+
+def test_unmodelled_fields_are_pruned_in_place():
+    params = {
+        "knowledgeBaseId": "KB1",
+        "retrievalQuery": {"text": "bird rights"},
+        "retrievalConfiguration": {
+            "vectorSearchConfiguration": {
+                "numberOfResults": 8,
+                "overrideSearchType": "HYBRID",
+                "rerankingConfiguration": {"type": "BEDROCK_RERANKING_MODEL"},
+            },
+        },
+    }
+    pruned = app.prune_request_params(stub_client("2099-01-01"), "retrieve", params)
+    assert sorted(pruned) == [
+        "retrievalConfiguration.vectorSearchConfiguration.overrideSearchType",
+        "retrievalConfiguration.vectorSearchConfiguration.rerankingConfiguration",
+    ]
+    assert params["retrievalConfiguration"]["vectorSearchConfiguration"] == {"numberOfResults": 8}
+
+
+def test_document_types_lists_and_maps():
+    params = {
+        "retrievalConfiguration": {"vectorSearchConfiguration": {"filter": {"equals": {"key": "a", "value": 1}}}},
+        "tags": [{"key": "a", "extra": 1}],
+        "labels": {"first": {"name": "x", "extra": 2}},
+    }
+    pruned = app.prune_request_params(stub_client("2099-01-02"), "retrieve", params)
+    assert sorted(pruned) == ["labels.extra", "tags.extra"]
+    assert params["retrievalConfiguration"]["vectorSearchConfiguration"]["filter"] == {
+        "equals": {"key": "a", "value": 1}
+    }
+    assert params["tags"] == [{"key": "a"}]
+    assert params["labels"] == {"first": {"name": "x"}}
+
+
+def test_unknown_model_leaves_params_alone():
+    params = {"anything": 1}
+    assert app.prune_request_params(SimpleNamespace(meta=None), "retrieve", params) == []
+    assert app.prune_request_params(stub_client("2099-01-03"), "retrieve_and_generate", params) == []
+    assert params == {"anything": 1}
+
+
+def test_shapes_are_resolved_once_per_sdk_version():
+    calls = []
+    client = stub_client("2099-01-04")
+    lookup = client.meta.service_model.operation_model
+    client.meta.service_model.operation_model = lambda api_name: calls.append(api_name) or lookup(api_name)
+    for _ in range(3):
+        app.prune_request_params(client, "retrieve", {"knowledgeBaseId": "KB1"})
+    assert calls == ["Retrieve"]
@@ -0,0 +1,53 @@
+import pytest
+
+import app
+
+SETTINGS = {"number_of_results": 8, "max_sources": 4, "strict_grounding": True}
+CACHED = "Can the Celtics trade a player to the Lakers?"
+
+
+@pytest.fixture(autouse=True)
+def session_cache(monkeypatch):
+    monkeypatch.setattr(app, "mode_content_version", lambda mode: "v1")
+    monkeypatch.setenv("BEDROCK_SEMANTIC_CACHE", "true")
+    for name in (
+        "response_cache_by_mode",
+        "response_cache_index_by_mode",
+        "response_cache_version_by_mode",
+        "semantic_index_by_mode",
+        "helpful_norms_by_mode",
+        "helpful_questions_by_mode",
+    ):
+        app.st.session_state[name] = {}
+    app._cache_set(
+        "cba",
+        app._cache_key(CACHED, "cba", "balanced", SETTINGS, "s1"),
+        "Yes, the Celtics can trade him to the Lakers.",
+        [{"content": "Trade rules", "uri": "s3://kb/cba.pdf"}],
+        question=CACHED,
+        retrieval_settings=SETTINGS,
+    )
+
+
+def similar(question):
+    return app._cache_get_similar("cba", question, "balanced", SETTINGS)
+
+
+def test_paraphrase_is_served():
+    hit = similar("Can the Celtics trade a player to the Lakers now?")
+    assert hit is not None and hit[2] == CACHED
+
+
+@pytest.mark.parametrize("question", [
+    "Can the Celtics trade a player from the Lakers?",
+    "Should the Celtics trade a player to the Lakers?",
+    "Can the Celtics not trade a player to the Lakers?",
+    "Can the Lakers trade a player to the Celtics?",
+])
+def test_answer_changing_rewording_is_not_served(question):
+    assert similar(question) is None
+
+
+def test_semantic_terms_keep_answer_changing_words():
+    assert "from" in app.semantic_terms("trade from the Lakers", "cba")
+    assert "should" in app.semantic_terms("should they trade", "cba")